@@ -4,7 +4,9 @@ AniList API Client - GraphQL API for anime and episode information
 Documentation: https://anilist.gitbook.io/anilist-apiv2-docs/
 """
 
-import requests
+from utils import http_client, async_engine
+from utils.anilist_batch import batcher
+import asyncio
 import json
 
 ANILIST_API_URL = "https://graphql.anilist.co"
@@ -58,7 +60,7 @@ def search_anime(query, limit=10):
     }
     
     try:
-        response = requests.post(
+        response = http_client.post(
             ANILIST_API_URL,
             json={'query': graphql_query, 'variables': variables},
             headers={'Content-Type': 'application/json'}
@@ -113,83 +115,68 @@ def get_anime_info(anime_id):
     Returns:
         Dictionary with detailed anime information
     """
-    graphql_query = """
-    query ($id: Int) {
-        Media(id: $id, type: ANIME) {
-            id
-            title {
-                romaji
-                english
-                native
-            }
-            episodes
-            status
-            coverImage {
-                large
-            }
-            description
-            format
-            season
-            seasonYear
-            averageScore
-            genres
-            studios {
-                nodes {
-                    name
-                }
-            }
-        }
-    }
-    """
-    
-    variables = {"id": anime_id}
-    
+    return async_engine.run(get_anime_info_async(anime_id))
+
+async def get_anime_info_async(anime_id):
+    """Async version of get_anime_info() - batched with other AniList lookups"""
     try:
-        response = requests.post(
-            ANILIST_API_URL,
-            json={'query': graphql_query, 'variables': variables},
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            media = data.get('data', {}).get('Media', {})
-            
-            title_obj = media.get('title', {})
-            title = (title_obj.get('english') or 
-                    title_obj.get('romaji') or 
-                    title_obj.get('native') or 
-                    'Unknown')
-            
-            studios = media.get('studios', {}).get('nodes', [])
-            studio_names = [s.get('name') for s in studios]
-            
-            return {
-                'id': media.get('id'),
-                'title': title,
-                'title_romaji': title_obj.get('romaji'),
-                'title_english': title_obj.get('english'),
-                'title_native': title_obj.get('native'),
-                'episodes': media.get('episodes'),
-                'status': media.get('status'),
-                'cover_image': media.get('coverImage', {}).get('large'),
-                'description': media.get('description'),
-                'format': media.get('format'),
-                'season': media.get('season'),
-                'year': media.get('seasonYear'),
-                'score': media.get('averageScore'),
-                'genres': media.get('genres', []),
-                'studios': studio_names,
-                'source': 'anilist'
-            }
-        else:
-            print(f"[anilist] API error: {response.status_code}")
+        media = await batcher.lookup('id', int(anime_id))
+        if not media:
+            print(f"[anilist] Anime {anime_id} not found")
             return None
-            
+        return _anime_info(media)
+        
     except Exception as e:
         print(f"[anilist] Info error: {e}")
         return None
 
+def get_anime_infos(anime_ids):
+    """
+    Get information about many anime in a few batched requests
+    
+    Args:
+        anime_ids: AniList anime IDs
+    
+    Returns:
+        Dictionary of anime ID -> info dictionary (None if not found)
+    """
+    return async_engine.run(get_anime_infos_async(anime_ids))
+
+async def get_anime_infos_async(anime_ids):
+    """Async version of get_anime_infos()"""
+    anime_ids = list(anime_ids)
+    infos = await asyncio.gather(*(get_anime_info_async(i) for i in anime_ids))
+    return dict(zip(anime_ids, infos))
+
+def _anime_info(media):
+    title_obj = media.get('title') or {}
+    title = (title_obj.get('english') or 
+            title_obj.get('romaji') or 
+            title_obj.get('native') or 
+            'Unknown')
+    
+    studios = (media.get('studios') or {}).get('nodes', [])
+    studio_names = [s.get('name') for s in studios]
+    
+    return {
+        'id': media.get('id'),
+        'title': title,
+        'title_romaji': title_obj.get('romaji'),
+        'title_english': title_obj.get('english'),
+        'title_native': title_obj.get('native'),
+        'episodes': media.get('episodes'),
+        'status': media.get('status'),
+        'cover_image': (media.get('coverImage') or {}).get('large'),
+        'description': media.get('description'),
+        'format': media.get('format'),
+        'season': media.get('season'),
+        'year': media.get('seasonYear'),
+        'score': media.get('averageScore'),
+        'genres': media.get('genres') or [],
+        'studios': studio_names,
+        'source': 'anilist'
+    }
+
 def get_episode_list(anime_id, episode_count):
     """
     Generate episode list for an anime
@@ -9,19 +9,24 @@ import subprocess
 import sys
 import webbrowser
 
-# Import all providers
-from scrapers import samehadaku_scraper
-from scrapers import otakudesu_scraper
-from scrapers import sokuja_scraper
+# Providers come from the registry, lookups go through the shared stream engine
+from scrapers import registry
 import logging
 from utils import stream_proxy
 from utils.database import db
 from utils.config import config
+from utils import prewarm, stream_engine
 
 # Setup logging
 logging.basicConfig(filename='tui_debug.log', level=logging.DEBUG, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Providers in the main menu (menu order)
+TUI_PROVIDERS = ['sokuja', 'otakudesu', 'samehadaku', 'torrent']
+
+# Providers searched by "search all" (episode-based sites)
+SEARCH_PROVIDERS = ['samehadaku', 'otakudesu', 'sokuja']
+
 class AnimeTUI:
     def __init__(self, stdscr):
         self.stdscr = stdscr
@@ -133,7 +138,7 @@ class AnimeTUI:
                 self.handle_search_input()
             elif self.current_view == 'PROVIDER_SELECT':
                 # Main Menu options
-                options = ['samehadaku', 'otakudesu', 'sokuja', 'torrent', 'HISTORY', 'FAVORITES']
+                options = TUI_PROVIDERS + ['HISTORY', 'FAVORITES']
                 if key == curses.KEY_UP:
                     self.selected_index = max(0, self.selected_index - 1)
                 elif key == curses.KEY_DOWN:
@@ -174,12 +179,9 @@ class AnimeTUI:
                         # Let's assume we can try to detect or just use the stored info if we had provider.
                         # For now, let's try to find provider from url or default
                         
-                        # Simple heuristic for provider based on URL
-                        provider = 'otakudesu' # Default
-                        if 'samehadaku' in item['anime_url']:
-                            provider = 'samehadaku'
-                        elif 'sokuja' in item['anime_url']:
-                            provider = 'sokuja'
+                        # Provider from the URL's site
+                        found = registry.for_url(item['anime_url'])
+                        provider = found.key if found else 'otakudesu' # Default
                         
                         self.selected_provider = provider
                         self.status_message = f"Memuat episode {item['episode_num']}..."
@@ -192,12 +194,7 @@ class AnimeTUI:
                         
                         # Fetch episodes
                         try:
-                            if provider == 'samehadaku':
-                                self.episodes = samehadaku_scraper.get_anime_episodes(item['anime_url'])
-                            elif provider == 'otakudesu':
-                                self.episodes = otakudesu_scraper.get_anime_episodes(item['anime_url'])
-                            elif provider == 'sokuja':
-                                self.episodes = sokuja_scraper.get_anime_episodes(item['anime_url'])
+                            self.episodes = stream_engine.episodes(provider, item['anime_url'])
                             
                             # Find the target episode index
                             target_ep = item['episode_num']
@@ -234,17 +231,9 @@ class AnimeTUI:
         if self.current_view == 'PROVIDER_SELECT':
             self.stdscr.addstr(3, 2, "📺 Select a provider:", curses.A_BOLD)
             
-            # Assuming self.PROVIDERS is defined elsewhere, e.g., in __init__
-            # For now, using a placeholder list based on draw_provider_select_view
-            providers_list = [
-                {'name': 'Sokuja', 'id': 'sokuja', 'desc': '480p, 720p'},
-                {'name': 'Otakudesu', 'id': 'otakudesu', 'desc': '360p, 480p, 720p (35+ servers)'},
-                {'name': 'Samehadaku', 'id': 'samehadaku', 'desc': '360p Blogspot'}
-            ]
-            
-            for i, provider_info in enumerate(providers_list):
+            for i, key in enumerate(TUI_PROVIDERS):
                 y = 5 + i
-                display_name = provider_info['name']
+                display_name = registry.get(key).name
                 if i == self.selected_index:
                     self.stdscr.addstr(y, 4, f"▶ {display_name}", curses.A_REVERSE)
                 else:
@@ -318,13 +307,10 @@ class AnimeTUI:
             prov = result.get('provider', 'unknown')
             providers_count[prov] = providers_count.get(prov, 0) + 1
         
-        summary_parts = []
-        if 'samehadaku' in providers_count:
-            summary_parts.append(f"🟢 [Samehadaku] {providers_count['samehadaku']}")
-        if 'otakudesu' in providers_count:
-            summary_parts.append(f"🔵 [Otakudesu] {providers_count['otakudesu']}")
-        if 'sokuja' in providers_count:
-            summary_parts.append(f"🟡 [Sokuja] {providers_count['sokuja']}")
+        summary_parts = [
+            f"{registry.get(key).icon} [{registry.get(key).name}] {providers_count[key]}"
+            for key in SEARCH_PROVIDERS if key in providers_count
+        ]
         
         if summary_parts:
             self.stdscr.attron(curses.color_pair(4))
@@ -346,19 +332,8 @@ class AnimeTUI:
             prefix = "▶ " if i == self.selected_index else "  "
             
             # Get provider badge and color
-            provider = result.get('provider', '')
-            if provider == 'samehadaku':
-                provider_badge = "🟢"
-                provider_name = "SMH"  # Short name
-            elif provider == 'otakudesu':
-                provider_badge = "🔵"
-                provider_name = "OTK"
-            elif provider == 'sokuja':
-                provider_badge = "🟡"
-                provider_name = "SKJ"
-            else:
-                provider_badge = "⚪"
-                provider_name = "???"
+            provider = registry.get(result.get('provider', ''))
+            provider_badge = provider.icon if provider else "⚪"
             
             if i == self.selected_index:
                 self.stdscr.attron(curses.color_pair(2) | curses.A_BOLD)
@@ -392,15 +367,8 @@ class AnimeTUI:
         self.stdscr.attron(curses.color_pair(1))
         
         # Get provider badge
-        provider = self.selected_provider if self.selected_provider else ''
-        if provider == 'samehadaku':
-            provider_badge = "🟢 Samehadaku"
-        elif provider == 'otakudesu':
-            provider_badge = "🔵 Otakudesu"
-        elif provider == 'sokuja':
-            provider_badge = "🟡 Sokuja"
-        else:
-            provider_badge = ""
+        provider = registry.get(self.selected_provider or '')
+        provider_badge = provider.display if provider else ""
         
         title = self.selected_anime['title'] if self.selected_anime else "Episodes"
         header = f"{provider_badge} | {title[:width-30]}" if provider_badge else title[:width-15]
@@ -453,12 +421,7 @@ class AnimeTUI:
         self.stdscr.attroff(curses.color_pair(4))
         y += 2
         
-        providers = [
-            {'name': 'Sokuja',     'id': 'sokuja',     'icon': '🟡', 'desc': '480p-720p │ Fast streaming'},
-            {'name': 'Otakudesu',  'id': 'otakudesu',  'icon': '🔵', 'desc': '360p-720p │ 35+ servers'},
-            {'name': 'Samehadaku', 'id': 'samehadaku', 'icon': '🟢', 'desc': '360p-1080p │ Mega, Vidhide'},
-            {'name': 'Torrent',    'id': 'torrent',    'icon': '🎲', 'desc': '720p-1080p │ Nyaa.si Seeders'}
-        ]
+        providers = [registry.get(key) for key in TUI_PROVIDERS]
         
         for i, provider in enumerate(providers):
             prefix = "▶ " if i == self.selected_index else "  "
@@ -468,7 +431,7 @@ class AnimeTUI:
             else:
                 self.stdscr.attron(curses.color_pair(4))
             
-            line = f"{prefix}{provider['icon']} {provider['name']:<12} │ {provider['desc']}"
+            line = f"{prefix}{provider.icon} {provider.name:<12} │ {provider.desc}"
             try:
                 self.stdscr.addstr(y, 4, line[:width-8])
             except:
@@ -582,14 +545,7 @@ class AnimeTUI:
         
         # Get provider badge
         provider = self.selected_provider if self.selected_provider else ''
-        if provider == 'samehadaku':
-            provider_badge = "🟢"
-        elif provider == 'otakudesu':
-            provider_badge = "🔵"
-        elif provider == 'sokuja':
-            provider_badge = "🟡"
-        else:
-            provider_badge = ""
+        provider_badge = registry.get(provider).icon if registry.get(provider) else ""
         
         ep_title = self.selected_episode['title'][:width-50] if self.selected_episode else "Episode"
         title = f"{provider_badge} {provider.upper()} | {ep_title}" if provider else f"Select Server: {ep_title}"
@@ -696,53 +652,17 @@ class AnimeTUI:
             self.status_message = f"🔍 Searching all providers for '{query}'..."
             self.stdscr.refresh()
             
-            # Search all providers
-            all_results = []
-            
-            # Search Samehadaku
+            # Search all providers concurrently (skipping any whose circuit breaker is open)
             try:
-                results = samehadaku_scraper.search_anime(query)
-                for r in results:
-                    all_results.append({
-                        'title': r['title'],
-                        'url': r['url'],
-                        'provider': 'samehadaku',
-                        'provider_display': 'Samehadaku'
-                    })
+                all_results = stream_engine.search_all(query, SEARCH_PROVIDERS)
             except Exception as e:
-                print(f"Samehadaku search error: {e}")
-            
-            # Search Otakudesu
-            try:
-                results = otakudesu_scraper.search_anime(query)
-                for r in results:
-                    all_results.append({
-                        'title': r['title'],
-                        'url': r['url'],
-                        'provider': 'otakudesu',
-                        'provider_display': 'Otakudesu'
-                    })
-            except Exception as e:
-                print(f"Otakudesu search error: {e}")
-            
-            # Search Sokuja
-            try:
-                results = sokuja_scraper.search_anime(query)
-                for r in results:
-                    all_results.append({
-                        'title': r['title'],
-                        'url': r['url'],
-                        'provider': 'sokuja',
-                        'provider_display': 'Sokuja'
-                    })
-            except Exception as e:
-                print(f"Sokuja search error: {e}")
+                print(f"Search error: {e}")
+                all_results = []
             
             self.search_results = all_results
             self.selected_index = 0
             
         if self.selected_provider == 'torrent':
-            from scrapers import nyaa_scraper
             self.search_results = [
                 {
                     'title': f"[Nyaa] {result['title']}",
@@ -751,7 +671,7 @@ class AnimeTUI:
                     'source': 'torrent',
                     'metadata': result  # Store full torrent metadata
                 }
-                for result in nyaa_scraper.search_anime(query)
+                for result in stream_engine.search('torrent', query)
             ]
         
         if self.search_results:
@@ -792,14 +712,7 @@ class AnimeTUI:
             
             # Get episodes from provider
             try:
-                if self.selected_provider == 'samehadaku':
-                    self.episodes = samehadaku_scraper.get_anime_episodes(self.selected_anime['url'])
-                elif self.selected_provider == 'otakudesu':
-                    self.episodes = otakudesu_scraper.get_anime_episodes(self.selected_anime['url'])
-                elif self.selected_provider == 'sokuja':
-                    self.episodes = sokuja_scraper.get_anime_episodes(self.selected_anime['url'])
-                else:
-                    self.episodes = []
+                self.episodes = stream_engine.episodes(self.selected_provider, self.selected_anime['url'])
             except Exception as e:
                 print(f"Error getting episodes: {e}")
                 self.episodes = []
@@ -822,14 +735,7 @@ class AnimeTUI:
             try:
                 logging.info(f"Fetching links for {self.selected_provider} - {self.selected_episode['url']}")
                 
-                if self.selected_provider == 'samehadaku':
-                        links = samehadaku_scraper.get_all_video_links(self.selected_episode['url'])
-                elif self.selected_provider == 'otakudesu':
-                    links = otakudesu_scraper.get_video_links(self.selected_episode['url'])
-                elif self.selected_provider == 'sokuja':
-                    links = sokuja_scraper.get_video_links(self.selected_episode['url'])
-                else:
-                    links = []
+                links = stream_engine.links(self.selected_provider, self.selected_episode['url'])
                 
                 logging.info(f"Raw links found: {len(links)}")
                 for l in links:
@@ -943,47 +849,13 @@ class AnimeTUI:
                 self.draw()
                 
                 try:
-                    results = None
-                    episodes = None
-
-                    if self.selected_provider == 'sokuja':
-                        results = sokuja_scraper.search_anime(query)
-                        if results:
-                            episodes = sokuja_scraper.get_anime_episodes(results[0]['url'])
-                            for ep in episodes:
-                                if ep['episode_number'] == ep_number:
-                                    links = sokuja_scraper.get_video_links(ep['url'])
-                                    if links:
-                                        organized = self.organize_server_list(links)
-                                        if organized:
-                                            self.status_message = f"✓ Found: {query[:30]}"
-                                            return organized
-                    
-                    elif self.selected_provider == 'otakudesu':
-                        results = otakudesu_scraper.search_anime(query)
-                        if results:
-                            episodes = otakudesu_scraper.get_anime_episodes(results[0]['url'])
-                            for ep in episodes:
-                                if ep['episode_number'] == ep_number:
-                                    links = otakudesu_scraper.get_video_links(ep['url'])
-                                    if links:
-                                        organized = self.organize_server_list(links)
-                                        if organized:
-                                            self.status_message = f"✓ Found: {query[:30]}"
-                                            return organized
-                    
-                    elif self.selected_provider == 'samehadaku':
-                        results = samehadaku_scraper.search_anime(query)
-                        if results:
-                            episodes = samehadaku_scraper.get_anime_episodes(results[0]['url'])
-                            for ep in episodes:
-                                if ep['episode_number'] == ep_number:
-                                    links = samehadaku_scraper.get_all_video_links(ep['url'])
-                                    if links:
-                                        organized = self.organize_server_list(links)
-                                        if organized:
-                                            self.status_message = f"✓ Found: {query[:30]}"
-                                            return organized
+                    # Best-matching search result, exact episode number
+                    links = stream_engine.find_episode_links(self.selected_provider, query, None, ep_number, unique_queries)
+                    if links:
+                        organized = self.organize_server_list(links)
+                        if organized:
+                            self.status_message = f"✓ Found: {query[:30]}"
+                            return organized
                 except Exception as e:
                     # Log the error so failures are visible during debugging,
                     # then continue to the next search query.
@@ -1134,14 +1006,7 @@ class AnimeTUI:
         
         # Get provider info
         provider = self.selected_provider if self.selected_provider else 'Unknown'
-        if provider == 'samehadaku':
-            provider_display = "🟢 Samehadaku"
-        elif provider == 'otakudesu':
-            provider_display = "🔵 Otakudesu"
-        elif provider == 'sokuja':
-            provider_display = "🟡 Sokuja"
-        else:
-            provider_display = provider
+        provider_display = registry.get(provider).display if registry.get(provider) else provider
         
         # Resolve browser embeds to direct URLs if possible
         if link_type == 'browser_embed':
@@ -1155,7 +1020,7 @@ class AnimeTUI:
             # First, check if it's an Otakudesu link that needs unwrapping
             if video_url.startswith('otakudesu:'):
                 print(f"🔄 Unwrapping Otakudesu link...")
-                resolved = otakudesu_scraper.resolve_otakudesu_url(video_url)
+                resolved = stream_engine.resolve(video_url)
                 if resolved:
                     if isinstance(resolved, dict):
                         video_url = resolved['url']
@@ -1164,8 +1029,7 @@ class AnimeTUI:
                         video_url = resolved
                     print(f"✓ Unwrapped: {video_url[:60]}...")
             
-            from utils.embed_resolvers import resolve_embed_url
-            direct_url = resolve_embed_url(video_url, server_name)
+            direct_url = stream_engine.resolve(video_url, server_name)
             
             if direct_url and direct_url != video_url:
                 print(f"\n✓ Found direct URL!")
@@ -1186,7 +1050,7 @@ class AnimeTUI:
         if video_url.startswith('ajax:'):
             print(f"\n🔄 Fetching embed URL for {title}...")
             print(f"📺 Provider: {provider_display}")
-            real_url = samehadaku_scraper.get_streaming_url(video_url)
+            real_url = stream_engine.resolve(video_url)
             if real_url:
                 # Check if it's a dict with headers (Blogger/Google Video)
                 if isinstance(real_url, dict):
@@ -1218,7 +1082,7 @@ class AnimeTUI:
         if video_url.startswith('otakudesu:'):
             print(f"\n🔄 Resolving Otakudesu stream for {title}...")
             print(f"📺 Provider: {provider_display}")
-            resolved = otakudesu_scraper.resolve_otakudesu_url(video_url)
+            resolved = stream_engine.resolve(video_url)
             
             if resolved:
                 if isinstance(resolved, dict):
@@ -1303,8 +1167,7 @@ class AnimeTUI:
                     print(f"🔗 Embed: {video_url[:80]}...")
                     print("⏳ Extracting direct stream URL...\n")
 
-                    from utils.embed_resolvers import resolve_embed_url
-                    direct_url = resolve_embed_url(video_url, server_name)
+                    direct_url = stream_engine.resolve(video_url, server_name)
                     
                     if direct_url:
                         # Check if resolver returned dict with headers
@@ -1421,6 +1284,8 @@ class AnimeTUI:
             self.status_message = "🔍 Press / to search | ❌ q to quit"
 
 def main(stdscr):
+    # Warm DNS + provider connections while the user types the first search
+    prewarm.prewarm(prewarm.TUI_HOSTS)
     app = AnimeTUI(stdscr)
     app.run()
 
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Parser Benchmarks
+Runs every parse function in scrapers/ and utils/embed_resolvers.py against
+saved pages in benchmarks/fixtures/ and reports wall time, CPU time and peak
+Python allocations per call. Offline and repeatable - no site is contacted.
+
+Usage:
+    python benchmarks/bench_parsers.py                # Run and print a table
+    python benchmarks/bench_parsers.py --check        # Compare with baseline.json (exit 1 on regression)
+    python benchmarks/bench_parsers.py --save         # Write the current numbers as the new baseline
+    python benchmarks/bench_parsers.py -k nyaa        # Only cases whose name contains "nyaa"
+    python benchmarks/bench_parsers.py --record nyaa_search.html "https://nyaa.si/?q=one+piece"
+
+--check fails when a case got slower (CPU time) or allocates more than the
+tolerance, when a parser's output changed, or when a parse function has no
+case. Timings are machine specific: --save on the machine you compare on.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scrapers import animetosho_scraper, nyaa_scraper, otakudesu_scraper, samehadaku_scraper, sokuja_scraper
+from utils import embed_resolvers, fast_extract, html_parser, release_parser, title_matcher
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Modules whose parse_* / find_* functions must all have a case
+PARSER_MODULES = [
+    animetosho_scraper, nyaa_scraper, otakudesu_scraper, samehadaku_scraper,
+    sokuja_scraper, embed_resolvers,
+]
+
+# Minimum measured time per repeat (calls are batched until they take this long)
+MIN_REPEAT_TIME = 0.05
+REPEAT = 5
+
+# Allowed slowdown / extra allocation before --check fails
+TOLERANCE = 0.25
+
+
+def otakudesu_episode_doc(html):
+    return html_parser.parse(html, otakudesu_scraper.EPISODE_PAGE_REGIONS)
+
+
+def match_corpus(cases):
+    title_matcher.clear_caches()
+    return [
+        (title_matcher.best_match([{'title': t} for t in case['results']], case['titles'], case['season']) or {}).get('title')
+        for case in cases
+    ]
+
+
+# (name, fixture, function, parse functions the case covers)
+CASES = [
+    ('otakudesu.search', 'otakudesu_search.html', otakudesu_scraper.parse_search_results, ()),
+    ('otakudesu.episodes', 'otakudesu_anime.html', otakudesu_scraper.parse_episode_list, ()),
+    ('otakudesu.mirrors', 'otakudesu_episode.html',
+     lambda html: otakudesu_scraper.parse_mirror_groups(otakudesu_episode_doc(html)),
+     (otakudesu_scraper.parse_mirror_groups,)),
+    ('otakudesu.downloads', 'otakudesu_episode.html',
+     lambda html: otakudesu_scraper.parse_download_links(otakudesu_episode_doc(html)),
+     (otakudesu_scraper.parse_download_links,)),
+    ('otakudesu.actions.fast', 'otakudesu_episode.html', otakudesu_scraper.find_ajax_actions, ()),
+    ('otakudesu.actions.dom', 'otakudesu_episode.html', otakudesu_scraper.parse_ajax_actions, ()),
+    ('sokuja.search', 'sokuja_search.html', sokuja_scraper.parse_search_results, ()),
+    ('sokuja.episodes', 'sokuja_anime.html', sokuja_scraper.parse_episode_list, ()),
+    ('sokuja.video_links', 'sokuja_episode.html', sokuja_scraper.parse_video_links, ()),
+    ('sokuja.mirrors.fast', 'sokuja_episode.html', sokuja_scraper.find_mirror_options, ()),
+    ('sokuja.mirrors.dom', 'sokuja_episode.html', sokuja_scraper.parse_mirror_options, ()),
+    ('samehadaku.search', 'samehadaku_search.html', samehadaku_scraper.parse_search_results, ()),
+    ('samehadaku.episodes', 'samehadaku_anime.html', samehadaku_scraper.parse_episode_list, ()),
+    ('samehadaku.best_video', 'samehadaku_episode.html', samehadaku_scraper.parse_best_video, ()),
+    ('samehadaku.video_links', 'samehadaku_episode.html', samehadaku_scraper.parse_all_video_links, ()),
+    ('samehadaku.player', 'samehadaku_player.html', samehadaku_scraper.parse_player_iframe, ()),
+    ('nyaa.search', 'nyaa_search.html', nyaa_scraper.parse_search_results, ()),
+    ('nyaa.search.fast', 'nyaa_search.html', nyaa_scraper.find_search_results, ()),
+    ('nyaa.search.dom', 'nyaa_search.html', nyaa_scraper.parse_table, ()),
+    ('animetosho.search', 'animetosho_search.json',
+     lambda text: animetosho_scraper.parse_search_results(json.loads(text), 75),
+     (animetosho_scraper.parse_search_results,)),
+    # Uncached parse of every title in the feed (the lru_cache would hide the cost)
+    ('release.titles', 'animetosho_search.json',
+     lambda text: [release_parser.parse.__wrapped__(item['title']) for item in json.loads(text)], ()),
+    # Every corpus case with cold caches (repeat searches hit the lru_caches)
+    ('titles.match', 'title_match_corpus.json', lambda text: match_corpus(json.loads(text)['cases']), ()),
+    ('embed.blogger', 'blogger_video.html', fast_extract.blogger_video_url, ()),
+    ('embed.vidhide', 'vidhide_embed.html', embed_resolvers.parse_vidhide_page, ()),
+    ('embed.krakenfiles', 'krakenfiles_embed.html', embed_resolvers.parse_krakenfiles_page, ()),
+    ('embed.yourupload', 'yourupload_embed.html', embed_resolvers.parse_yourupload_page, ()),
+    ('embed.desudrive', 'desudrive_embed.html', embed_resolvers.parse_desudrive_page, ()),
+    ('embed.safelink', 'safelink_page.html', embed_resolvers.parse_safelink_page, ()),
+]
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def fingerprint(result):
+    """Short hash of a parser's output (detects behaviour changes)"""
+    data = json.dumps(result, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+
+def measure(func, text):
+    """
+    Time one parse function on one fixture
+
+    Returns:
+        Dict with best wall/CPU time per call (microseconds), peak Python
+        allocations (KB), result size and output fingerprint
+    """
+    # Parsers print progress - keep the table readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(text)
+
+        # Batch calls so each repeat runs for at least MIN_REPEAT_TIME
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func(text)
+            if time.perf_counter() - start >= MIN_REPEAT_TIME:
+                break
+            number *= 2
+
+        walls, cpus = [], []
+        for _ in range(REPEAT):
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            for _ in range(number):
+                func(text)
+            cpus.append((time.process_time() - cpu_start) / number)
+            walls.append((time.perf_counter() - wall_start) / number)
+
+        tracemalloc.start()
+        try:
+            func(text)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'wall_us': round(min(walls) * 1e6, 1),
+        'wall_median_us': round(statistics.median(walls) * 1e6, 1),
+        'cpu_us': round(min(cpus) * 1e6, 1),
+        'peak_kb': round(peak / 1024, 1),
+        'items': len(result) if isinstance(result, (list, dict)) else int(result is not None),
+        'fingerprint': fingerprint(result),
+    }
+
+
+def uncovered_parsers():
+    """parse_* / find_* functions that no case exercises"""
+    covered = set()
+    for _, _, func, covers in CASES:
+        covered.add(func)
+        covered.update(covers)
+
+    missing = []
+    for module in PARSER_MODULES:
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if func.__module__ != module.__name__:
+                continue
+            if name.startswith(('parse_', 'find_')) and func not in covered:
+                missing.append(f"{module.__name__}.{name}")
+    return missing
+
+
+def run(pattern=None):
+    results = {}
+    for name, fixture, func, _ in CASES:
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(func, load_fixture(fixture))
+        r = results[name]
+        print(f"{name:26} {r['wall_us']:>10.1f} {r['cpu_us']:>10.1f} {r['peak_kb']:>10.1f} {r['items']:>6}  {r['fingerprint']}")
+    return results
+
+
+def check(results, baseline, tolerance):
+    """Compare results with the baseline, return a list of regressions"""
+    problems = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            problems.append(f"{name}: not in baseline (run --save)")
+            continue
+        if r['fingerprint'] != base['fingerprint']:
+            problems.append(f"{name}: output changed ({base['items']} -> {r['items']} items, {base['fingerprint']} -> {r['fingerprint']})")
+        if r['cpu_us'] > base['cpu_us'] * (1 + tolerance):
+            problems.append(f"{name}: CPU {base['cpu_us']:.1f}us -> {r['cpu_us']:.1f}us (+{r['cpu_us'] / base['cpu_us'] - 1:.0%})")
+        if r['peak_kb'] > base['peak_kb'] * (1 + tolerance) + 1:
+            problems.append(f"{name}: peak {base['peak_kb']:.1f}KB -> {r['peak_kb']:.1f}KB")
+    return problems
+
+
+def record(fixture, url):
+    """Save a live page as a fixture (the only mode that touches the network)"""
+    from utils import http_client
+    resp = http_client.get(url, headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
+    path = os.path.join(FIXTURES_DIR, fixture)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(resp.text)
+    print(f"Saved {len(resp.text)} chars from {url} to {path} (HTTP {resp.status_code})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the provider parsers")
+    parser.add_argument('--check', action='store_true', help="fail on regressions against baseline.json")
+    parser.add_argument('--save', action='store_true', help="write the results to baseline.json")
+    parser.add_argument('-k', dest='pattern', help="only run cases whose name contains this")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="allowed slowdown (default 0.25)")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    parser.add_argument('--record', nargs=2, metavar=('FIXTURE', 'URL'), help="save a live page as a fixture")
+    args = parser.parse_args()
+
+    if args.record:
+        record(*args.record)
+        return 0
+
+    print(f"{'case':26} {'wall us':>10} {'cpu us':>10} {'peak KB':>10} {'items':>6}  output")
+    results = run(args.pattern)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    missing = uncovered_parsers()
+    for name in missing:
+        print(f"⚠️  No benchmark case for {name}")
+
+    if args.save:
+        baseline = {}
+        if args.pattern and os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE) as f:
+                baseline = json.load(f).get('cases', {})
+        baseline.update(results)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cases': baseline,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline saved to {BASELINE_FILE}")
+
+    if args.check:
+        if not os.path.exists(BASELINE_FILE):
+            print("No baseline.json - run with --save first")
+            return 1
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)['cases']
+        problems = check(results, baseline, args.tolerance) + [f"{name}: no benchmark case" for name in missing]
+        if problems:
+            print("\n❌ Parser regressions:")
+            for problem in problems:
+                print(f"  {problem}")
+            return 1
+        print(f"\n✓ {len(results)} cases within {args.tolerance:.0%} of baseline, outputs unchanged")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
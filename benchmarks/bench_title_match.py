@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Title Matcher Benchmark
+Runs utils/title_matcher.py and the old match_season heuristic over
+benchmarks/fixtures/title_match_corpus.json (provider search results with
+the result that should be picked) and reports accuracy and cost per call.
+
+The corpus is split in two: 'tune' cases were used to set the title_matcher
+weights, 'holdout' cases were not. Only holdout accuracy says anything about
+how the matcher does on shows it wasn't fitted to, so that is what --check
+gates on. Never adjust the weights to fix a holdout case - move the case to
+'tune' and add a fresh holdout case instead.
+
+Usage:
+    python benchmarks/bench_title_match.py            # Accuracy per split + cost table
+    python benchmarks/bench_title_match.py -v         # Also list every wrong pick
+    python benchmarks/bench_title_match.py --check    # Exit 1 if holdout accuracy drops below MIN_ACCURACY
+    python benchmarks/bench_title_match.py --record otakudesu "Golden Kamuy" \\
+        --titles "Golden Kamuy" --season 4 --expected "Golden Kamuy Season 4 Sub Indo"
+
+--record runs a live search on the provider and adds its result titles as a
+holdout case (source 'recorded'). Add one whenever a show is matched wrong
+in the wild: the known titles and season, and the title that should have
+been picked (--expected none if the show isn't in the results).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import title_matcher
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(BENCH_DIR, 'fixtures', 'title_match_corpus.json')
+
+SPLITS = ('tune', 'holdout')
+
+# --check fails below this share of correct holdout picks: a regression floor
+# under the measured holdout accuracy (91.7% on 36 cases), not a target to tune to
+MIN_ACCURACY = 0.85
+
+MIN_REPEAT_TIME = 0.2
+
+
+def legacy_match_season(results, season, titles=()):
+    """match_season before the scored matcher (first result fallback)"""
+    if season == 1:
+        for result in results:
+            title_lower = result['title'].lower()
+            if 'season 2' not in title_lower and 's2' not in title_lower:
+                return result
+    else:
+        patterns = [
+            f"season {season}",
+            f"s{season}",
+            f"part {season}",
+            f"{season}nd" if season == 2 else f"{season}rd" if season == 3 else f"{season}th"
+        ]
+        for result in results:
+            title_lower = result['title'].lower()
+            if any(p in title_lower for p in patterns):
+                return result
+    return results[0] if results else None
+
+
+def scored_match(results, season, titles=()):
+    return title_matcher.best_match(results, titles, season)
+
+
+MATCHERS = [
+    ('legacy', legacy_match_season),
+    ('scored', scored_match),
+]
+
+
+def read_corpus():
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_corpus():
+    cases = read_corpus()['cases']
+    for case in cases:
+        case['results'] = [{'title': t} for t in case['results']]
+    return cases
+
+
+def record(provider, query, titles, season, expected):
+    """Search the provider live and add the results as a holdout case"""
+    from scrapers.registry import PROVIDERS
+    from utils import async_engine
+
+    results = async_engine.run(PROVIDERS[provider].search(query), timeout=60)
+    result_titles = [r['title'] for r in results or []]
+    if not result_titles:
+        print(f"❌ No results from {provider} for {query!r}")
+        return 1
+
+    expected = None if expected.lower() == 'none' else expected
+    if expected is not None and expected not in result_titles:
+        print(f"❌ {expected!r} is not among the results:")
+        for title in result_titles:
+            print(f"    {title}")
+        return 1
+
+    corpus = read_corpus()
+    corpus['cases'].append({
+        'provider': provider,
+        'titles': titles or [query],
+        'season': season,
+        'results': result_titles,
+        'expected': expected,
+        'split': 'holdout',
+        'source': 'recorded',
+        'query': query,
+        'recorded': date.today().isoformat(),
+    })
+    with open(CORPUS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(corpus, f, indent=1, ensure_ascii=False)
+
+    print(f"✓ Recorded {len(result_titles)} results from {provider} for {query!r}")
+    return 0
+
+
+def evaluate(func, cases):
+    """(correct picks, wrong cases)"""
+    correct = 0
+    wrong = []
+    for case in cases:
+        picked = func(case['results'], case['season'], case['titles'])
+        picked = picked['title'] if picked else None
+        if picked == case['expected']:
+            correct += 1
+        else:
+            wrong.append((case, picked))
+    return correct, wrong
+
+
+def cost_per_call(func, cases):
+    """Best microseconds per call (caches cleared so every title is parsed and compared)"""
+    best = None
+    for _ in range(5):
+        calls = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < MIN_REPEAT_TIME:
+            title_matcher.clear_caches()
+            for case in cases:
+                func(case['results'], case['season'], case['titles'])
+            calls += len(cases)
+        per_call = (time.perf_counter() - start) / calls * 1e6
+        best = per_call if best is None else min(best, per_call)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and cost of the title matcher")
+    parser.add_argument('-v', '--verbose', action='store_true', help="list wrong picks")
+    parser.add_argument('--check', action='store_true', help=f"fail below {MIN_ACCURACY:.0%} holdout accuracy")
+    parser.add_argument('--record', nargs=2, metavar=('PROVIDER', 'QUERY'),
+                        help="search a provider live and add the results as a holdout case")
+    parser.add_argument('--titles', nargs='+', help="known titles for --record (default: the query)")
+    parser.add_argument('--season', type=int, default=1, help="season for --record")
+    parser.add_argument('--expected', help="result title that should be picked for --record ('none' if absent)")
+    args = parser.parse_args()
+
+    if args.record:
+        if args.expected is None:
+            parser.error("--record needs --expected")
+        return record(*args.record, args.titles, args.season, args.expected)
+
+    cases = load_corpus()
+    splits = {split: [c for c in cases if c.get('split', 'tune') == split] for split in SPLITS}
+    recorded = sum(c.get('source') == 'recorded' for c in splits['holdout'])
+    print(f"{len(cases)} cases from {os.path.relpath(CORPUS_FILE)}: "
+          f"{len(splits['tune'])} tune, {len(splits['holdout'])} holdout ({recorded} recorded)\n")
+    print(f"{'matcher':10} {'split':8} {'correct':>8} {'accuracy':>9} {'us/call':>9}")
+
+    accuracy = {}
+    for name, func in MATCHERS:
+        cost = cost_per_call(func, cases)
+        for split in SPLITS:
+            if not splits[split]:
+                continue
+            correct, wrong = evaluate(func, splits[split])
+            accuracy[name, split] = correct / len(splits[split])
+            print(f"{name:10} {split:8} {correct:>8} {accuracy[name, split]:>9.1%} {cost:>9.1f}")
+
+            if args.verbose:
+                for case, picked in wrong:
+                    print(f"    ✗ {case['titles'][0]} S{case['season']}: picked {picked!r}, expected {case['expected']!r}")
+
+    if args.check:
+        if not splits['holdout']:
+            print("\n❌ No holdout cases - tune accuracy alone says nothing")
+            return 1
+        if accuracy['scored', 'holdout'] < MIN_ACCURACY:
+            print(f"\n❌ Scored matcher holdout accuracy {accuracy['scored', 'holdout']:.1%} < {MIN_ACCURACY:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
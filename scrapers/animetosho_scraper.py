@@ -4,11 +4,50 @@ AnimeTosho Scraper
 Anime torrent tracker with JSON API
 """
 
-import requests
-import re
+from utils import http_client, async_engine, release_parser
 
 BASE_URL = "https://feed.animetosho.org"
 
+# ==================== PARSERS ====================
+
+def parse_search_results(data, limit=10):
+    """Parse the JSON feed into torrent dicts (entries without an info_hash are skipped)"""
+    results = []
+    
+    for item in data[:limit]:
+        # Extract info
+        title = item.get('title', '')
+        torrent_url = item.get('torrent_url', '')
+        magnet = item.get('magnet_uri', '')
+        size = item.get('total_size', 0)
+        seeders = item.get('seeders', 0)
+        
+        # Extract info_hash from magnet
+        info_hash = extract_info_hash(magnet)
+        if not info_hash:
+            continue
+        
+        # Resolution + release group in one parse
+        release = release_parser.parse(title)
+        
+        # Format size
+        size_formatted = format_size(size)
+        
+        results.append({
+            'title': title,
+            'magnet': magnet,
+            'info_hash': info_hash,
+            'torrent_url': torrent_url,
+            'size': size_formatted,
+            'seeders': seeders,
+            'leechers': 0,  # AnimeTosho doesn't provide this
+            'resolution': release.resolution or 'Unknown',
+            'release_group': release.group or 'Unknown',
+            'source': 'animetosho'
+        })
+    return results
+
+
 def search_anime(query, limit=10):
     """
     Search AnimeTosho for anime torrents
@@ -20,6 +59,11 @@ def search_anime(query, limit=10):
     Returns:
         List of torrent dicts with info_hash, seeders, size, etc
     """
+    return async_engine.run(search_anime_async(query, limit))
+
+
+async def search_anime_async(query, limit=10):
+    """Async version of search_anime()"""
     try:
         # API endpoint
         url = f"{BASE_URL}/json"
@@ -30,49 +74,12 @@ def search_anime(query, limit=10):
         
         print(f"[animetosho] Searching: {query}")
         
-        response = requests.get(url, params=params, timeout=10)
+        response = await http_client.aget(url, params=params, timeout=10, cache='search')
         if response.status_code != 200:
             print(f"[animetosho] HTTP error: {response.status_code}")
             return []
         
-        data = response.json()
-        results = []
-        
-        for item in data[:limit]:
-            # Extract info
-            title = item.get('title', '')
-            torrent_url = item.get('torrent_url', '')
-            magnet = item.get('magnet_uri', '')
-            size = item.get('total_size', 0)
-            seeders = item.get('seeders', 0)
-            
-            # Extract info_hash from magnet
-            info_hash = extract_info_hash(magnet)
-            if not info_hash:
-                continue
-            
-            # Extract resolution
-            resolution = extract_resolution(title)
-            
-            # Extract release group
-            release_group = extract_release_group(title)
-            
-            # Format size
-            size_formatted = format_size(size)
-            
-            results.append({
-                'title': title,
-                'magnet': magnet,
-                'info_hash': info_hash,
-                'torrent_url': torrent_url,
-                'size': size_formatted,
-                'seeders': seeders,
-                'leechers': 0,  # AnimeTosho doesn't provide this
-                'resolution': resolution,
-                'release_group': release_group,
-                'source': 'animetosho'
-            })
-        
+        results = parse_search_results(response.json(), limit)
         print(f"[animetosho] Found {len(results)} torrents")
         return results
         
@@ -82,32 +89,15 @@ def search_anime(query, limit=10):
 
 def extract_info_hash(magnet_url):
     """Extract info hash from magnet URI"""
-    if not magnet_url:
-        return None
-    match = re.search(r'btih:([a-fA-F0-9]{40})', magnet_url)
-    if match:
-        return match.group(1).lower()
-    return None
+    return release_parser.info_hash(magnet_url)
 
 def extract_resolution(title):
     """Extract resolution from title"""
-    match = re.search(r'(\d{3,4}p)', title, re.IGNORECASE)
-    if match:
-        return match.group(1).upper()
-    
-    if 'FHD' in title.upper() or '1920x1080' in title:
-        return '1080P'
-    elif 'HD' in title.upper() or '1280x720' in title:
-        return '720P'
-    
-    return 'Unknown'
+    return release_parser.parse(title).resolution or 'Unknown'
 
 def extract_release_group(title):
     """Extract release group from title"""
-    match = re.search(r'\[([^\]]+)\]', title)
-    if match:
-        return match.group(1)
-    return 'Unknown'
+    return release_parser.parse(title).group or 'Unknown'
 
 def format_size(bytes_size):
     """Format bytes to human readable"""
@@ -4,17 +4,156 @@ Nyaa.si Torrent Scraper
 Scrapes anime torrents from Nyaa.si with metadata
 """
 
-import requests
-from bs4 import BeautifulSoup
+from utils import http_client, async_engine, html_parser, fast_extract, release_parser
+from utils.html_parser import has_class, Region
 import re
 
 BASE_URL = "https://nyaa.si"
 
+# Precompiled selectors
+TORRENT_TABLE = html_parser.xpath(f"(//table[{has_class('torrent-list')}])[1]")
+TABLE_ROWS = html_parser.xpath("(.//tbody)[1]//tr")
+CELLS = html_parser.xpath(".//td")
+# Title link (the comments counter link comes first when a torrent has comments)
+TITLE_LINK = html_parser.xpath(f".//a[@href][not({has_class('comments')})]")
+MAGNET_LINK = html_parser.xpath(".//a[starts-with(@href, 'magnet:')]")
+TORRENT_LINK = html_parser.xpath(".//a[substring(@href, string-length(@href) - 7) = '.torrent']")
+
+# Region of interest (only the results table gets parsed)
+SEARCH_REGIONS = [Region('table', cls='torrent-list')]
+
+# Fast path for the results table (see fast_extract)
+TABLE_BODY = re.compile(r'<table\b[^>]*class="[^"]*\btorrent-list\b[^>]*>.*?<tbody\b[^>]*>(.*?)</tbody>', re.S | re.I)
+ROW = re.compile(r'<tr\b[^>]*>(.*?)</tr>', re.S | re.I)
+TORRENT_ROW = re.compile(
+    r'\s*<td\b[^>]*>.*?</td>\s*'                                        # Category
+    r'<td\b[^>]*>(?:\s*<a\b[^>]*class="comments"[^>]*>.*?</a>)?'        # Comments counter
+    r'\s*<a\s+href="(/view/\d+)"[^>]*>([^<]*)</a>\s*</td>\s*'           # Title
+    r'<td\b[^>]*>(.*?)</td>\s*'                                         # Torrent + magnet
+    r'<td\b[^>]*>([^<]*)</td>\s*<td\b[^>]*>[^<]*</td>\s*'               # Size, date
+    r'<td\b[^>]*>\s*(\d+)\s*</td>\s*'                                   # Seeders
+    r'<td\b[^>]*>\s*(\d+)\s*</td>\s*'                                   # Leechers
+    r'<td\b[^>]*>\s*(\d+)\s*</td>\s*',                                  # Downloads
+    re.S | re.I
+)
+MAGNET_HREF = re.compile(r'href="(magnet:[^"]+)"')
+TORRENT_HREF = re.compile(r'href="([^"]+\.torrent)"')
+
 def get_headers():
     return {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
 
+# ==================== PARSERS ====================
+
+def _torrent(title, href, magnet, torrent_href, size, seeders, leechers, downloads):
+    return {
+        'title': title,
+        'magnet': magnet,
+        'info_hash': release_parser.info_hash(magnet),
+        'torrent_url': BASE_URL + torrent_href if torrent_href else None,
+        'page_url': BASE_URL + href,
+        'size': size,
+        'seeders': seeders,
+        'leechers': leechers,
+        'downloads': downloads,
+        'resolution': extract_resolution(title),
+        'release_group': extract_release_group(title),
+        'source': 'nyaa'
+    }
+
+
+def find_search_results(html):
+    """Fast path: torrent dicts straight from the table markup, None if it looks unusual"""
+    body = TABLE_BODY.search(html)
+    if not body:
+        return None
+    rows = ROW.findall(body.group(1))
+    if len(rows) != body.group(1).lower().count('<tr'):
+        return None
+
+    results = []
+    for row in rows:
+        match = TORRENT_ROW.fullmatch(row)
+        if not match:
+            if row.lower().count('<td') < 6:
+                continue  # Not a torrent row (the DOM parser skips these too)
+            return None
+
+        href, title, links, size, seeders, leechers, downloads = match.groups()
+        magnet = MAGNET_HREF.search(links)
+        torrent_href = TORRENT_HREF.search(links)
+        results.append(_torrent(
+            fast_extract.plain_text(title),
+            href,
+            fast_extract.plain_text(magnet.group(1)) if magnet else None,
+            torrent_href.group(1) if torrent_href else None,
+            fast_extract.plain_text(size),
+            int(seeders), int(leechers), int(downloads)
+        ))
+    return results
+
+
+def parse_search_results(html):
+    """Parse a search page's torrent-list table into torrent dicts"""
+    return fast_extract.run('nyaa.search', find_search_results, parse_table, html)
+
+
+def parse_table(html):
+    """Parse the torrent-list table via the DOM"""
+    doc = html_parser.parse(html, SEARCH_REGIONS)
+    torrent_list = html_parser.first(TORRENT_TABLE(doc)) if doc is not None else None
+    if torrent_list is None:
+        print("[nyaa] No results found")
+        return []
+
+    results = []
+    for row in TABLE_ROWS(torrent_list):
+        try:
+            # Extract data from columns
+            cols = CELLS(row)
+
+            if len(cols) < 6:
+                continue
+
+            # Column 0: Category
+            # Column 1: Title + Links
+            # Column 2: Torrent links (magnet, torrent file)
+            # Column 3: Size
+            # Column 4: Date
+            # Column 5: Seeders
+            # Column 6: Leechers
+            # Column 7: Downloads
+
+            # Title and page URL
+            title_link = html_parser.first(TITLE_LINK(cols[1]))
+            if title_link is None:
+                continue
+
+            title = html_parser.text(title_link)
+
+            # Magnet link and torrent file link
+            magnet_link = html_parser.first(MAGNET_LINK(cols[2]))
+            torrent_link = html_parser.first(TORRENT_LINK(cols[2]))
+
+            results.append(_torrent(
+                title,
+                title_link.get('href'),
+                magnet_link.get('href') if magnet_link is not None else None,
+                torrent_link.get('href') if torrent_link is not None else None,
+                html_parser.text(cols[3]),
+                int(html_parser.text(cols[5])),
+                int(html_parser.text(cols[6])),
+                int(html_parser.text(cols[7]))
+            ))
+
+        except Exception as e:
+            print(f"[nyaa] Error parsing row: {e}")
+            continue
+
+    return results
+
+
 def search_anime(query):
     """
     Search for anime on Nyaa.si
@@ -25,6 +164,11 @@ def search_anime(query):
     Returns:
         List of search results with metadata
     """
+    return async_engine.run(search_anime_async(query))
+
+
+async def search_anime_async(query):
+    """Async version of search_anime()"""
     try:
         # Nyaa.si search URL with anime category filter
         # Category: 1_2 = Anime - English-translated
@@ -33,85 +177,9 @@ def search_anime(query):
         print(f"[nyaa] Searching: {query}")
         print(f"[nyaa] URL: {url}")
         
-        resp = requests.get(url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        results = []
-        
-        # Find all torrent rows in table
-        torrent_list = soup.find('table', class_='torrent-list')
-        if not torrent_list:
-            print("[nyaa] No results found")
-            return []
-        
-        rows = torrent_list.find('tbody').find_all('tr')
-        
-        for row in rows:
-            try:
-                # Extract data from columns
-                cols = row.find_all('td')
-                
-                if len(cols) < 6:
-                    continue
-                
-                # Column 0: Category
-                # Column 1: Title + Links
-                # Column 2: Torrent links (magnet, torrent file)
-                # Column 3: Size
-                # Column 4: Date
-                # Column 5: Seeders
-                # Column 6: Leechers
-                # Column 7: Downloads
-                
-                # Title and page URL
-                title_col = cols[1]
-                title_link = title_col.find('a', href=True)
-                if not title_link:
-                    continue
-                
-                title = title_link.get_text(strip=True)
-                page_url = BASE_URL + title_link['href']
-                
-                # Magnet link
-                links_col = cols[2]
-                magnet_link = links_col.find('a', href=lambda x: x and x.startswith('magnet:'))
-                magnet = magnet_link['href'] if magnet_link else None
-                
-                # Torrent file link
-                torrent_link = links_col.find('a', href=lambda x: x and x.endswith('.torrent'))
-                torrent_url = BASE_URL + torrent_link['href'] if torrent_link else None
-                
-                # Size
-                size = cols[3].get_text(strip=True)
-                
-                # Seeders and Leechers
-                seeders = int(cols[5].get_text(strip=True))
-                leechers = int(cols[6].get_text(strip=True))
-                downloads = int(cols[7].get_text(strip=True))
-                
-                # Extract resolution from title
-                resolution = extract_resolution(title)
-                
-                # Extract group/release from title
-                release_group = extract_release_group(title)
-                
-                results.append({
-                    'title': title,
-                    'magnet': magnet,
-                    'torrent_url': torrent_url,
-                    'page_url': page_url,
-                    'size': size,
-                    'seeders': seeders,
-                    'leechers': leechers,
-                    'downloads': downloads,
-                    'resolution': resolution,
-                    'release_group': release_group,
-                    'source': 'nyaa'
-                })
-                
-            except Exception as e:
-                print(f"[nyaa] Error parsing row: {e}")
-                continue
+        # Everything we parse is inside the torrent table - skip the rest of the page
+        resp = await http_client.aget(url, headers=get_headers(), cache='search', stop_at=b'</table>')
+        results = parse_search_results(resp.text)
         
         print(f"[nyaa] Found {len(results)} torrents")
         return results
@@ -121,28 +189,12 @@ def search_anime(query):
         return []
 
 def extract_resolution(title):
-    """Extract resolution from title (e.g., 1080p, 720p)"""
-    # Common patterns: 1080p, 720p, 480p, 360p, 2160p (4K)
-    match = re.search(r'(\d{3,4}p)', title, re.IGNORECASE)
-    if match:
-        return match.group(1).upper()
-    
-    # Alternative patterns: FHD, HD, SD
-    if 'FHD' in title.upper() or '1920x1080' in title:
-        return '1080P'
-    elif 'HD' in title.upper() or '1280x720' in title:
-        return '720P'
-    
-    return 'Unknown'
+    """Extract resolution from title (e.g., 1080P, 720P)"""
+    return release_parser.parse(title).resolution or 'Unknown'
 
 def extract_release_group(title):
-    """Extract release group from title (e.g., [SubsPlease], [HorribleSubs])"""
-    # Pattern: [GroupName]
-    match = re.search(r'\[([^\]]+)\]', title)
-    if match:
-        return match.group(1)
-    
-    return 'Unknown'
+    """Extract release group from title (e.g., SubsPlease, HorribleSubs)"""
+    return release_parser.parse(title).group or 'Unknown'
 
 def filter_torrents(torrents, min_seeders=0, resolution=None):
     """
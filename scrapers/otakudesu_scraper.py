@@ -1,210 +1,314 @@
-import requests
-from bs4 import BeautifulSoup
+from utils import http_client, async_engine, html_parser, fast_extract
+from utils.url_cache import cached_resolver, fallback
+from utils.html_parser import has_class, Region
 import re
 import base64
 import json
 
 BASE_URL = "https://otakudesu.best"
 
+# Precompiled selectors
+SEARCH_ITEMS = html_parser.xpath(f"(//ul[{has_class('chivsrc')}])[1]//li")
+EPISODE_ITEMS = html_parser.xpath(f"//div[{has_class('episodelist')}]//li")
+MIRROR_DIV = html_parser.xpath(f"(//div[{has_class('mirrorstream')}])[1]")
+DOWNLOAD_ITEMS = html_parser.xpath(f"((//div[{has_class('download')}])[1]//ul)[1]//li")
+SCRIPTS = html_parser.xpath("//script")
+FIRST_LINK = html_parser.xpath(".//a[@href]")
+FIRST_ANCHOR = html_parser.xpath(".//a")
+LINKS = html_parser.xpath(".//a[@href]")
+H2 = html_parser.xpath(".//h2")
+IMAGE = html_parser.xpath(".//img[@src]")
+SET_DIVS = html_parser.xpath(f".//div[{has_class('set')}]")
+ULS = html_parser.xpath(".//ul")
+LIS = html_parser.xpath(".//li")
+
+# Regions of interest (only these subtrees get parsed)
+SEARCH_REGIONS = [Region('ul', cls='chivsrc')]
+EPISODE_LIST_REGIONS = [Region('div', cls='episodelist', first=False)]
+EPISODE_PAGE_REGIONS = [Region('div', cls='mirrorstream'), Region('div', cls='download')]
+SCRIPT_REGIONS = [Region('script', contains='admin-ajax.php', first=False)]
+
+# Fast path for the AJAX action hashes (see fast_extract)
+SCRIPT_BLOCK = re.compile(r'<script\b[^>]*>(.*?)</script>', re.S | re.I)
+ACTION_HASH = re.compile(r'action\s*:\s*["\']([a-f0-9]{32})["\']')
+
 def get_headers():
     return {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
+# ==================== PARSERS ====================
+
+def parse_search_results(html):
+    """Parse the search page into result dicts"""
+    doc = html_parser.parse(html, SEARCH_REGIONS)
+    if doc is None:
+        return []
+
+    results = []
+    for li in SEARCH_ITEMS(doc):
+        link = html_parser.first(FIRST_LINK(li))
+        if link is None:
+            continue
+
+        # Get title from h2 tag inside the link
+        h2 = html_parser.first(H2(link))
+        if h2 is not None:
+            title = html_parser.text(h2)
+        else:
+            # Fallback to link text
+            title = html_parser.text(link)
+
+        img = html_parser.first(IMAGE(li))
+        thumbnail = img.get('src') if img is not None else None
+
+        # Status/Rating/Genres are in div.set
+        status = "Unknown"
+        rating = "?"
+        for div in SET_DIVS(li):
+            text = html_parser.text(div)
+            if "Status" in text:
+                status = text.replace("Status", "").replace(":", "").strip()
+            elif "Rating" in text:
+                rating = text.replace("Rating", "").replace(":", "").strip()
+
+        results.append({
+            'title': title,
+            'url': link.get('href'),
+            'thumbnail': thumbnail,
+            'status': status,
+            'rating': rating,
+            'source': 'otakudesu'
+        })
+    return results
+
+
+def parse_episode_list(html):
+    """Parse the anime page into episode dicts"""
+    doc = html_parser.parse(html, EPISODE_LIST_REGIONS)
+    if doc is None:
+        return []
+
+    episodes = []
+    for li in EPISODE_ITEMS(doc):
+        link = html_parser.first(FIRST_LINK(li))
+        if link is None:
+            continue
+        url = link.get('href')
+
+        # Skip batch/collection episodes (lengkap URLs)
+        if '/lengkap/' in url or 'batch' in url.lower():
+            continue
+
+        title = html_parser.text(link)
+
+        # Extract episode number
+        ep_num_match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
+        if ep_num_match:
+            ep_num = int(ep_num_match.group(1))
+        else:
+            ep_num = len(episodes) + 1
+
+        episodes.append({
+            'title': title,
+            'url': url,
+            'episode_number': ep_num,
+            'source': 'otakudesu'
+        })
+    return episodes
+
+
+def find_ajax_actions(html):
+    """Fast path: (action_video, action_nonce) from the admin-ajax script, None if not found"""
+    for script in SCRIPT_BLOCK.finditer(html):
+        if 'admin-ajax.php' in script.group(1):
+            matches = ACTION_HASH.findall(script.group(1))
+            if len(matches) >= 2:
+                return matches[0], matches[1]
+    return None
+
+
+def parse_ajax_actions(html):
+    """(action_video, action_nonce) via the DOM, (None, None) if not found"""
+    doc = html_parser.parse(html, SCRIPT_REGIONS)
+    if doc is None:
+        return None, None
+
+    # Extract AJAX action hashes from scripts
+    for script in SCRIPTS(doc):
+        if script.text and 'admin-ajax.php' in script.text:
+            matches = ACTION_HASH.findall(script.text)
+            if len(matches) >= 2:
+                return matches[0], matches[1]
+    return None, None
+
+
+def parse_mirror_groups(doc):
+    """
+    Parse the streaming mirrors of an episode page
+
+    Returns:
+        List of (quality_class, [(server_name, data_content), ...]),
+        or None without div.mirrorstream
+    """
+    if doc is None:
+        return None
+
+    mirror_div = html_parser.first(MIRROR_DIV(doc))
+    if mirror_div is None:
+        return None
+
+    mirror_groups = []
+    for ul in ULS(mirror_div):
+        quality_class = ((ul.get('class') or '').split() or [''])[0]
+        servers = []
+        for li in LIS(ul):
+            a = html_parser.first(FIRST_ANCHOR(li))
+            if a is not None:
+                servers.append((html_parser.text(a), a.get('data-content')))
+        mirror_groups.append((quality_class, servers))
+
+    return mirror_groups
+
+
+def build_mirror_links(mirror_groups, action_video, nonce):
+    """Turn parsed mirrors into otakudesu:ACTION:NONCE:PAYLOAD stream links"""
+    links = []
+
+    # Priority order: 720p, 480p, 360p
+    quality_priority = {'m720p': 0, 'm480p': 1, 'm360p': 2}
+
+    for quality_class, servers in mirror_groups:
+        quality = quality_class.replace('m', '') if quality_class.startswith('m') else 'Unknown'
+        base_priority = quality_priority.get(quality_class, 999) * 100
+
+        server_priority = 0
+        for server_name, content in servers:
+            if not content:
+                continue
+            try:
+                original_payload = json.loads(base64.b64decode(content).decode('utf-8'))
+                original_payload_b64 = base64.b64encode(json.dumps(original_payload).encode()).decode()
+
+                special_url = f"otakudesu:{action_video}:{nonce}:{original_payload_b64}"
+
+                # Rename ondesu to Sokuja for clarity
+                if 'ondesu' in server_name.lower():
+                    server_name = 'Sokuja (ondesu)'
+
+                links.append({
+                    'server': f"🎬 {server_name}",
+                    'url': special_url,
+                    'resolution': quality,
+                    'type': 'stream',
+                    'stream_ready': True,
+                    'priority': base_priority + server_priority
+                })
+                server_priority += 1
+            except Exception as e:
+                print(f"[otakudesu] Error parsing mirror: {e}")
+    return links
+
+
+def parse_download_links(doc):
+    """Parse the download section of an episode page (low priority fallback links)"""
+    if doc is None:
+        return []
+
+    links = []
+    priority = 1000  # Much lower priority
+    for li in DOWNLOAD_ITEMS(doc):
+        text = html_parser.text(li)
+        quality = 'Unknown'
+        match = re.search(r'(360p|480p|720p|1080p)', text)
+        if match:
+            quality = match.group(1)
+
+        for a in LINKS(li):
+            links.append({
+                'server': html_parser.text(a),
+                'url': a.get('href'),
+                'resolution': quality,
+                'type': 'download',
+                'stream_ready': False,
+                'priority': priority
+            })
+            priority += 1
+    return links
+
+
 def search_anime(query):
     """Search for anime on Otakudesu"""
+    return async_engine.run(search_anime_async(query))
+
+
+async def search_anime_async(query):
+    """Async version of search_anime()"""
     url = f"{BASE_URL}/?s={query}&post_type=anime"
     try:
-        resp = requests.get(url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        results = []
-        ul = soup.find('ul', class_='chivsrc')
-        if ul:
-            for li in ul.find_all('li'):
-                link = li.find('a', href=True)
-                if link:
-                    # Get title from h2 tag inside the link
-                    h2 = link.find('h2')
-                    if h2:
-                        title = h2.get_text(strip=True)
-                    else:
-                        # Fallback to link text
-                        title = link.get_text(strip=True)
-                    
-                    url = link['href']
-                    img = li.find('img', src=True)
-                    thumbnail = img['src'] if img else None
-                    
-                    # Status/Rating/Genres are in div.set
-                    status = "Unknown"
-                    rating = "?"
-                    for div in li.find_all('div', class_='set'):
-                        text = div.get_text(strip=True)
-                        if "Status" in text:
-                            status = text.replace("Status", "").replace(":", "").strip()
-                        elif "Rating" in text:
-                            rating = text.replace("Rating", "").replace(":", "").strip()
-                            
-                    results.append({
-                        'title': title,
-                        'url': url,
-                        'thumbnail': thumbnail,
-                        'status': status,
-                        'rating': rating,
-                        'source': 'otakudesu'
-                    })
-        return results
+        resp = await http_client.aget(url, headers=get_headers(), cache='search', hedge=True)
+        return parse_search_results(resp.text)
     except Exception as e:
         print(f"[otakudesu] Search error: {e}")
         return []
 
 def get_anime_episodes(anime_url):
     """Get list of episodes for an anime"""
+    return async_engine.run(get_anime_episodes_async(anime_url))
+
+
+async def get_anime_episodes_async(anime_url):
+    """Async version of get_anime_episodes()"""
     try:
-        resp = requests.get(anime_url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        episodes = []
-        
-        # Find all episode lists (there might be multiple divs)
-        ep_lists = soup.find_all('div', class_='episodelist')
-        
-        for episode_list in ep_lists:
-            for li in episode_list.find_all('li'):
-                link = li.find('a', href=True)
-                if link:
-                    url = link['href']
-                    
-                    # Skip batch/collection episodes (lengkap URLs)
-                    if '/lengkap/' in url or 'batch' in url.lower():
-                        continue
-                    
-                    title = link.get_text(strip=True)
-                    
-                    # Extract episode number
-                    ep_num_match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
-                    if ep_num_match:
-                        ep_num = int(ep_num_match.group(1))
-                    else:
-                        ep_num = len(episodes) + 1
-                    
-                    episodes.append({
-                        'title': title,
-                        'url': url,
-                        'episode_number': ep_num,
-                        'source': 'otakudesu'
-                    })
-        
-        return episodes
+        resp = await http_client.aget(anime_url, headers=get_headers(), cache='anime', hedge=True)
+        return parse_episode_list(resp.text)
     except Exception as e:
         print(f"[otakudesu] Error getting episodes: {e}")
         return []
 
 def get_video_links(episode_url):
     """Get video links - prioritize streaming mirrors (360p, 480p, 720p)"""
+    return async_engine.run(get_video_links_async(episode_url))
+
+
+async def get_video_links_async(episode_url):
+    """Async version of get_video_links()"""
     try:
-        resp = requests.get(episode_url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = await http_client.aget(episode_url, headers=get_headers(), cache='episode', hedge=True)
+        html = resp.text
+        doc = html_parser.parse(html, EPISODE_PAGE_REGIONS)
         
         links = []
         
         # PRIORITY: Extract streaming mirrors (AJAX-based)
         # User wants 360p, 480p, 720p streaming mirrors as main options
-        mirror_div = soup.find('div', class_='mirrorstream')
-        if mirror_div:
-            # Extract AJAX action hashes from scripts
-            action_video = None
-            action_nonce = None
-            
-            scripts = soup.find_all('script')
-            for script in scripts:
-                if script.string and 'admin-ajax.php' in script.string:
-                    matches = re.findall(r'action\s*:\s*["\']([a-f0-9]{32})["\']', script.string)
-                    if len(matches) >= 2:
-                        action_video = matches[0]
-                        action_nonce = matches[1]
-                        break
-            
-            if action_video and action_nonce:
-                # Get Nonce
-                nonce = None
-                try:
-                    nonce_resp = requests.post(
-                        f"{BASE_URL}/wp-admin/admin-ajax.php",
-                        headers=get_headers(),
-                        data={"action": action_nonce}
-                    )
-                    if nonce_resp.status_code == 200:
-                        nonce_data = nonce_resp.json()
-                        if 'data' in nonce_data:
-                            nonce = nonce_data['data']
-                except Exception as e:
-                    print(f"[otakudesu] Error getting nonce: {e}")
-
-                if nonce:
-                    # Priority order: 720p, 480p, 360p
-                    quality_priority = {'m720p': 0, 'm480p': 1, 'm360p': 2}
-                    
-                    for ul in mirror_div.find_all('ul'):
-                        quality_class = ul.get('class', [''])[0]
-                        quality = quality_class.replace('m', '') if quality_class.startswith('m') else 'Unknown'
-                        base_priority = quality_priority.get(quality_class, 999) * 100
-                        
-                        server_priority = 0
-                        for li in ul.find_all('li'):
-                            a = li.find('a')
-                            if a:
-                                server_name = a.get_text(strip=True)
-                                content = a.get('data-content')
-                                if content:
-                                    try:
-                                        original_payload = json.loads(base64.b64decode(content).decode('utf-8'))
-                                        original_payload_b64 = base64.b64encode(json.dumps(original_payload).encode()).decode()
-                                        
-                                        special_url = f"otakudesu:{action_video}:{nonce}:{original_payload_b64}"
-                                        
-                                        # Rename ondesu to Sokuja for clarity
-                                        if 'ondesu' in server_name.lower():
-                                            server_name = 'Sokuja (ondesu)'
-                                        
-                                        links.append({
-                                            'server': f"🎬 {server_name}",
-                                            'url': special_url,
-                                            'resolution': quality,
-                                            'type': 'stream',
-                                            'stream_ready': True,
-                                            'priority': base_priority + server_priority
-                                        })
-                                        server_priority += 1
-                                    except Exception as e:
-                                        print(f"[otakudesu] Error parsing mirror: {e}")
+        mirror_groups = parse_mirror_groups(doc)
+        action_video = action_nonce = None
+        if mirror_groups is not None:
+            action_video, action_nonce = fast_extract.run(
+                'otakudesu.actions', find_ajax_actions, parse_ajax_actions, html
+            )
+        if mirror_groups is not None and action_video and action_nonce:
+            # Get Nonce
+            nonce = None
+            try:
+                nonce_resp = await http_client.apost(
+                    f"{BASE_URL}/wp-admin/admin-ajax.php",
+                    headers=get_headers(),
+                    data={"action": action_nonce}
+                )
+                if nonce_resp.status_code == 200:
+                    nonce_data = nonce_resp.json()
+                    if 'data' in nonce_data:
+                        nonce = nonce_data['data']
+            except Exception as e:
+                print(f"[otakudesu] Error getting nonce: {e}")
+
+            if nonce:
+                links.extend(build_mirror_links(mirror_groups, action_video, nonce))
 
         # Download Links as fallback (much lower priority)
-        download_div = soup.find('div', class_='download')
-        if download_div:
-            ul = download_div.find('ul')
-            if ul:
-                priority = 1000  # Much lower priority
-                for li in ul.find_all('li'):
-                    text = li.get_text(strip=True)
-                    quality = 'Unknown'
-                    match = re.search(r'(360p|480p|720p|1080p)', text)
-                    if match:
-                        quality = match.group(1)
-                    
-                    for a in li.find_all('a'):
-                        server = a.get_text(strip=True)
-                        url = a['href']
-                        links.append({
-                            'server': server,
-                            'url': url,
-                            'resolution': quality,
-                            'type': 'download',
-                            'stream_ready': False,
-                            'priority': priority
-                        })
-                        priority += 1
+        links.extend(parse_download_links(doc))
         
         # Sort by priority
         links.sort(key=lambda x: x.get('priority', 999))
@@ -215,9 +319,23 @@ def get_video_links(episode_url):
         return []
 
 
-
 def resolve_otakudesu_url(special_url):
     """Resolve otakudesu:ACTION:NONCE:PAYLOAD url to real stream URL"""
+    return async_engine.run(resolve_otakudesu_url_async(special_url))
+
+
+def mirror_key(special_url):
+    """Cache key of an otakudesu: URL without the nonce (new one on every page load)"""
+    parts = special_url.split(':')
+    if len(parts) != 4:
+        return special_url
+    _, action, _, payload_b64 = parts
+    return f"{action}:{payload_b64}"
+
+
+@cached_resolver('otakudesu', key=mirror_key)
+async def resolve_otakudesu_url_async(special_url):
+    """Async version of resolve_otakudesu_url()"""
     try:
         if not special_url.startswith('otakudesu:'):
             return special_url
@@ -235,10 +353,12 @@ def resolve_otakudesu_url(special_url):
         payload['nonce'] = nonce
         
         # Request
-        resp = requests.post(
+        # Mirror lookup is read-only, safe to hedge
+        resp = await http_client.apost(
             f"{BASE_URL}/wp-admin/admin-ajax.php",
             headers=get_headers(),
-            data=payload
+            data=payload,
+            hedge=True
         )
         
         if resp.status_code == 200:
@@ -252,7 +372,7 @@ def resolve_otakudesu_url(special_url):
                     
                     # Follow desustream URL to get actual video
                     try:
-                        desu_resp = requests.get(desustream_url, headers=get_headers())
+                        desu_resp = await http_client.aget(desustream_url, headers=get_headers(), hedge=True)
                         if desu_resp.status_code == 200:
                             # Look for Blogger iframe or direct video URL
                             blogger_match = re.search(r'<iframe[^>]+src="(https://www\.blogger\.com/video\.g\?token=[^"]+)"', desu_resp.text)
@@ -262,20 +382,12 @@ def resolve_otakudesu_url(special_url):
                                 # Scrape Blogger page for direct Google Video URL
                                 try:
                                     print(f"  [blogger] Scraping for direct URL...")
-                                    blogger_resp = requests.get(blogger_url, headers=get_headers(), timeout=10)
+                                    blogger_resp = await http_client.aget(blogger_url, headers=get_headers(), timeout=10, hedge=True)
                                     
                                     if blogger_resp.status_code == 200:
                                         # Look for direct googlevideo.com URL
-                                        matches = re.findall(
-                                            r'(https://[^"\']+googlevideo\.com/videoplayback[^"\']+)',
-                                            blogger_resp.text
-                                        )
-                                        
-                                        if matches:
-                                            # Get the longest URL
-                                            direct_url = max(matches, key=len)
-                                            direct_url = direct_url.replace('\\u003d', '=').replace('\\u0026', '&')
-                                            
+                                        direct_url = fast_extract.blogger_video_url(blogger_resp.text)
+                                        if direct_url:
                                             print(f"  [blogger] ✓ Found direct URL")
                                             
                                             # Return direct Google Video URL with headers
@@ -291,13 +403,13 @@ def resolve_otakudesu_url(special_url):
                                 
                                 # Fallback: return Blogger URL with headers
                                 print(f"  [blogger] ⚠️  Using Blogger embed URL (fallback)")
-                                return {
+                                return fallback({
                                     'url': blogger_url,
                                     'headers': {
                                         'User-Agent': get_headers()['User-Agent'],
                                         'Referer': 'https://desustream.info/'
                                     }
-                                }
+                                })
                             
                             # Fallback: look for any video source in scripts
                             video_match = re.search(r'file:\s*["\']([^"\']+\.m3u8[^"\']*)["\']', desu_resp.text)
@@ -343,15 +455,15 @@ def resolve_otakudesu_url(special_url):
                     # Only return dict with headers if it's Google/Blogger (needs proxy)
                     # For others (Vidhide, etc), return string so yt-dlp handles it
                     if 'googlevideo.com' in desustream_url or 'blogger.com' in desustream_url:
-                        return {
+                        return fallback({
                             'url': desustream_url,
                             'headers': {
                                 'User-Agent': get_headers()['User-Agent'],
                                 'Referer': 'https://desustream.info/'
                             }
-                        }
+                        })
                     else:
-                        return desustream_url
+                        return fallback(desustream_url)
                     
         return None
     except Exception as e:
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Provider Registry
+One entry per provider: display info, its async scraper functions, what
+kind of links it gives (capabilities) and rough cost hints. The TUI, web app
+and Stremio addon all read providers from here via utils/stream_engine.py.
+"""
+
+from scrapers import samehadaku_scraper, otakudesu_scraper, sokuja_scraper, nyaa_scraper, animetosho_scraper
+
+# Capabilities
+DIRECT = 'direct'      # Links are directly playable stream URLs
+AJAX = 'ajax'          # Links are special URLs resolved with an extra AJAX call
+BROWSER = 'browser'    # Episode pages need a headless browser (Cloudflare)
+TORRENT = 'torrent'    # Search results are torrents (magnet / info hash)
+
+
+class Provider:
+    """
+    One provider
+
+    Args:
+        key: Provider id ('sokuja', 'torrent', ...)
+        name: Display name
+        icon: Badge emoji
+        short: 3-letter badge for narrow lists
+        desc: Qualities / servers summary for menus
+        module: Scraper module
+        base_url: Site URL (circuit breaker / rate limiter key)
+        search: async search(query) -> results
+        episodes: async episodes(anime_url) -> episodes (None for torrent sites)
+        links: async links(episode_url) -> video links (None for torrent sites)
+        resolve: (prefix, async resolver) for special link URLs, or None
+        capabilities: Set of DIRECT / AJAX / BROWSER / TORRENT
+        requests: Typical HTTP requests for search -> episodes -> links
+        latency: Typical seconds for that whole chain
+    """
+
+    def __init__(self, key, name, icon, short, desc, module, base_url, search, episodes=None, links=None,
+                 resolve=None, capabilities=(), requests=1, latency=1.0):
+        self.key = key
+        self.name = name
+        self.icon = icon
+        self.short = short
+        self.desc = desc
+        self.module = module
+        self.base_url = base_url
+        self.search = search
+        self.episodes = episodes
+        self.links = links
+        self.resolve = resolve
+        self.capabilities = frozenset(capabilities)
+        self.requests = requests
+        self.latency = latency
+
+    @property
+    def display(self):
+        return f"{self.icon} {self.name}"
+
+    def has(self, capability):
+        return capability in self.capabilities
+
+    def __repr__(self):
+        return f"Provider({self.key})"
+
+
+# Menu order (also the order search results are listed in)
+PROVIDERS = {
+    'sokuja': Provider(
+        'sokuja', 'Sokuja', '🟡', 'SKJ', '480p-720p │ Fast streaming',
+        sokuja_scraper, sokuja_scraper.BASE_URL,
+        search=sokuja_scraper.search_anime_async,
+        episodes=sokuja_scraper.get_anime_episodes_async,
+        links=sokuja_scraper.get_video_links_async,
+        capabilities={DIRECT},
+        requests=3, latency=2.0,
+    ),
+    'otakudesu': Provider(
+        'otakudesu', 'Otakudesu', '🔵', 'OTK', '360p-720p │ 35+ servers',
+        otakudesu_scraper, otakudesu_scraper.BASE_URL,
+        search=otakudesu_scraper.search_anime_async,
+        episodes=otakudesu_scraper.get_anime_episodes_async,
+        links=otakudesu_scraper.get_video_links_async,
+        resolve=('otakudesu:', otakudesu_scraper.resolve_otakudesu_url_async),
+        capabilities={AJAX},
+        requests=5, latency=4.0,
+    ),
+    'samehadaku': Provider(
+        'samehadaku', 'Samehadaku', '🟢', 'SMH', '360p-1080p │ Mega, Vidhide',
+        samehadaku_scraper, 'https://samehadaku.how',
+        search=samehadaku_scraper.search_anime_async,
+        episodes=samehadaku_scraper.get_anime_episodes_async,
+        links=samehadaku_scraper.get_all_video_links_async,
+        resolve=('ajax:', samehadaku_scraper.get_streaming_url_async),
+        capabilities={AJAX, BROWSER},
+        requests=4, latency=12.0,
+    ),
+    'torrent': Provider(
+        'torrent', 'Torrent', '🎲', 'NYA', '720p-1080p │ Nyaa.si Seeders',
+        nyaa_scraper, nyaa_scraper.BASE_URL,
+        search=nyaa_scraper.search_anime_async,
+        capabilities={TORRENT},
+        requests=1, latency=1.5,
+    ),
+    'animetosho': Provider(
+        'animetosho', 'AnimeTosho', '🌸', 'ATS', '720p-1080p │ Nyaa mirror feed',
+        animetosho_scraper, animetosho_scraper.BASE_URL,
+        search=animetosho_scraper.search_anime_async,
+        capabilities={TORRENT},
+        requests=1, latency=1.0,
+    ),
+}
+
+# Providers with episode pages (search -> episodes -> links)
+EPISODE_PROVIDERS = [key for key, p in PROVIDERS.items() if p.episodes is not None]
+
+
+def get(key):
+    """Get a provider by key (None if unknown)"""
+    return PROVIDERS.get(key)
+
+
+def with_capability(capability, exclude=()):
+    """Providers that have a capability and none of the excluded ones"""
+    return [
+        p for p in PROVIDERS.values()
+        if p.has(capability) and not any(p.has(c) for c in exclude)
+    ]
+
+
+def by_cost(keys=None):
+    """Providers ordered cheapest first (latency, then request count)"""
+    providers = [PROVIDERS[k] for k in keys] if keys else list(PROVIDERS.values())
+    return sorted(providers, key=lambda p: (p.latency, p.requests))
+
+
+def for_url(url):
+    """Guess the provider of an anime / episode URL (None if unknown)"""
+    for provider in PROVIDERS.values():
+        host = provider.base_url.split('://', 1)[-1]
+        if host.split('.')[-2] in url:
+            return provider
+    return None
+
+
+def resolver_for(url):
+    """Async resolver for a special link URL ('otakudesu:...', 'ajax:...'), or None"""
+    for provider in PROVIDERS.values():
+        if provider.resolve and url.startswith(provider.resolve[0]):
+            return provider.resolve[1]
+    return None
@@ -1,57 +1,299 @@
 import re
-from bs4 import BeautifulSoup
-import requests
+import asyncio
+from utils import http_client, async_engine, html_parser, fast_extract
+from utils.url_cache import cached_resolver, fallback
+from utils.html_parser import has_class, Region
+
+# Precompiled selectors
+DOWNLOAD_SECTION = html_parser.xpath(f"(//div[{has_class('download-eps')}])[1]")
+DOWNLOAD_ITEMS = html_parser.xpath(".//li")
+PLAYER_OPTIONS = html_parser.xpath(f"(//div[@id='server'])[1]//div[{has_class('east_player_option')}]")
+SEARCH_ARTICLES = html_parser.xpath(f"(//main[@id='main'])[1]//article[{has_class('animpost')}]")
+EPISODE_ITEMS = html_parser.xpath(f"((//div[{has_class('lstepsiode')}])[1]//ul)[1]//li")
+ALT_EPISODE_ITEMS = html_parser.xpath(f"((//div[{has_class('listeps')}])[1]//ul)[1]//li")
+EPS_LEFT = html_parser.xpath(f".//div[{has_class('epsleft')}]")
+EPS_RIGHT = html_parser.xpath(f".//div[{has_class('epsright')}]")
+IFRAME = html_parser.xpath("//iframe")
+FIRST_LINK = html_parser.xpath(".//a[@href]")
+FIRST_ANCHOR = html_parser.xpath(".//a")
+LINKS = html_parser.xpath(".//a[@href]")
+IMAGE = html_parser.xpath(".//img[@src]")
+
+# Regions of interest (only these subtrees get parsed)
+DOWNLOAD_REGIONS = [Region('div', cls='download-eps')]
+EPISODE_PAGE_REGIONS = [Region('div', id='server'), Region('div', cls='download-eps')]
+SEARCH_REGIONS = [Region('main', id='main')]
+EPISODE_LIST_REGIONS = [Region('div', cls='lstepsiode'), Region('div', cls='listeps')]
+
+
+# Prioritas kualitas untuk get_samehadaku_video (dari tinggi ke rendah)
+BEST_VIDEO_QUALITIES = ['1080p', '720p', 'x265', 'MP4HD', '480p', '360p']
+
+# Server yang didukung (prioritas dari yang paling reliable untuk streaming)
+BEST_VIDEO_SERVERS = [
+    {'name': 'pixeldrain', 'pattern': r'pixeldrain\.com/u/([a-zA-Z0-9]+)', 'fmt': 'https://pixeldrain.com/api/file/{}'},
+    {'name': 'gdrive', 'pattern': r'gdriveplayer\.me/download\.php\?link=([^"\'&]+)', 'fmt': 'https://gdriveplayer.me/download.php?link={}'},
+    {'name': 'acefile', 'pattern': r'acefile\.co/f/([a-zA-Z0-9]+/[^/\s"\']+)', 'fmt': 'https://acefile.co/f/{}'},
+    {'name': 'wibufile', 'pattern': r'wibufile\.com/([a-zA-Z0-9]+/watch)', 'fmt': 'https://wibufile.com/{}'},
+    {'name': 'mirrorupload', 'pattern': r'mir\.cr/([a-zA-Z0-9]+)', 'fmt': 'https://mir.cr/{}'},
+    {'name': 'racaty', 'pattern': r'racaty\.io/([a-zA-Z0-9]+)', 'fmt': 'https://racaty.io/{}'},
+    {'name': 'krakenfiles', 'pattern': r'krakenfiles\.com/view/([a-zA-Z0-9]+)', 'fmt': 'https://krakenfiles.com/{}'},
+    {'name': 'gofile', 'pattern': r'gofile\.io/d/([a-zA-Z0-9]+)', 'fmt': 'https://gofile.io/d/{}'},
+    {'name': 'zippyshare', 'pattern': r'zippyshare\.com/v/([a-zA-Z0-9]+)', 'fmt': 'https://www.zippyshare.com/v/{}'},
+    {'name': 'reupload', 'pattern': r'reupload\.org/([a-zA-Z0-9]+)', 'fmt': 'https://reupload.org/{}'},
+]
+
+# Server yang didukung (dengan prioritas dan stream_ready flag)
+# stream_ready = True: bisa langsung streaming di MPV
+# stream_ready = False: perlu download atau extract URL dulu
+DOWNLOAD_SERVERS = [
+    {'name': 'Pixeldrain', 'pattern': r'pixeldrain\.com/u/([a-zA-Z0-9]+)', 'fmt': 'https://pixeldrain.com/api/file/{}', 'stream_ready': True},
+    {'name': 'Google Drive', 'pattern': r'gdriveplayer\.me/download\.php\?link=([^"\'&]+)', 'fmt': 'https://gdriveplayer.me/download.php?link={}', 'stream_ready': True},
+    {'name': 'Acefile', 'pattern': r'acefile\.co/f/([a-zA-Z0-9]+/[^/\s"\']+)', 'fmt': 'https://acefile.co/f/{}', 'stream_ready': False},
+    {'name': 'Wibufile', 'pattern': r'wibufile\.com/([a-zA-Z0-9]+/watch)', 'fmt': 'https://wibufile.com/{}', 'stream_ready': False},
+    {'name': 'MirrorUpload', 'pattern': r'mir\.cr/([a-zA-Z0-9]+)', 'fmt': 'https://mir.cr/{}', 'stream_ready': False},
+    {'name': 'Racaty', 'pattern': r'racaty\.io/([a-zA-Z0-9]+)', 'fmt': 'https://racaty.io/{}', 'stream_ready': False},
+    {'name': 'Krakenfiles', 'pattern': r'krakenfiles\.com/view/([a-zA-Z0-9]+)', 'fmt': 'https://krakenfiles.com/{}', 'stream_ready': False},
+    {'name': 'Gofile', 'pattern': r'gofile\.io/d/([a-zA-Z0-9]+)', 'fmt': 'https://gofile.io/d/{}', 'stream_ready': True},
+    {'name': 'Zippyshare', 'pattern': r'zippyshare\.com/v/([a-zA-Z0-9]+)', 'fmt': 'https://www.zippyshare.com/v/{}', 'stream_ready': False},
+    {'name': 'Reupload', 'pattern': r'reupload\.org/([a-zA-Z0-9]+)', 'fmt': 'https://reupload.org/{}', 'stream_ready': False},
+]
+DOWNLOAD_QUALITIES = ['1080p', '720p', 'x265', 'MP4HD', '480p', '360p', '240p']
+
+
+# ==================== PARSERS ====================
+
+def parse_best_video(html):
+    """Pick the best direct video URL from an episode page's download-eps section"""
+    doc = html_parser.parse(html, DOWNLOAD_REGIONS)
+    if doc is None:
+        return None
+
+    # Cari div class="download-eps"
+    dl_section = html_parser.first(DOWNLOAD_SECTION(doc))
+    if dl_section is None:
+        return None
+    items = DOWNLOAD_ITEMS(dl_section)
+
+    for q in BEST_VIDEO_QUALITIES:
+        # Cari <li> yang mengandung kualitas
+        for li in items:
+            if q in html_parser.text(li, strip=False):
+                hrefs = [a.get('href') for a in LINKS(li)]
+                for s in BEST_VIDEO_SERVERS:
+                    for href in hrefs:
+                        match = re.search(s['pattern'], href)
+                        if match:
+                            url = s['fmt'].format(match.group(1))
+                            print(f"[scraper] Found {s['name']} link for {q}: {url}")
+                            return url
+    return None
+
+
+def parse_all_video_links(html):
+    """Parse an episode page into streaming options (AJAX) followed by download links"""
+    doc = html_parser.parse(html, EPISODE_PAGE_REGIONS)
+    if doc is None:
+        return []
+
+    # Cari div class="download-eps"
+    dl_section = html_parser.first(DOWNLOAD_SECTION(doc))
+    if dl_section is None:
+        return []
+
+    results = []
+    for li in DOWNLOAD_ITEMS(dl_section):
+        text = html_parser.text(li, strip=False)
+
+        # Try to extract quality
+        quality = None
+        for q in DOWNLOAD_QUALITIES:
+            if q in text:
+                quality = q
+                break
+
+        if not quality:
+            continue  # Skip if we can't determine quality
+
+        # Find all links in this <li>
+        for link in LINKS(li):
+            href = link.get('href')
+
+            # Try to match against known servers
+            for s in DOWNLOAD_SERVERS:
+                match = re.search(s['pattern'], href)
+                if match:
+                    url = s['fmt'].format(match.group(1))
+                    results.append({
+                        'resolution': quality,
+                        'server': s['name'],
+                        'url': url,
+                        'type': 'download',
+                        'stream_ready': s.get('stream_ready', False),
+                        'priority': DOWNLOAD_QUALITIES.index(quality)
+                    })
+                    break  # Found match for this link, move to next
+
+    # --- Extract Streaming Options (AJAX) - PRIORITIZED ---
+    # Cari div id="server" -> ul -> li -> div.east_player_option
+    streaming_options = []
+    for opt in PLAYER_OPTIONS(doc):
+        # Extract attributes needed for AJAX
+        post_id = opt.get('data-post')
+        nume = opt.get('data-nume')
+        type_ = opt.get('data-type')
+
+        # Get label text (e.g., "Blogspot 480p")
+        label = html_parser.text(opt)
+
+        if post_id and nume and type_:
+            # Determine quality from label
+            quality = 'Unknown'
+            quality_priority = 999
+            for idx, q in enumerate(['1080p', '720p', '480p', '360p']):
+                if q in label:
+                    quality = q
+                    quality_priority = idx
+                    break
+
+            # Add to streaming options with high priority
+            streaming_options.append({
+                'resolution': quality,
+                'server': f"🎬 {label.replace(quality, '').strip()}",
+                'url': f"ajax:{post_id}:{nume}:{type_}",
+                'stream_ready': True,
+                'priority': quality_priority  # Sort by quality within streaming options
+            })
+
+    # Sort streaming options by quality
+    streaming_options.sort(key=lambda x: x['priority'])
+
+    # Sort download options by quality and stream-ready status
+    results.sort(key=lambda x: (x['priority'], not x['stream_ready']))
+
+    # Combine: streaming options first, then download options
+    return streaming_options + results
+
+
+def parse_player_iframe(html):
+    """Get the iframe src from a player_ajax response"""
+    doc = html_parser.parse(html)
+    iframe = html_parser.first(IFRAME(doc)) if doc is not None else None
+    if iframe is None:
+        return None
+    return iframe.get('src')
+
+
+def parse_search_results(html):
+    """Parse the search page into result dicts"""
+    doc = html_parser.parse(html, SEARCH_REGIONS)
+    if doc is None:
+        return []
+
+    results = []
+    for art in SEARCH_ARTICLES(doc):
+        link_tag = html_parser.first(FIRST_LINK(art))
+        if link_tag is None:
+            continue
+
+        # Extract title from alt attribute or text
+        title = link_tag.get('alt', html_parser.text(link_tag))
+
+        # Try to get thumbnail
+        img = html_parser.first(IMAGE(art))
+        thumbnail = img.get('src') if img is not None else None
+
+        results.append({
+            'title': title,
+            'url': link_tag.get('href'),
+            'thumbnail': thumbnail
+        })
+    return results
+
+
+def parse_episode_list(html):
+    """Parse the anime detail page into episode dicts"""
+    doc = html_parser.parse(html, EPISODE_LIST_REGIONS)
+    if doc is None:
+        return []
+
+    episodes = []
+
+    # Method 1: div.lstepsiode (Standard layout)
+    for li in EPISODE_ITEMS(doc):
+        # Title and URL are usually in div.epsleft span.lchx a
+        epsleft = html_parser.first(EPS_LEFT(li))
+        link = html_parser.first(FIRST_LINK(epsleft)) if epsleft is not None else None
+        if link is None:
+            continue
+
+        title = html_parser.text(link)
+
+        # Extract episode number
+        ep_num = '?'
+        # Try to find number in div.epsright first (sometimes contains just the number)
+        epsright = html_parser.first(EPS_RIGHT(li))
+        if epsright is not None:
+            num_link = html_parser.first(FIRST_ANCHOR(epsright))
+            if num_link is not None:
+                ep_num = html_parser.text(num_link)
+
+        # If not found or not digit, try regex on title
+        if not ep_num or not ep_num.isdigit():
+            match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
+            if match:
+                ep_num = match.group(1)
+
+        episodes.append({
+            'title': title,
+            'url': link.get('href'),
+            'episode_number': ep_num,
+            'source': 'samehadaku'
+        })
+
+    # Method 2: div.listeps (Alternative layout)
+    if not episodes:
+        for li in ALT_EPISODE_ITEMS(doc):
+            epsleft = html_parser.first(EPS_LEFT(li))
+            link = html_parser.first(FIRST_LINK(epsleft)) if epsleft is not None else None
+            if link is None:
+                continue
+
+            title = html_parser.text(link)
+
+            ep_num = '?'
+            match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
+            if match:
+                ep_num = match.group(1)
+
+            episodes.append({
+                'title': title,
+                'url': link.get('href'),
+                'episode_number': ep_num,
+                'source': 'samehadaku'
+            })
+
+    # Samehadaku lists newest first (descending) - keep as is
+    return episodes
 
 
 def get_samehadaku_video(episode_url):
+    """Get the best direct video URL for an episode"""
+    return async_engine.run(get_samehadaku_video_async(episode_url))
+
+
+async def get_samehadaku_video_async(episode_url):
+    """Async version of get_samehadaku_video()"""
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
     }
     try:
-        # Use requests.Session() with proper headers
-        session = requests.Session()
-        resp = session.get(episode_url, headers=headers, timeout=10)
+        # Shared pooled session with proper headers
+        resp = await http_client.aget(episode_url, headers=headers, timeout=10, cache='media')
         resp.raise_for_status()  # Raise an exception for HTTP errors
         html = resp.text
             
-        soup = BeautifulSoup(html, 'html.parser')
-
-        # Cari div class="download-eps"
-        dl_section = soup.find('div', {'class': 'download-eps'})
-        if not dl_section:
-            return None
-
-        # Prioritas kualitas (dari tinggi ke rendah)
-        qualities = ['1080p', '720p', 'x265', 'MP4HD', '480p', '360p']
-
-        # Server yang didukung (prioritas dari yang paling reliable untuk streaming)
-        servers = [
-            {'name': 'pixeldrain', 'pattern': r'pixeldrain\.com/u/([a-zA-Z0-9]+)', 'fmt': 'https://pixeldrain.com/api/file/{}'},
-            {'name': 'gdrive', 'pattern': r'gdriveplayer\.me/download\.php\?link=([^"\'&]+)', 'fmt': 'https://gdriveplayer.me/download.php?link={}'},
-            {'name': 'acefile', 'pattern': r'acefile\.co/f/([a-zA-Z0-9]+/[^/\s"\']+)', 'fmt': 'https://acefile.co/f/{}'},
-            {'name': 'wibufile', 'pattern': r'wibufile\.com/([a-zA-Z0-9]+/watch)', 'fmt': 'https://wibufile.com/{}'},
-            {'name': 'mirrorupload', 'pattern': r'mir\.cr/([a-zA-Z0-9]+)', 'fmt': 'https://mir.cr/{}'},
-            {'name': 'racaty', 'pattern': r'racaty\.io/([a-zA-Z0-9]+)', 'fmt': 'https://racaty.io/{}'},
-            {'name': 'krakenfiles', 'pattern': r'krakenfiles\.com/view/([a-zA-Z0-9]+)', 'fmt': 'https://krakenfiles.com/{}'},
-            {'name': 'gofile', 'pattern': r'gofile\.io/d/([a-zA-Z0-9]+)', 'fmt': 'https://gofile.io/d/{}'},
-            {'name': 'zippyshare', 'pattern': r'zippyshare\.com/v/([a-zA-Z0-9]+)', 'fmt': 'https://www.zippyshare.com/v/{}'},
-            {'name': 'reupload', 'pattern': r'reupload\.org/([a-zA-Z0-9]+)', 'fmt': 'https://reupload.org/{}'},
-        ]
-
-        for q in qualities:
-            # Cari <li> yang mengandung kualitas
-            items = dl_section.find_all('li')
-            for li in items:
-                if q in li.get_text():
-                    for s in servers:
-                        link = li.find('a', href=re.compile(s['pattern']))
-                        if link:
-                            match = re.search(s['pattern'], link['href'])
-                            if match:
-                                url = s['fmt'].format(match.group(1))
-                                print(f"[scraper] Found {s['name']} link for {q}: {url}")
-                                return url
-        return None
+        return parse_best_video(html)
     except Exception as e:
         print(f"[scraper] Error: {e}")
         return None
@@ -59,135 +301,37 @@ def get_samehadaku_video(episode_url):
 
 def get_all_video_links(episode_url):
     """Get all available video links with quality and server info"""
+    return async_engine.run(get_all_video_links_async(episode_url))
+
+
+def _fetch_page_with_browser(episode_url):
+    """Load a page with headless Firefox (blocking) and return its HTML"""
+    # Use Selenium to bypass Cloudflare protection
+    from selenium import webdriver
+    from selenium.webdriver.firefox.options import Options
+    import time
+    
+    options = Options()
+    options.add_argument('--headless')
+    options.set_preference('general.useragent.override', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    
+    driver = webdriver.Firefox(options=options)
     try:
-        # Use Selenium to bypass Cloudflare protection
-        from selenium import webdriver
-        from selenium.webdriver.firefox.options import Options
-        import time
-        
-        options = Options()
-        options.add_argument('--headless')
-        options.set_preference('general.useragent.override', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+        driver.get(episode_url)
+        # Wait for Cloudflare to pass and content to load
+        time.sleep(7)
         
-        driver = webdriver.Firefox(options=options)
-        try:
-            driver.get(episode_url)
-            # Wait for Cloudflare to pass and content to load
-            time.sleep(7)
-            
-            html = driver.page_source
-            soup = BeautifulSoup(html, 'html.parser')
-        finally:
-            driver.quit()
-
-        # Cari div class="download-eps"
-        dl_section = soup.find('div', {'class': 'download-eps'})
-        if not dl_section:
-            return []
-
-        # Server yang didukung (dengan prioritas dan stream_ready flag)
-        # stream_ready = True: bisa langsung streaming di MPV
-        # stream_ready = False: perlu download atau extract URL dulu
-        servers = [
-            {'name': 'Pixeldrain', 'pattern': r'pixeldrain\.com/u/([a-zA-Z0-9]+)', 'fmt': 'https://pixeldrain.com/api/file/{}', 'stream_ready': True},
-            {'name': 'Google Drive', 'pattern': r'gdriveplayer\.me/download\.php\?link=([^"\'&]+)', 'fmt': 'https://gdriveplayer.me/download.php?link={}', 'stream_ready': True},
-            {'name': 'Acefile', 'pattern': r'acefile\.co/f/([a-zA-Z0-9]+/[^/\s"\']+)', 'fmt': 'https://acefile.co/f/{}', 'stream_ready': False},
-            {'name': 'Wibufile', 'pattern': r'wibufile\.com/([a-zA-Z0-9]+/watch)', 'fmt': 'https://wibufile.com/{}', 'stream_ready': False},
-            {'name': 'MirrorUpload', 'pattern': r'mir\.cr/([a-zA-Z0-9]+)', 'fmt': 'https://mir.cr/{}', 'stream_ready': False},
-            {'name': 'Racaty', 'pattern': r'racaty\.io/([a-zA-Z0-9]+)', 'fmt': 'https://racaty.io/{}', 'stream_ready': False},
-            {'name': 'Krakenfiles', 'pattern': r'krakenfiles\.com/view/([a-zA-Z0-9]+)', 'fmt': 'https://krakenfiles.com/{}', 'stream_ready': False},
-            {'name': 'Gofile', 'pattern': r'gofile\.io/d/([a-zA-Z0-9]+)', 'fmt': 'https://gofile.io/d/{}', 'stream_ready': True},
-            {'name': 'Zippyshare', 'pattern': r'zippyshare\.com/v/([a-zA-Z0-9]+)', 'fmt': 'https://www.zippyshare.com/v/{}', 'stream_ready': False},
-            {'name': 'Reupload', 'pattern': r'reupload\.org/([a-zA-Z0-9]+)', 'fmt': 'https://reupload.org/{}', 'stream_ready': False},
-        ]
-
-        results = []
-
-        # Find all <li> items
-        items = dl_section.find_all('li')
-        for li in items:
-            text = li.get_text()
+        return driver.page_source
+    finally:
+        driver.quit()
 
-            # Try to extract quality
-            quality = None
-            quality_patterns = ['1080p', '720p', 'x265', 'MP4HD', '480p', '360p', '240p']
-            for q in quality_patterns:
-                if q in text:
-                    quality = q
-                    break
 
-            if not quality:
-                continue  # Skip if we can't determine quality
-
-            # Find all links in this <li>
-            links = li.find_all('a', href=True)
-            for link in links:
-                href = link['href']
-                link_text = link.get_text(strip=True)
-
-                # Try to match against known servers
-                for s in servers:
-                    match = re.search(s['pattern'], href)
-                    if match:
-                        url = s['fmt'].format(match.group(1))
-                        results.append({
-                            'resolution': quality,
-                            'server': s['name'],
-                            'url': url,
-                            'type': 'download',
-                            'stream_ready': s.get('stream_ready', False),
-                            'priority': quality_patterns.index(quality) if quality in quality_patterns else 999
-                        })
-                        break  # Found match for this link, move to next
-
-        # Sort by: 1) quality priority, 2) stream-ready servers first
-        results.sort(key=lambda x: (x['priority'], not x['stream_ready']))
-
-        # --- Extract Streaming Options (AJAX) - PRIORITIZED ---
-        # Cari div id="server" -> ul -> li -> div.east_player_option
-        server_div = soup.find('div', id='server')
-        streaming_options = []
-
-        if server_div:
-            options = server_div.find_all('div', class_='east_player_option')
-            for opt in options:
-                # Extract attributes needed for AJAX
-                post_id = opt.get('data-post')
-                nume = opt.get('data-nume')
-                type_ = opt.get('data-type')
-
-                # Get label text (e.g., "Blogspot 480p")
-                label = opt.get_text(strip=True)
-
-                if post_id and nume and type_:
-                    # Determine quality from label
-                    quality = 'Unknown'
-                    quality_priority = 999
-                    for idx, q in enumerate(['1080p', '720p', '480p', '360p']):
-                        if q in label:
-                            quality = q
-                            quality_priority = idx
-                            break
-
-                    # Add to streaming options with high priority
-                    streaming_options.append({
-                        'resolution': quality,
-                        'server': f"🎬 {label.replace(quality, '').strip()}",
-                        'url': f"ajax:{post_id}:{nume}:{type_}",
-                        'stream_ready': True,
-                        'priority': quality_priority  # Sort by quality within streaming options
-                    })
-
-        # Sort streaming options by quality
-        streaming_options.sort(key=lambda x: x['priority'])
-
-        # Sort download options by quality and stream-ready status
-        results.sort(key=lambda x: (x['priority'], not x['stream_ready']))
-
-        # Combine: streaming options first, then download options
-        results = streaming_options + results
-
-        return results
+async def get_all_video_links_async(episode_url):
+    """Async version of get_all_video_links()"""
+    try:
+        # Browser runs in a worker thread so the engine loop stays free
+        html = await asyncio.to_thread(_fetch_page_with_browser, episode_url)
+        return parse_all_video_links(html)
     except Exception as e:
         print(f"[scraper] Error getting all links: {e}")
         return []
@@ -195,6 +339,12 @@ def get_all_video_links(episode_url):
 
 def get_streaming_url(ajax_params):
     """Fetch actual streaming URL using AJAX params"""
+    return async_engine.run(get_streaming_url_async(ajax_params))
+
+
+@cached_resolver('samehadaku')
+async def get_streaming_url_async(ajax_params):
+    """Async version of get_streaming_url()"""
     # params format: ajax:post_id:nume:type
     try:
         _, post_id, nume, type_ = ajax_params.split(':')
@@ -214,12 +364,10 @@ def get_streaming_url(ajax_params):
             "type": type_
         }
 
-        resp = requests.post(url, headers=headers, data=data)
+        resp = await http_client.apost(url, headers=headers, data=data)
         if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, 'html.parser')
-            iframe = soup.find('iframe')
-            if iframe and iframe.get('src'):
-                src = iframe['src']
+            src = parse_player_iframe(resp.text)
+            if src:
                 
                 # If it's a blogger link, scrape to get direct Google Video URL
                 if 'blogger.com' in src or 'googleusercontent' in src or 'googlevideo.com' in src:
@@ -227,21 +375,12 @@ def get_streaming_url(ajax_params):
                     
                     try:
                         # Scrape Blogger page for direct video URL
-                        blogger_resp = requests.get(src, headers=headers, timeout=10)
+                        blogger_resp = await http_client.aget(src, headers=headers, timeout=10)
                         
                         if blogger_resp.status_code == 200:
                             # Look for direct googlevideo.com URL in page source
-                            matches = re.findall(
-                                r'(https://[^"\']+googlevideo\.com/videoplayback[^"\']+)', 
-                                blogger_resp.text
-                            )
-                            
-                            if matches:
-                                # Get the longest URL (usually the full one)
-                                direct_url = max(matches, key=len)
-                                # Unescape
-                                direct_url = direct_url.replace('\\u003d', '=').replace('\\u0026', '&')
-                                
+                            direct_url = fast_extract.blogger_video_url(blogger_resp.text)
+                            if direct_url:
                                 print(f"  [blogger] ✓ Found direct URL")
                                 
                                 # Return with headers for proxy
@@ -257,13 +396,13 @@ def get_streaming_url(ajax_params):
                     
                     # Fallback: return Blogger URL with headers
                     print(f"  [blogger] ⚠️  Using Blogger embed URL (fallback)")
-                    return {
+                    return fallback({
                         'url': src,
                         'headers': {
                             'User-Agent': headers['User-Agent'],
                             'Referer': 'https://v1.samehadaku.how/'
                         }
-                    }
+                    })
                     
                 # If it's youtube, also playable
                 if 'youtube.com' in src or 'youtu.be' in src:
@@ -271,7 +410,7 @@ def get_streaming_url(ajax_params):
                 
                 # Try to resolve embed URLs to direct video
                 try:
-                    from utils.embed_resolvers import resolve_embed_url
+                    from utils.embed_resolvers import resolve_embed_url_async
                     
                     # Determine server name from URL
                     server_name = ""
@@ -285,7 +424,7 @@ def get_streaming_url(ajax_params):
                         server_name = "Krakenfiles"
                     
                     if server_name:
-                        resolved = resolve_embed_url(src, server_name)
+                        resolved = await resolve_embed_url_async(src, server_name)
                         if resolved:
                             return resolved
                 except ImportError:
@@ -294,7 +433,7 @@ def get_streaming_url(ajax_params):
                     print(f"[scraper] Resolver error: {e}")
 
                 # Return embed URL as fallback (yt-dlp might handle it)
-                return src
+                return fallback(src)
     except Exception as e:
         print(f"[scraper] Error fetching stream URL: {e}")
 
@@ -310,36 +449,18 @@ def resolve_gofile_url(gofile_url):
 
 def search_anime(query):
     """Search for anime on Samehadaku and return list of results"""
+    return async_engine.run(search_anime_async(query))
+
+
+async def search_anime_async(query):
+    """Async version of search_anime()"""
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
     }
     try:
         url = f"https://samehadaku.how/?s={query}"
-        resp = requests.get(url, headers=headers)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-
-        results = []
-        main_content = soup.find('main', id='main')
-        if main_content:
-            articles = main_content.find_all('article', class_='animpost')
-            for art in articles:
-                link_tag = art.find('a', href=True)
-                if link_tag:
-                    # Extract title from alt attribute or text
-                    title = link_tag.get('alt', link_tag.get_text(strip=True))
-                    url = link_tag['href']
-
-                    # Try to get thumbnail
-                    img = art.find('img', src=True)
-                    thumbnail = img['src'] if img else None
-
-                    results.append({
-                        'title': title,
-                        'url': url,
-                        'thumbnail': thumbnail
-                    })
-
-        return results
+        resp = await http_client.aget(url, headers=headers, cache='search')
+        return parse_search_results(resp.text)
     except Exception as e:
         print(f"[scraper] Search error: {e}")
         return []
@@ -347,85 +468,17 @@ def search_anime(query):
 
 def get_anime_episodes(anime_url):
     """Get list of episodes from an anime detail page"""
+    return async_engine.run(get_anime_episodes_async(anime_url))
+
+
+async def get_anime_episodes_async(anime_url):
+    """Async version of get_anime_episodes()"""
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
     }
     try:
-        resp = requests.get(anime_url, headers=headers)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-
-        episodes = []
-        
-        # Method 1: Check for div.lstepsiode (Standard layout)
-        lstepsiode = soup.find('div', class_='lstepsiode')
-        if lstepsiode:
-            # Check for ul inside
-            ul = lstepsiode.find('ul')
-            if ul:
-                for li in ul.find_all('li'):
-                    # Title and URL are usually in div.epsleft span.lchx a
-                    epsleft = li.find('div', class_='epsleft')
-                    if epsleft:
-                        link = epsleft.find('a', href=True)
-                        if link:
-                            title = link.get_text(strip=True)
-                            url = link['href']
-                            
-                            # Extract episode number
-                            ep_num = '?'
-                            # Try to find number in div.epsright first (sometimes contains just the number)
-                            epsright = li.find('div', class_='epsright')
-                            if epsright:
-                                num_link = epsright.find('a')
-                                if num_link:
-                                    ep_num = num_link.get_text(strip=True)
-                            
-                            # If not found or not digit, try regex on title
-                            if not ep_num or not ep_num.isdigit():
-                                match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
-                                if match:
-                                    ep_num = match.group(1)
-                            
-                            episodes.append({
-                                'title': title,
-                                'url': url,
-                                'episode_number': ep_num,
-                                'source': 'samehadaku'
-                            })
-                            continue
-
-        # Method 2: Check for div.listeps (Alternative layout)
-        if not episodes:
-            listeps = soup.find('div', class_='listeps')
-            if listeps:
-                ul = listeps.find('ul')
-                if ul:
-                    for li in ul.find_all('li'):
-                        # Similar structure usually
-                        epsleft = li.find('div', class_='epsleft')
-                        if epsleft:
-                            link = epsleft.find('a', href=True)
-                            if link:
-                                title = link.get_text(strip=True)
-                                url = link['href']
-                                
-                                ep_num = '?'
-                                match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
-                                if match:
-                                    ep_num = match.group(1)
-                                
-                                episodes.append({
-                                    'title': title,
-                                    'url': url,
-                                    'episode_number': ep_num,
-                                    'source': 'samehadaku'
-                                })
-
-        # Sort by episode number (descending usually, reverse if needed)
-        # Samehadaku usually lists newest first (descending).
-        # We want newest first usually, so keep as is.
-        
-        return episodes
+        resp = await http_client.aget(anime_url, headers=headers, cache='anime')
+        return parse_episode_list(resp.text)
     except Exception as e:
         print(f"[scraper] Episode list error: {e}")
         return []
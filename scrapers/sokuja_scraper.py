@@ -3,151 +3,215 @@
 Sokuja Scraper - https://x3.sokuja.uk/
 """
 
-import requests
-from bs4 import BeautifulSoup
+from utils import http_client, async_engine, html_parser, fast_extract
+from utils.html_parser import has_class, Region
 import re
+import base64
 
 BASE_URL = "https://x3.sokuja.uk"
 
+# End of the <select name="mirror"> dropdown on episode pages
+MIRROR_SELECT_END = re.compile(rb'<select[^>]*name=["\']?mirror\b.*?</select>', re.S | re.I)
+
+# Fast path for the mirror dropdown (see fast_extract)
+MIRROR_SELECT = re.compile(r'<select\b[^>]*name=["\']?mirror\b[^>]*>(.*?)</select>', re.S | re.I)
+OPTION = re.compile(r'<option\b([^>]*)>(.*?)</option>', re.S | re.I)
+
+# Precompiled selectors
+SEARCH_ARTICLES = html_parser.xpath(f"//article[{has_class('bs')}]")
+EPISODE_ITEMS = html_parser.xpath(f"(//div[{has_class('eplister')}])[1]//li")
+MIRROR_OPTIONS = html_parser.xpath("(//select[@name='mirror'])[1]//option")
+FIRST_LINK = html_parser.xpath(".//a[@href]")
+IMAGE = html_parser.xpath(".//img[@src]")
+EPISODE_TITLE = html_parser.xpath(f".//div[{has_class('epl-title')}]")
+
+# Regions of interest (only these subtrees get parsed)
+SEARCH_REGIONS = [Region('article', cls='bs', first=False)]
+EPISODE_LIST_REGIONS = [Region('div', cls='eplister')]
+EPISODE_PAGE_REGIONS = [Region('select', attr=('name', 'mirror'))]
+
 def get_headers():
     return {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
     }
 
+# ==================== PARSERS ====================
+
+def parse_search_results(html):
+    """Parse the search page into result dicts"""
+    doc = html_parser.parse(html, SEARCH_REGIONS)
+    if doc is None:
+        return []
+
+    results = []
+    for art in SEARCH_ARTICLES(doc):
+        link = html_parser.first(FIRST_LINK(art))
+        if link is None:
+            continue
+
+        title = link.get('title', html_parser.text(link))
+
+        # Get thumbnail
+        img = html_parser.first(IMAGE(art))
+        thumbnail = img.get('src') if img is not None else None
+
+        results.append({
+            'title': title,
+            'url': link.get('href'),
+            'thumbnail': thumbnail,
+            'source': 'sokuja'
+        })
+    return results
+
+
+def parse_episode_list(html):
+    """Parse the anime page (div.eplister) into episode dicts"""
+    doc = html_parser.parse(html, EPISODE_LIST_REGIONS)
+    if doc is None:
+        return []
+
+    episodes = []
+    for li in EPISODE_ITEMS(doc):
+        link = html_parser.first(FIRST_LINK(li))
+        if link is None:
+            continue
+
+        # Try to get clean title from div.epl-title
+        title_div = html_parser.first(EPISODE_TITLE(link))
+        if title_div is not None:
+            title = html_parser.text(title_div)
+        else:
+            title = html_parser.text(link)
+
+        # Extract episode number
+        ep_num = '?'
+        match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
+        if match:
+            ep_num = match.group(1)
+
+        episodes.append({
+            'title': title,
+            'url': link.get('href'),
+            'episode_number': ep_num,
+            'source': 'sokuja'
+        })
+
+    # Site lists newest first. Keep it that way for consistency with others.
+    return episodes
+
+
+def find_mirror_options(html):
+    """Fast path: (value, text) of each mirror option, None if the markup looks unusual"""
+    select = MIRROR_SELECT.search(html)
+    if not select:
+        return None
+    body = select.group(1)
+
+    options = []
+    for match in OPTION.finditer(body):
+        text = fast_extract.plain_text(match.group(2))
+        if text is None:
+            return None
+        options.append((fast_extract.attrs(match.group(1)).get('value'), text))
+
+    # Unclosed <option> tags etc. - let the DOM parser handle it
+    if len(options) != body.lower().count('<option'):
+        return None
+    return options
+
+
+def parse_mirror_options(html):
+    """(value, text) of each mirror option via the DOM"""
+    doc = html_parser.parse(html, EPISODE_PAGE_REGIONS)
+    if doc is None:
+        return []
+    return [(opt.get('value'), html_parser.text(opt)) for opt in MIRROR_OPTIONS(doc)]
+
+
+def parse_video_links(html):
+    """Parse the mirror dropdown of an episode page into stream links"""
+    options = fast_extract.run('sokuja.mirrors', find_mirror_options, parse_mirror_options, html)
+
+    links = []
+    priority = 0
+    for value, text in options:
+        # Skip placeholder option
+        if not value or 'Pilih' in text:
+            continue
+
+        # Decode base64 value to get video HTML
+        try:
+            decoded = base64.b64decode(value).decode('utf-8')
+
+            # Extract src URL from decoded HTML
+            # Format: <video controls preload="none"><source src="URL" type="video/mp4"></video>
+            match = re.search(r'src="([^"]+)"', decoded)
+            if match:
+                video_url = match.group(1)
+
+                # Extract quality from text (e.g., "SOKUJA 480p")
+                quality = 'Unknown'
+                quality_match = re.search(r'(360p|480p|720p|1080p)', text)
+                if quality_match:
+                    quality = quality_match.group(1)
+
+                links.append({
+                    'server': f'🎬 SOKUJA',
+                    'url': video_url,
+                    'resolution': quality,
+                    'type': 'stream',
+                    'stream_ready': True,
+                    'priority': priority
+                })
+                priority += 1
+        except Exception as e:
+            print(f"[sokuja] Error decoding option: {e}")
+
+    # Sort by priority (720p first, then 480p, etc.)
+    links.sort(key=lambda x: x.get('priority', 999))
+    return links
+
+
 def search_anime(query):
     """Search for anime on Sokuja"""
+    return async_engine.run(search_anime_async(query))
+
+
+async def search_anime_async(query):
+    """Async version of search_anime()"""
     url = f"{BASE_URL}/?s={query}"
     try:
-        resp = requests.get(url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        results = []
-        # Find search results
-        articles = soup.find_all('article', class_='bs')
-        
-        for art in articles:
-            link = art.find('a', href=True)
-            if link:
-                title = link.get('title', link.get_text(strip=True))
-                url = link['href']
-                
-                # Get thumbnail
-                img = art.find('img', src=True)
-                thumbnail = img['src'] if img else None
-                
-                results.append({
-                    'title': title,
-                    'url': url,
-                    'thumbnail': thumbnail,
-                    'source': 'sokuja'
-                })
-        
-        return results
+        resp = await http_client.aget(url, headers=get_headers(), cache='search')
+        return parse_search_results(resp.text)
     except Exception as e:
         print(f"[sokuja] Search error: {e}")
         return []
 
 def get_anime_episodes(anime_url):
     """Get episodes for an anime"""
+    return async_engine.run(get_anime_episodes_async(anime_url))
+
+
+async def get_anime_episodes_async(anime_url):
+    """Async version of get_anime_episodes()"""
     try:
-        resp = requests.get(anime_url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        episodes = []
-        # Find episode list in eplister div
-        eplister = soup.find('div', class_='eplister')
-        
-        if eplister:
-            lis = eplister.find_all('li')
-            for li in lis:
-                link = li.find('a', href=True)
-                if link:
-                    # Try to get clean title from div.epl-title
-                    title_div = link.find('div', class_='epl-title')
-                    if title_div:
-                        title = title_div.get_text(strip=True)
-                    else:
-                        title = link.get_text(strip=True)
-                        
-                    url = link['href']
-                    
-                    # Extract episode number
-                    ep_num = '?'
-                    match = re.search(r'Episode\s+(\d+)', title, re.IGNORECASE)
-                    if match:
-                        ep_num = match.group(1)
-                    
-                    episodes.append({
-                        'title': title,
-                        'url': url,
-                        'episode_number': ep_num,
-                        'source': 'sokuja'
-                    })
-        
-        # Reverse to get ascending order (or keep descending?)
-        # Site lists newest first. Let's keep it that way for consistency with others.
-        # episodes.reverse() 
-        
-        return episodes
+        resp = await http_client.aget(anime_url, headers=get_headers(), cache='anime')
+        return parse_episode_list(resp.text)
     except Exception as e:
         print(f"[sokuja] Episode list error: {e}")
         return []
 
 def get_video_links(episode_url):
     """Get video links from episode page"""
+    return async_engine.run(get_video_links_async(episode_url))
+
+
+async def get_video_links_async(episode_url):
+    """Async version of get_video_links()"""
     try:
-        resp = requests.get(episode_url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        links = []
-        
-        # Look for select dropdown with video options
-        select = soup.find('select', {'name': 'mirror'})
-        if select:
-            options = select.find_all('option')
-            priority = 0
-            
-            for opt in options:
-                value = opt.get('value')
-                text = opt.get_text(strip=True)
-                
-                # Skip placeholder option
-                if not value or 'Pilih' in text:
-                    continue
-                
-                # Decode base64 value to get video HTML
-                try:
-                    import base64
-                    decoded = base64.b64decode(value).decode('utf-8')
-                    
-                    # Extract src URL from decoded HTML
-                    # Format: <video controls preload="none"><source src="URL" type="video/mp4"></video>
-                    match = re.search(r'src="([^"]+)"', decoded)
-                    if match:
-                        video_url = match.group(1)
-                        
-                        # Extract quality from text (e.g., "SOKUJA 480p")
-                        quality = 'Unknown'
-                        quality_match = re.search(r'(360p|480p|720p|1080p)', text)
-                        if quality_match:
-                            quality = quality_match.group(1)
-                        
-                        links.append({
-                            'server': f'🎬 SOKUJA',
-                            'url': video_url,
-                            'resolution': quality,
-                            'type': 'stream',
-                            'stream_ready': True,
-                            'priority': priority
-                        })
-                        priority += 1
-                except Exception as e:
-                    print(f"[sokuja] Error decoding option: {e}")
-        
-        # Sort by priority (720p first, then 480p, etc.)
-        links.sort(key=lambda x: x.get('priority', 999))
-        
-        return links
+        # Only the mirror dropdown is needed - stop downloading once it's closed
+        resp = await http_client.aget(episode_url, headers=get_headers(), cache='media', stop_at=MIRROR_SELECT_END)
+        return parse_video_links(resp.text)
     except Exception as e:
         print(f"[sokuja] Video links error: {e}")
         return []
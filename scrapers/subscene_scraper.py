@@ -4,7 +4,7 @@ Subscene Subtitle Scraper
 Scrapes Indonesian subtitles from Subscene
 """
 
-import requests
+from utils import http_client
 from bs4 import BeautifulSoup
 import re
 
@@ -33,8 +33,8 @@ def search_subtitles(query):
         
         # Subscene requires POST for search
         data = {'query': query}
-        resp = requests.post(url, data=data, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = http_client.post(url, data=data, headers=get_headers())
+        soup = BeautifulSoup(resp.text, 'lxml')
         
         results = []
         
@@ -73,8 +73,8 @@ def get_subtitle_downloads(page_url):
     try:
         print(f"[subscene] Fetching subtitles from: {page_url}")
         
-        resp = requests.get(page_url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = http_client.get(page_url, headers=get_headers())
+        soup = BeautifulSoup(resp.text, 'lxml')
         
         subtitles = []
         
@@ -156,8 +156,8 @@ def get_download_link(subtitle_url):
     try:
         print(f"[subscene] Getting download link...")
         
-        resp = requests.get(subtitle_url, headers=get_headers())
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = http_client.get(subtitle_url, headers=get_headers())
+        soup = BeautifulSoup(resp.text, 'lxml')
         
         # Find download button
         download_button = soup.find('a', id='downloadButton')
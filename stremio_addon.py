@@ -5,17 +5,22 @@ Supports: Samehadaku, Otakudesu, Sokuja, Nyaa Torrents
 
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import re
 import logging
-from functools import lru_cache
+import asyncio
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
 
 # Import existing scrapers
-from scrapers import samehadaku_scraper, otakudesu_scraper, sokuja_scraper, nyaa_scraper
-from scrapers import animetosho_scraper  # NEW: AnimeTosho torrents
+from scrapers import registry
 from utils.tmdb_helper import TMDBHelper
 from utils.anilist_helper import AniListHelper
+from utils import async_engine, circuit_breaker, deadline, fast_extract, hedging, prewarm, rate_limiter, release_parser, singleflight, storage, stream_engine, title_matcher
+from utils.stream_cache import stream_cache
+from utils.url_cache import url_cache
+from utils.prefetch import prefetcher
+from utils.anilist_batch import batcher as anilist_batcher
+from utils.id_mapping import id_mapping
+from utils.metadata_cache import metadata_cache
 
 app = Flask(__name__)
 CORS(app)
@@ -23,10 +28,49 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Total time budget for one /stream request (seconds)
+# Whatever was found when it runs out is returned
+STREAM_DEADLINE = 10
+
+# Title variants scraped at the same time, and how many streams make one
+# variant good enough to cancel the others
+MAX_TITLE_VARIANTS = 4
+GOOD_ENOUGH_STREAMS = 3
+
+# Two episodes of a show requested in order within this many seconds = binge
+# watching, prefetch two episodes ahead instead of one
+BINGE_WINDOW = 2 * 60 * 60
+MAX_TRACKED_SHOWS = 1000
+
+# (imdb_id, season) -> (last episode requested, time)
+recent_episodes = OrderedDict()
+
 # Initialize helpers
 tmdb = TMDBHelper()
 anilist = AniListHelper()
 
+_background_started = False
+
+
+def start_background_work():
+    """Start network warm-up and dataset refresh (once per process - not at import, tests and tools import this module)"""
+    global _background_started
+    if _background_started:
+        return
+    _background_started = True
+
+    # Resolve DNS + open warm connections in the background
+    prewarm.prewarm(prewarm.ADDON_HOSTS)
+
+    # Keep the offline ID mapping up to date (downloads the dataset when due)
+    async_engine.submit(id_mapping.keep_fresh())
+
+
+@app.before_request
+def _start_on_first_request():
+    # Serverless cold starts never run __main__ - the first request starts it there
+    start_background_work()
+
 # Addon metadata
 MANIFEST = {
     "id": "community.anime.indonesian.multi",
@@ -46,7 +90,8 @@ def index():
         "version": MANIFEST['version'],
         "endpoints": {
             "manifest": "/manifest.json",
-            "stream": "/stream/{type}/{id}.json"
+            "stream": "/stream/{type}/{id}.json",
+            "stats": "/stats"
         }
     })
 
@@ -55,6 +100,24 @@ def manifest():
     """Stremio addon manifest"""
     return jsonify(MANIFEST)
 
+@app.route('/stats')
+def stats():
+    """Outbound HTTP counters (queue depth, in-flight, throttling, latency, hedge rate, breaker state per host)"""
+    return jsonify({
+        "hosts": rate_limiter.stats(),
+        "latency": hedging.stats(),
+        "breakers": circuit_breaker.stats(),
+        "dns": prewarm.resolver.stats(),
+        "singleflight": singleflight.group.stats(),
+        "extractors": fast_extract.stats(),
+        "stream_cache": stream_cache.stats(),
+        "resolved_urls": url_cache.stats(),
+        "prefetch": prefetcher.stats(),
+        "anilist": anilist_batcher.stats(),
+        "id_mapping": id_mapping.stats(),
+        "metadata": metadata_cache.stats()
+    })
+
 @app.route('/stream/<type>/<id>.json')
 def stream(type, id):
     """
@@ -71,152 +134,259 @@ def stream(type, id):
             return jsonify({"streams": []})
         
         imdb_id, season, episode = parts[0], int(parts[1]), int(parts[2])
+        key = f"{type}/{id}"
         
-        # Step 1: Get basic info from TMDB
-        tmdb_metadata = tmdb.get_anime_metadata(imdb_id, season, episode)
-        if not tmdb_metadata:
-            logger.warning(f"No TMDB metadata found for {imdb_id}")
-            return jsonify({"streams": []})
-        
-        tmdb_title = tmdb_metadata['title']
+        # Stale-while-revalidate: cached streams right away, refresh in the background if stale
+        cached = stream_cache.get(key)
+        if cached:
+            if not cached.is_fresh():
+                logger.info(f"Serving stale streams for {key}, refreshing")
+                async_engine.submit(refresh_streams(key, imdb_id, season, episode))
+            unique_streams = cached.streams
+        else:
+            # Real requests go first - drop background prefetches if hosts are queueing
+            async_engine.get_loop().call_soon_threadsafe(prefetcher.yield_to_foreground)
+            unique_streams = async_engine.run(refresh_streams(key, imdb_id, season, episode))
         
-        # Step 2: Search AniList with TMDB title to get romaji
-        anime_data = anilist.search_anime(tmdb_title)
+        schedule_prefetch(type, imdb_id, season, episode)
+        return jsonify({"streams": unique_streams})
         
-        if anime_data:
-            # Use AniList titles (more accurate for anime)
-            all_titles = anime_data['all_titles']
-            logger.info(f"AniList titles: {all_titles}")
-            
-            # IMPORTANT: Prioritize SHORT titles (Indonesian sites use short names)
-            # Sort by length: shorter titles first
-            all_titles_sorted = sorted([t for t in all_titles if t], key=lambda x: len(x))
-            
-            # Also try extracting short version from long titles
-            # e.g., "Maou Gakuin no Futekigousha: Shijou..." → "Maou Gakuin"
-            short_versions = []
-            for title in all_titles_sorted:
-                # Extract before colon/subtitle
-                if ':' in title:
-                    short_versions.append(title.split(':')[0].strip())
-                # Extract first keywords (first 2-3 words for romaji)
-                if any(c.isalpha() and ord(c) < 128 for c in title):  # Latin alphabet
-                    words = title.split()
-                    if len(words) >= 2:
-                        short_versions.append(' '.join(words[:3]))  # First 3 words
-            
-            # Combine: short titles first, then originals
-            all_titles = short_versions + all_titles_sorted
-            
-            # Remove duplicates while preserving order
-            seen = set()
-            all_titles = [t for t in all_titles if t and t not in seen and not seen.add(t)]
-            
-            logger.info(f"Prioritized titles (short first): {all_titles[:5]}...")  # Show first 5
-        else:
-            # Fallback to TMDB if AniList fails
-            all_titles = tmdb_metadata.get('all_titles', [tmdb_title])
-            logger.warning(f"AniList failed, using TMDB titles: {all_titles}")
+    except Exception as e:
+        logger.error(f"Stream error: {e}", exc_info=True)
+        return jsonify({"streams": []})
+
+def schedule_prefetch(type, imdb_id, season, episode):
+    """Warm the caches for the next episode (and the one after when binge watching)"""
+    show = (imdb_id, season)
+    now = time.monotonic()
+    last = recent_episodes.pop(show, None)
+    binge = last is not None and last[0] == episode - 1 and now - last[1] < BINGE_WINDOW
+    
+    recent_episodes[show] = (episode, now)
+    if len(recent_episodes) > MAX_TRACKED_SHOWS:
+        recent_episodes.popitem(last=False)
+    
+    ahead = 2 if binge else 1
+    async_engine.submit(prefetch_episodes(type, imdb_id, season, range(episode + 1, episode + 1 + ahead)))
+
+async def prefetch_episodes(type, imdb_id, season, episodes):
+    """Low-priority lookups for upcoming episodes (skipped if cached or hosts are busy)"""
+    for next_episode in episodes:
+        key = f"{type}/{imdb_id}:{season}:{next_episode}"
+        if await storage.run(stream_cache.is_fresh, key):
+            continue
+        if prefetcher.schedule(key, refresh_streams, key, imdb_id, season, next_episode):
+            logger.info(f"Prefetching {key}")
+
+async def refresh_streams(key, imdb_id, season, episode):
+    """Look up streams for one episode within STREAM_DEADLINE and store them in the stream cache"""
+    with deadline.scope(STREAM_DEADLINE):
+        # Identical concurrent requests (and refreshes) share one lookup - whether
+        # it finished is up to the run that did the work, not this caller's deadline
+        streams, complete = await singleflight.group.do(('stream', imdb_id, season, episode), find_streams, imdb_id, season, episode)
+    
+    await storage.run(stream_cache.store, key, streams, complete)
+    return streams
+
+async def find_streams(imdb_id, season, episode):
+    """
+    Full TMDB → AniList → provider lookup for one episode (partial results at the deadline)
+    
+    Returns:
+        (ranked streams, complete) - complete is False if this run was cut short
+    """
+    streams = []
+    task = asyncio.ensure_future(collect_streams(imdb_id, season, episode, streams))
+    
+    try:
+        done, _ = await asyncio.wait({task}, timeout=deadline.remaining())
+    except asyncio.CancelledError:
+        # Every waiter gave up (e.g. a prefetch yielding to real requests) - stop the scrapes too
+        task.cancel()
+        raise
+    if not done:
+        task.cancel()
+        # Let the lookup hand over what it has so far
+        await asyncio.gather(task, return_exceptions=True)
+        logger.warning(f"Deadline reached, returning partial results ({len(streams)} streams)")
+    
+    # Providers also give up at the deadline and hand over partial results
+    complete = bool(done) and not deadline.expired()
+    return rank_streams(streams), complete
+
+async def collect_streams(imdb_id, season, episode, streams):
+    """Append streams for one episode to the given list as providers answer"""
+    try:
+        all_titles = await lookup_titles(imdb_id, season, episode)
+        if not all_titles:
+            return
         
         logger.info(f"Searching for S{season:02d}E{episode:02d} with {len(all_titles)} title variations")
         
         # Parallel scraping for SPEED!
         # Using ONLY fast & reliable providers: Sokuja + Torrents
-        streams = []
+        # All promising title variants at once instead of one after another
+        await scrape_variants(title_variants(all_titles), season, episode, streams, tuple(all_titles))
         
-        # Try each title variation
-        for title in all_titles:
-            if not title:
-                continue
-                
-            logger.info(f"Trying title: {title}")
-            
-            # Scrape FAST providers in PARALLEL
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                futures = {
-                    executor.submit(get_sokuja_streams, title, season, episode): "Sokuja",
-                    executor.submit(get_nyaa_streams, title, season, episode): "Torrents"
-                }
-                
-                # Process results as they complete
-                try:
-                    for future in as_completed(futures, timeout=10):  # 10s sufficient for 2 providers
-                        provider = futures[future]
-                        try:
-                            results = future.result(timeout=5)  # 5s per provider
-                            if results:
-                                logger.info(f"  └─ {provider}: {len(results)} streams")
-                                streams.extend(results)
-                        except Exception as e:
-                            logger.warning(f"  └─ {provider}: error - {type(e).__name__}")
-                except TimeoutError:
-                    logger.warning(f"  └─ Timeout, using partial results ({len(streams)} streams)")
-            
-            # If we found streams with this title, stop trying other titles
-            if streams:
-                logger.info(f"Found {len(streams)} streams with title: {title}")
-                break
+    except Exception as e:
+        logger.error(f"Stream lookup error: {e}", exc_info=True)
+
+async def lookup_titles(imdb_id, season, episode):
+    """Search titles for a show: local ID mapping first, then TMDB → AniList"""
+    # Step 0: Local ID mapping - popular shows need no TMDB / AniList round-trip
+    mapped = await storage.run(id_mapping.by_imdb, imdb_id, season)
+    if mapped and mapped.titles:
+        logger.info(f"ID mapping: {imdb_id} → AniList {mapped.anilist_id}")
+        return prioritize_titles(mapped.titles)
+    
+    if mapped:
+        # Known AniList entry - exact ID lookup instead of a title search
+        anime_data = await anilist.get_by_id_async(mapped.anilist_id)
+        if anime_data:
+            await storage.run(id_mapping.learn, imdb_id, anime_data, mapped.season)
+            return prioritize_titles(anime_data['all_titles'])
+    
+    # Step 1: Get basic info from TMDB (the mapping may already know the TMDB ID)
+    tmdb_id = str(mapped.tmdb_id) if mapped and mapped.tmdb_id else imdb_id
+    tmdb_metadata = await tmdb.get_anime_metadata_async(tmdb_id, season, episode)
+    if not tmdb_metadata:
+        logger.warning(f"No TMDB metadata found for {imdb_id}")
+        return []
+    
+    tmdb_title = tmdb_metadata['title']
+    
+    # Step 2: Search AniList with TMDB title to get romaji
+    anime_data = await anilist.search_anime_async(tmdb_title)
+    
+    if anime_data:
+        await storage.run(id_mapping.learn, imdb_id, anime_data)
+        return prioritize_titles(anime_data['all_titles'])
+    
+    # Fallback to TMDB if AniList fails
+    all_titles = tmdb_metadata.get('all_titles', [tmdb_title])
+    logger.warning(f"AniList failed, using TMDB titles: {all_titles}")
+    return all_titles
+
+def prioritize_titles(all_titles):
+    """AniList titles with short versions first (Indonesian sites use short names)"""
+    # Use AniList titles (more accurate for anime)
+    logger.info(f"AniList titles: {all_titles}")
+    
+    # IMPORTANT: Prioritize SHORT titles (Indonesian sites use short names)
+    # Sort by length: shorter titles first
+    all_titles_sorted = sorted([t for t in all_titles if t], key=lambda x: len(x))
+    
+    # Also try extracting short version from long titles
+    # e.g., "Maou Gakuin no Futekigousha: Shijou..." → "Maou Gakuin"
+    short_versions = []
+    for title in all_titles_sorted:
+        # Extract before colon/subtitle
+        if ':' in title:
+            short_versions.append(title.split(':')[0].strip())
+        # Extract first keywords (first 2-3 words for romaji)
+        if any(c.isalpha() and ord(c) < 128 for c in title):  # Latin alphabet
+            words = title.split()
+            if len(words) >= 2:
+                short_versions.append(' '.join(words[:3]))  # First 3 words
+    
+    # Combine: short titles first, then originals
+    all_titles = short_versions + all_titles_sorted
+    
+    # Remove duplicates while preserving order
+    seen = set()
+    all_titles = [t for t in all_titles if t and t not in seen and not seen.add(t)]
+    
+    logger.info(f"Prioritized titles (short first): {all_titles[:5]}...")  # Show first 5
+    return all_titles
+
+def title_variants(titles, limit=MAX_TITLE_VARIANTS):
+    """Most promising title variants: Latin-script titles first (sites don't index kanji/kana), order kept otherwise"""
+    def is_latin(title):
+        return any(c.isalpha() and ord(c) < 128 for c in title)
+    
+    return sorted((t for t in titles if t), key=lambda t: not is_latin(t))[:limit]
+
+async def scrape_variants(titles, season, episode, streams, known_titles=()):
+    """
+    Scrape several title variants concurrently, keeping one variant's streams
+    
+    The first variant to finish with GOOD_ENOUGH_STREAMS cancels the others.
+    Otherwise the highest-priority variant with any streams wins once all
+    have answered (or the lookup is cancelled at the deadline).
+    """
+    found = {title: [] for title in titles}
+    tasks = {}
+    for title in titles:
+        logger.info(f"Trying title: {title}")
+        tasks[asyncio.ensure_future(scrape_title(title, season, episode, found[title], known_titles))] = title
+    
+    winner = None
+    pending = set(tasks)
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if len(found[tasks[task]]) >= GOOD_ENOUGH_STREAMS:
+                    winner = tasks[task]
+                    break
+        if pending:
+            logger.info(f"  └─ {len(pending)} slower title variants cancelled")
+    finally:
+        for task in pending:
+            task.cancel()
         
-        # Remove duplicates (same server/resolution combo)
-        seen = set()
-        unique_streams = []
-        for stream in streams:
-            key = stream.get('name', '')
-            if key not in seen:
-                seen.add(key)
-                unique_streams.append(stream)
+        if winner is None:
+            winner = next((title for title in titles if found[title]), None)
+        if winner is not None:
+            logger.info(f"Found {len(found[winner])} streams with title: {winner}")
+            streams.extend(found[winner])
+
+def rank_streams(streams):
+    """Remove duplicate streams and sort by reliability"""
+    # Remove duplicates (same server/resolution combo)
+    seen = set()
+    unique_streams = []
+    for stream in streams:
+        key = stream.get('name', '')
+        if key not in seen:
+            seen.add(key)
+            unique_streams.append(stream)
+    
+    # Prioritize reliable sources (direct streams first, embeds last)
+    def stream_priority(stream):
+        name = stream.get('name', '').lower()
+        description = stream.get('description', '').lower()
         
-        # Prioritize reliable sources (direct streams first, embeds last)
-        def stream_priority(stream):
-            name = stream.get('name', '').lower()
-            description = stream.get('description', '').lower()
-            
-            # Priority 1: Torrents (most reliable)
-            if 'torrent' in name or 'infoHash' in stream:
-                return 0
-            
-            # Priority 2: Direct streams (Sokuja, stream_ready)
-            if 'sokuja' in name or stream.get('url'):
-                return 1
-            
-            # Priority 3: External/Browser (Mega, Dood, etc - less reliable)
-            if stream.get('externalUrl'):
-                return 2
-            
-            return 3  # Unknown
+        # Priority 1: Torrents (most reliable)
+        if 'torrent' in name or 'infoHash' in stream:
+            return 0
         
-        unique_streams.sort(key=stream_priority)
+        # Priority 2: Direct streams (Sokuja, stream_ready)
+        if 'sokuja' in name or stream.get('url'):
+            return 1
         
-        logger.info(f"Total unique streams: {len(unique_streams)} (sorted by reliability)")
-        return jsonify({"streams": unique_streams})
+        # Priority 3: External/Browser (Mega, Dood, etc - less reliable)
+        if stream.get('externalUrl'):
+            return 2
         
-    except Exception as e:
-        logger.error(f"Stream error: {e}", exc_info=True)
-        return jsonify({"streams": []})
+        return 3  # Unknown
+    
+    unique_streams.sort(key=stream_priority)
+    
+    logger.info(f"Total unique streams: {len(unique_streams)} (sorted by reliability)")
+    return unique_streams
 
-@lru_cache(maxsize=100)
-def get_samehadaku_streams(title, season, episode):
+def get_samehadaku_streams(title, season, episode, known_titles=()):
     """Get streams from Samehadaku"""
+    return async_engine.run(get_samehadaku_streams_async(title, season, episode, known_titles))
+
+@singleflight.coalesce
+async def get_samehadaku_streams_async(title, season, episode, known_titles=()):
+    """Async version of get_samehadaku_streams()"""
     streams = []
     try:
-        # Search anime
-        results = samehadaku_scraper.search_anime(title)
-        if not results:
-            return streams
-        
-        # Match season/episode
-        anime = match_season(results, season)
-        if not anime:
-            return streams
-        
-        # Get episodes
-        episodes = samehadaku_scraper.get_anime_episodes(anime['url'])
-        ep_data = match_episode(episodes, episode)
-        if not ep_data:
-            return streams
-        
-        # Get video links
-        links = samehadaku_scraper.get_all_video_links(ep_data['url'])
+        # Search -> season -> episode -> video links
+        links = await stream_engine.find_episode_links_async('samehadaku', title, season, episode, known_titles)
         
         for link in links:
             # ONLY direct playable streams (no browser embeds)
@@ -231,8 +401,7 @@ def get_samehadaku_streams(title, season, episode):
             # Samehadaku might have ajax: prefix URLs
             if url.startswith('ajax:'):
                 try:
-                    from scrapers.samehadaku_scraper import get_streaming_url
-                    resolved_url = get_streaming_url(url)
+                    resolved_url = await stream_engine.resolve_async(url)
                     if not resolved_url:
                         continue
                     url = resolved_url
@@ -252,25 +421,16 @@ def get_samehadaku_streams(title, season, episode):
     
     return streams
 
-@lru_cache(maxsize=100)
-def get_otakudesu_streams(title, season, episode):
+def get_otakudesu_streams(title, season, episode, known_titles=()):
     """Get streams from Otakudesu"""
+    return async_engine.run(get_otakudesu_streams_async(title, season, episode, known_titles))
+
+@singleflight.coalesce
+async def get_otakudesu_streams_async(title, season, episode, known_titles=()):
+    """Async version of get_otakudesu_streams()"""
     streams = []
     try:
-        results = otakudesu_scraper.search_anime(title)
-        if not results:
-            return streams
-        
-        anime = match_season(results, season)
-        if not anime:
-            return streams
-        
-        episodes = otakudesu_scraper.get_anime_episodes(anime['url'])
-        ep_data = match_episode(episodes, episode)
-        if not ep_data:
-            return streams
-        
-        links = otakudesu_scraper.get_video_links(ep_data['url'])
+        links = await stream_engine.find_episode_links_async('otakudesu', title, season, episode, known_titles)
         
         for link in links:
             # ONLY direct playable streams (no browser embeds)
@@ -284,7 +444,7 @@ def get_otakudesu_streams(title, season, episode):
             # Resolve special otakudesu URLs (AJAX)
             if url.startswith('otakudesu:'):
                 try:
-                    resolved_url = otakudesu_scraper.resolve_otakudesu_url(url)
+                    resolved_url = await stream_engine.resolve_async(url)
                     if not resolved_url:
                         continue  # Skip if resolution failed
                     url = resolved_url
@@ -304,25 +464,16 @@ def get_otakudesu_streams(title, season, episode):
     
     return streams
 
-@lru_cache(maxsize=100)
-def get_sokuja_streams(title, season, episode):
+def get_sokuja_streams(title, season, episode, known_titles=()):
     """Get streams from Sokuja"""
+    return async_engine.run(get_sokuja_streams_async(title, season, episode, known_titles))
+
+@singleflight.coalesce
+async def get_sokuja_streams_async(title, season, episode, known_titles=()):
+    """Async version of get_sokuja_streams()"""
     streams = []
     try:
-        results = sokuja_scraper.search_anime(title)
-        if not results:
-            return streams
-        
-        anime = match_season(results, season)
-        if not anime:
-            return streams
-        
-        episodes = sokuja_scraper.get_anime_episodes(anime['url'])
-        ep_data = match_episode(episodes, episode)
-        if not ep_data:
-            return streams
-        
-        links = sokuja_scraper.get_video_links(ep_data['url'])
+        links = await stream_engine.find_episode_links_async('sokuja', title, season, episode, known_titles)
         
         for link in links:
             stream = {
@@ -337,26 +488,42 @@ def get_sokuja_streams(title, season, episode):
     
     return streams
 
-@lru_cache(maxsize=100)
-def get_nyaa_streams(title, season, episode):
+def get_nyaa_streams(title, season, episode, known_titles=()):
     """Get torrents from Nyaa.si + AnimeTosho"""
+    return async_engine.run(get_nyaa_streams_async(title, season, episode, known_titles))
+
+@singleflight.coalesce
+async def get_nyaa_streams_async(title, season, episode, known_titles=()):
+    """Async version of get_nyaa_streams()"""
     streams = []
     try:
         # Search with episode number
         query = f"{title} {episode:02d}"
         
         # Get from both sources
-        nyaa_results = nyaa_scraper.search_anime(query)
-        animetosho_results = animetosho_scraper.search_anime(query, limit=10)
+        nyaa_results, animetosho_results = await asyncio.gather(
+            stream_engine.search_async('torrent', query),
+            stream_engine.search_async('animetosho', query)
+        )
         
-        # Combine and dedupe by info_hash
+        # Combine and dedupe by info_hash (other shows, other episodes and batches dropped)
         all_torrents = {}
+        skipped = 0
         for torrent in nyaa_results + animetosho_results:
+            release = release_parser.parse(torrent.get('title', ''))
+            if not release_parser.matches_episode(release, episode):
+                skipped += 1
+                continue
+            if release.title and not title_matcher.best_match([{'title': release.title}], [title, *known_titles]):
+                skipped += 1
+                continue
             info_hash = torrent.get('info_hash')
             if info_hash and torrent.get('seeders', 0) > 0:
                 # Keep the one with more seeders if duplicate
                 if info_hash not in all_torrents or torrent['seeders'] > all_torrents[info_hash]['seeders']:
                     all_torrents[info_hash] = torrent
+        if skipped:
+            logger.info(f"  └─ Torrents: {skipped} other-show/episode/batch releases skipped")
         
         # Sort by seeders
         sorted_torrents = sorted(all_torrents.values(), key=lambda x: x.get('seeders', 0), reverse=True)
@@ -385,58 +552,63 @@ def get_nyaa_streams(title, season, episode):
     
     return streams
 
+# Provider key -> Stremio streams for one title / season / episode
+STREAM_SOURCES = {
+    'samehadaku': get_samehadaku_streams_async,
+    'otakudesu': get_otakudesu_streams_async,
+    'sokuja': get_sokuja_streams_async,
+    'torrent': get_nyaa_streams_async,  # Nyaa + AnimeTosho
+}
+
+# Providers used for /stream: ONLY fast & reliable ones (Sokuja + Torrents)
+ADDON_PROVIDERS = ['sokuja', 'torrent']
+
+async def scrape_title(title, season, episode, streams, known_titles=()):
+    """
+    Scrape the fast providers for one title concurrently, appending to streams as each answers
+    
+    known_titles (all titles of the show) pick the right search result / torrents
+    """
+    # 10s sufficient for 2 providers (less if the request deadline is closer)
+    with deadline.scope(10):
+        tasks = {}
+        for provider in registry.by_cost(ADDON_PROVIDERS):
+            # Skip providers whose circuit breaker is open (site down)
+            if not circuit_breaker.is_available(provider.base_url):
+                logger.info(f"  └─ {provider.name}: circuit open, skipped")
+                continue
+            get_streams = STREAM_SOURCES[provider.key]
+            tasks[asyncio.ensure_future(get_streams(title, season, episode, known_titles))] = provider.name
+        
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=deadline.remaining(), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    logger.warning(f"  └─ Timeout, using partial results ({len(streams)} streams)")
+                    break
+                
+                for task in done:
+                    provider = tasks[task]
+                    try:
+                        results = task.result()
+                        if results:
+                            logger.info(f"  └─ {provider}: {len(results)} streams")
+                            streams.extend(results)
+                    except Exception as e:
+                        logger.warning(f"  └─ {provider}: error - {type(e).__name__}")
+        finally:
+            # Also runs when the whole lookup is cancelled at the deadline
+            for task in pending:
+                task.cancel()
+
 def extract_info_hash(magnet_url):
     """Extract info hash from magnet URI"""
-    if not magnet_url:
-        return None
-    
-    # Magnet format: magnet:?xt=urn:btih:HASH&...
-    match = re.search(r'btih:([a-fA-F0-9]{40})', magnet_url)
-    if match:
-        return match.group(1).lower()
-    
-    return None
-
-def match_season(results, season):
-    """Match anime by season number"""
-    if season == 1:
-        # First season usually doesn't have "Season" in title
-        for result in results:
-            title_lower = result['title'].lower()
-            if 'season 2' not in title_lower and 's2' not in title_lower:
-                return result
-    else:
-        # Look for "Season X" or "SX" in title
-        patterns = [
-            f"season {season}",
-            f"s{season}",
-            f"part {season}",
-            f"{season}st" if season == 1 else f"{season}nd" if season == 2 else f"{season}rd" if season == 3 else f"{season}th"
-        ]
-        for result in results:
-            title_lower = result['title'].lower()
-            if any(p in title_lower for p in patterns):
-                return result
-    
-    # Fallback: return first result
-    return results[0] if results else None
-
-def match_episode(episodes, episode_number):
-    """Match episode by number"""
-    for ep in episodes:
-        ep_num = ep.get('episode_number', '?')
-        # Try to convert to int
-        try:
-            if int(ep_num) == episode_number:
-                return ep
-        except:
-            # Try regex match from title
-            match = re.search(r'episode\s+(\d+)', ep.get('title', '').lower())
-            if match and int(match.group(1)) == episode_number:
-                return ep
-    
-    return None
+    return release_parser.info_hash(magnet_url)
 
 if __name__ == '__main__':
     # Development server
+    start_background_work()
     app.run(host='0.0.0.0', port=7000, debug=True)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Importing the addon must not start network work - the first request does"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SCRIPT = '''
+import asyncio
+import sys
+sys.path.insert(0, sys.argv[1])
+from utils import prewarm
+from utils.id_mapping import id_mapping
+
+calls = []
+prewarm.prewarm = lambda hosts=(): calls.append('prewarm')
+
+
+async def keep_fresh():
+    calls.append('keep_fresh')
+
+id_mapping.keep_fresh = keep_fresh
+
+import stremio_addon
+stremio_addon.async_engine.run(asyncio.sleep(0.1))
+assert calls == [], calls
+
+client = stremio_addon.app.test_client()
+client.get('/')
+client.get('/')
+stremio_addon.async_engine.run(asyncio.sleep(0.1))
+assert sorted(calls) == ['keep_fresh', 'prewarm'], calls
+'''
+
+
+def test_background_work_starts_on_first_request():
+    env = dict(os.environ, ANIME_TUI_CACHE_DIR=tempfile.mkdtemp(prefix='anime-tui-test-'))
+    result = subprocess.run([sys.executable, '-c', SCRIPT, ROOT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
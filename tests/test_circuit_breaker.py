@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Breaker checks on the event loop must not wait on the database"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from utils import circuit_breaker
+
+
+async def synced():
+    """Wait for this loop's background breaker reads / writes"""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*[t for t in circuit_breaker._sync_tasks if t.get_loop() is loop])
+
+
+class SlowDB:
+    """server_health stand-in that holds a lock for a while on every call"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.rows = {}
+        self.threads = set()
+
+    def get_breaker_state(self, name):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        return self.rows.get(name)
+
+    def save_breaker_state(self, name, status, failures, opened_at):
+        self.threads.add(threading.current_thread().name)
+        time.sleep(self.delay)
+        self.rows[name] = {'status': status, 'failures': failures, 'opened_at': opened_at}
+
+
+def test_checks_on_loop_do_not_block(monkeypatch):
+    db = SlowDB(0.2)
+    monkeypatch.setattr(circuit_breaker, 'db', db)
+    breaker = circuit_breaker.CircuitBreaker('slow.example.com', failure_threshold=2)
+
+    async def scenario():
+        start = time.monotonic()
+        assert breaker.allow()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert not breaker.allow()
+        assert time.monotonic() - start < 0.1
+
+        # Persisted in the background on the storage thread
+        await synced()
+
+    asyncio.run(scenario())
+    assert db.rows['slow.example.com']['status'] == 0
+    assert all(name.startswith('storage') for name in db.threads)
+
+
+def test_stale_read_does_not_undo_local_change(monkeypatch):
+    db = SlowDB(0.05)
+    db.rows['stale.example.com'] = {'status': 1, 'failures': 0, 'opened_at': 0}
+    monkeypatch.setattr(circuit_breaker, 'db', db)
+    breaker = circuit_breaker.CircuitBreaker('stale.example.com', failure_threshold=1)
+
+    async def scenario():
+        assert breaker.allow()        # Starts a background read of the closed state
+        breaker.record_failure()      # Opens before that read lands
+        await synced()
+        assert breaker.is_open
+
+    asyncio.run(scenario())
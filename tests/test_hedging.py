@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Hedges must be timed from the slot grant and stay off saturated hosts"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from utils import hedging, rate_limiter
+
+
+def warm_tracker(url, seconds=0.05):
+    """Enough fast samples that the hedge delay is MIN_DELAY"""
+    tracker = hedging.get_tracker(url)
+    for _ in range(hedging.MIN_SAMPLES):
+        tracker.record(seconds)
+    tracker.requests = 100
+    return tracker
+
+
+def fake_send(queued, answer, calls):
+    async def send(url, started=None):
+        calls.append(url)
+        await asyncio.sleep(queued)
+        if started is not None:
+            started.set()
+        await asyncio.sleep(answer)
+        return url
+
+    return send
+
+
+def test_queue_wait_does_not_trigger_hedge():
+    url = 'https://queued.example.com/page'
+    tracker = warm_tracker(url)
+    calls = []
+
+    # Queued well past the p90, then answers quickly
+    send = fake_send(hedging.MIN_DELAY * 2, 0.05, calls)
+    assert asyncio.run(hedging.hedged(send, url)) == url
+    assert calls == [url]
+    assert tracker.hedged == 0
+
+
+def test_no_hedge_while_host_has_waiters():
+    url = 'https://busy.example.com/page'
+    tracker = warm_tracker(url)
+    calls = []
+    governor = rate_limiter.get_governor(url)
+
+    send = fake_send(0, hedging.MIN_DELAY * 2, calls)
+    governor.waiting += 1
+    try:
+        assert asyncio.run(hedging.hedged(send, url)) == url
+    finally:
+        governor.waiting -= 1
+    assert calls == [url]
+    assert tracker.hedged == 0
+
+
+def test_slow_answer_is_hedged():
+    url = 'https://slow.example.com/page'
+    tracker = warm_tracker(url)
+    calls = []
+
+    send = fake_send(0, hedging.MIN_DELAY * 2, calls)
+    assert asyncio.run(hedging.hedged(send, url, mirror='https://mirror.example.com/page')) == url
+    assert calls == [url, 'https://mirror.example.com/page']
+    assert tracker.hedged == 1
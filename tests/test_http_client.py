@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Error responses must raise an error callers can format"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from utils import http_client
+
+
+def test_raise_for_status_error_formats():
+    response = http_client.Response(500, {}, 'https://example.com/page', b'')
+    with pytest.raises(http_client.HTTPError) as info:
+        response.raise_for_status()
+
+    assert info.value.status == 500
+    assert f"{info.value}" == "HTTP 500 for https://example.com/page"
+
+
+def test_raise_for_status_passes_success():
+    http_client.Response(200, {}, 'https://example.com/page', b'ok').raise_for_status()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""IMDb lookups must map series to the series entry, deterministically"""
+
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from utils import storage
+from utils.id_mapping import IdMapping, parse_dataset
+
+
+def test_null_season_rows_prefer_series_then_lowest_id():
+    mapping = IdMapping('test_id_mapping_types.db')
+    mapping.import_rows(parse_dataset([
+        # Movie and OVA share the show's IMDb id, listed (and lower-numbered) first
+        {'anilist_id': 100, 'imdb_id': 'tt0000100', 'type': 'MOVIE'},
+        {'anilist_id': 150, 'imdb_id': 'tt0000100', 'type': 'OVA'},
+        {'anilist_id': 400, 'imdb_id': 'tt0000100', 'type': 'ONA'},
+        {'anilist_id': 200, 'imdb_id': 'tt0000100', 'type': 'TV'},
+    ]))
+
+    assert mapping.by_imdb('tt0000100', 1).anilist_id == 200
+    assert mapping.by_imdb('tt0000100').anilist_id == 200
+
+
+def test_only_non_series_entries_is_a_miss():
+    mapping = IdMapping('test_id_mapping_movies.db')
+    mapping.import_rows(parse_dataset([
+        {'anilist_id': 500, 'imdb_id': 'tt0000500', 'type': 'MOVIE'},
+        {'anilist_id': 501, 'imdb_id': 'tt0000500', 'type': 'SPECIAL'},
+    ]))
+    assert mapping.by_imdb('tt0000500', 1) is None
+
+
+def test_old_table_gets_type_column_and_reimport():
+    conn = storage.connect('test_id_mapping_old.db')
+    with conn:
+        conn.execute('CREATE TABLE ids (anilist_id INTEGER PRIMARY KEY, mal_id INTEGER, imdb_id TEXT, '
+                     'tmdb_id INTEGER, season INTEGER, titles TEXT)')
+        conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute("INSERT INTO meta VALUES ('refreshed_at', '1'), ('etag', 'abc')")
+    conn.close()
+
+    mapping = IdMapping('test_id_mapping_old.db')
+    assert mapping.enabled
+    assert mapping._meta('refreshed_at') is None and mapping._meta('etag') is None
+    assert mapping.import_rows(parse_dataset([{'anilist_id': 1, 'imdb_id': 'tt1', 'type': 'TV'}]))
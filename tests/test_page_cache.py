@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Pages carrying direct media URLs must not outlive those URLs"""
+
+import asyncio
+import base64
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from scrapers import sokuja_scraper
+from utils import http_client, page_cache, url_cache
+
+VIDEO_URL = 'https://storages.sokuja.id/video/episode-1-720p.mp4'
+EPISODE_PAGE = (
+    '<html><body><select name="mirror">'
+    '<option value="">Pilih Server</option>'
+    '<option value="{}">SOKUJA 720p</option>'
+    '</select></body></html>'
+).format(base64.b64encode(f'<video><source src="{VIDEO_URL}" type="video/mp4"></video>'.encode()).decode())
+
+
+def test_sokuja_episode_page_expires_with_its_direct_urls(monkeypatch):
+    async def dispatch(method, url, hedge=False, mirror=None, **kwargs):
+        return http_client.Response(200, {}, url, EPISODE_PAGE.encode())
+
+    monkeypatch.setattr(http_client, '_dispatch', dispatch)
+    episode_url = 'https://x.sokuja.example/episode-1/'
+    links = asyncio.run(sokuja_scraper.get_video_links_async(episode_url))
+    assert [link['url'] for link in links] == [VIDEO_URL]
+
+    key = http_client._cache_key(episode_url, None, stop_at=sokuja_scraper.MIRROR_SELECT_END)
+    entry = page_cache.page_cache.get(key)
+    ttl = page_cache.URL_CLASS_TTL.get(entry.url_class, page_cache.DEFAULT_TTL)
+    assert ttl <= url_cache.url_expiry(VIDEO_URL, now=0)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Prefetches yielding to foreground requests must stop their scrapes"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the addon's caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+import stremio_addon
+from utils import prefetch
+
+
+def test_yield_to_foreground_cancels_scrape(monkeypatch):
+    started = []
+    cancelled = []
+
+    async def slow_collect(imdb_id, season, episode, streams):
+        started.append(episode)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(episode)
+            raise
+
+    monkeypatch.setattr(stremio_addon, 'collect_streams', slow_collect)
+    busy = [False]
+    monkeypatch.setattr(prefetch, 'under_load', lambda: busy[0])
+
+    async def scenario():
+        prefetcher = prefetch.Prefetcher()
+        key = 'series/tt0000001:1:2'
+        assert prefetcher.schedule(key, stremio_addon.refresh_streams, key, 'tt0000001', 1, 2)
+        await asyncio.sleep(0.01)
+        assert started == [2]
+
+        busy[0] = True
+        assert prefetcher.yield_to_foreground() == 1
+        await asyncio.sleep(0.01)
+
+        assert cancelled == [2]
+        assert prefetcher.stats()['cancelled'] == 1
+        assert not stremio_addon.stream_cache.is_fresh(key)
+
+    asyncio.run(scenario())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Streams cut short by the deadline must not be cached as fresh"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the addon's caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+import stremio_addon
+
+
+def test_late_joiner_does_not_mark_partial_result_fresh(monkeypatch):
+    async def slow_collect(imdb_id, season, episode, streams):
+        streams.append({'name': 'Sokuja', 'title': '720p', 'url': 'https://example.com/720.mp4'})
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(stremio_addon, 'collect_streams', slow_collect)
+    key = 'series/tt0000002:1:1'
+
+    async def scenario():
+        monkeypatch.setattr(stremio_addon, 'STREAM_DEADLINE', 0.1)
+        first = asyncio.ensure_future(stremio_addon.refresh_streams(key, 'tt0000002', 1, 1))
+        await asyncio.sleep(0.05)
+
+        # Joins the same lookup with plenty of time left on its own deadline
+        monkeypatch.setattr(stremio_addon, 'STREAM_DEADLINE', 10)
+        late = await stremio_addon.refresh_streams(key, 'tt0000002', 1, 1)
+        assert await first == late
+        assert len(late) == 1
+
+    asyncio.run(scenario())
+
+    cached = stremio_addon.stream_cache.get(key)
+    assert cached is not None and cached.streams
+    assert not cached.is_fresh()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Early return in scrape_variants must cancel the losing provider scrapes"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the addon's caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+import stremio_addon
+from utils import circuit_breaker, singleflight
+
+GOOD = 'Good Title'
+SLOW = 'Slow Title'
+
+
+def test_losing_variants_are_cancelled(monkeypatch):
+    cancelled = []
+
+    def fake_provider(name):
+        async def get_streams(title, season, episode, known_titles=()):
+            if title == GOOD:
+                # Answer once the slow scrapes are underway
+                await asyncio.sleep(0.05)
+                return [{'name': name, 'url': f'https://example.com/{name}/{n}'} for n in range(3)]
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append((name, title))
+                raise
+            return []
+        # Coalesce key: one per provider, like the real ones
+        get_streams.__qualname__ = f'fake_{name}'
+        return singleflight.coalesce(get_streams)
+
+    monkeypatch.setattr(circuit_breaker, 'is_available', lambda url: True)
+    monkeypatch.setattr(stremio_addon, 'STREAM_SOURCES', {
+        key: fake_provider(key) for key in stremio_addon.ADDON_PROVIDERS
+    })
+
+    async def scenario():
+        streams = []
+        await asyncio.wait_for(stremio_addon.scrape_variants([SLOW, GOOD], 1, 1, streams), 2)
+        # Let the cancellations reach the coalesced scrapes (checked before
+        # asyncio.run tears down whatever is still running)
+        await asyncio.sleep(0.01)
+
+        assert len(streams) == 3 * len(stremio_addon.ADDON_PROVIDERS)
+        assert sorted(cancelled) == sorted((key, SLOW) for key in stremio_addon.ADDON_PROVIDERS)
+        assert singleflight.group.stats()['in_flight'] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Singleflight cancellation: abandoned lookups must stop, shared ones must not"""
+
+import asyncio
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import singleflight
+
+
+async def _slow_lookup(started, cancelled):
+    started.set()
+    try:
+        await asyncio.sleep(10)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+    return 'done'
+
+
+def test_cancelling_only_caller_cancels_lookup():
+    async def scenario():
+        group = singleflight.Group()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        caller = asyncio.ensure_future(group.do('key', _slow_lookup, started, cancelled))
+        await started.wait()
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        assert group.stats()['in_flight'] == 0
+        assert group.stats()['abandoned'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_lookup_survives_while_a_caller_waits():
+    async def scenario():
+        group = singleflight.Group()
+        started = asyncio.Event()
+
+        async def quick_lookup():
+            started.set()
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        first = asyncio.ensure_future(group.do('key', quick_lookup))
+        second = asyncio.ensure_future(group.do('key', quick_lookup))
+        await started.wait()
+        first.cancel()
+
+        assert await second == 'done'
+        assert group.stats()['coalesced'] == 1
+        assert group.stats()['abandoned'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_new_caller_after_abandon_starts_fresh():
+    async def scenario():
+        group = singleflight.Group()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        caller = asyncio.ensure_future(group.do('key', _slow_lookup, started, cancelled))
+        await started.wait()
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+        async def answer():
+            return 'fresh'
+
+        assert await group.do('key', answer) == 'fresh'
+
+    asyncio.run(scenario())
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""TMDB / scraper lookups must return None on HTTP errors, not raise"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from scrapers import samehadaku_scraper
+from utils import http_client
+from utils.tmdb_helper import TMDBHelper
+
+
+@pytest.fixture(params=[401, 429, 500, 503])
+def failing_aget(request, monkeypatch):
+    async def aget(url, **kwargs):
+        return http_client.Response(request.param, {}, url, b'{}')
+
+    monkeypatch.setattr(http_client, 'aget', aget)
+    return request.param
+
+
+def test_metadata_is_none_on_http_error(failing_aget):
+    helper = TMDBHelper()
+    assert asyncio.run(helper.get_anime_metadata_async(f'tt9{failing_aget}0001', 1, 1)) is None
+    assert asyncio.run(helper.get_anime_metadata_async(f'9{failing_aget}0001', 1, 1)) is None
+
+
+def test_samehadaku_video_is_none_on_http_error(failing_aget):
+    url = f'https://samehadaku.example/episode-{failing_aget}/'
+    assert asyncio.run(samehadaku_scraper.get_samehadaku_video_async(url)) is None
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Degraded or deadline-cut resolver results must not be cached"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the caches out of the real cache directory
+os.environ.setdefault('ANIME_TUI_CACHE_DIR', tempfile.mkdtemp(prefix='anime-tui-test-'))
+
+from utils import deadline
+from utils.url_cache import cached_resolver, fallback, url_cache
+
+
+@cached_resolver('test.direct')
+async def resolve_direct(url):
+    return 'https://cdn.example.com/video.mp4'
+
+
+@cached_resolver('test.fallback')
+async def resolve_fallback(url):
+    return fallback(url)
+
+
+@cached_resolver('test.nested')
+async def resolve_nested(url):
+    # Hands on whatever the inner resolver gave, fallback or not
+    return await resolve_fallback(url)
+
+
+@cached_resolver('test.slow')
+async def resolve_slow(url):
+    await asyncio.sleep(0.05)
+    return 'https://cdn.example.com/slow.mp4'
+
+
+def test_direct_result_is_cached():
+    assert asyncio.run(resolve_direct('https://embed.example.com/1')) == 'https://cdn.example.com/video.mp4'
+    assert url_cache.get('test.direct:https://embed.example.com/1') is not None
+
+
+def test_fallback_is_returned_but_not_cached():
+    url = 'https://embed.example.com/2'
+    assert asyncio.run(resolve_fallback(url)) == url
+    assert url_cache.get(f'test.fallback:{url}') is None
+
+
+def test_fallback_is_not_cached_by_enclosing_resolver():
+    url = 'https://embed.example.com/3'
+    assert asyncio.run(resolve_nested(url)) == url
+    assert url_cache.get(f'test.nested:{url}') is None
+
+
+def test_result_after_deadline_is_not_cached():
+    async def scenario():
+        with deadline.scope(0.01):
+            return await resolve_slow('https://embed.example.com/4')
+
+    assert asyncio.run(scenario()) == 'https://cdn.example.com/slow.mp4'
+    assert url_cache.get('test.slow:https://embed.example.com/4') is None
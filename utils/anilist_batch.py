@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+AniList Batch Client
+Collects Media lookups (by title, MAL id or AniList id) for a short window
+and sends them as one aliased GraphQL query. The per-minute quota from the
+X-RateLimit-* headers is fed back into the rate limiter so bulk lookups
+(season pre-warm, many IDs) stay under AniList's limit.
+"""
+
+import asyncio
+import logging
+
+from utils import http_client, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://graphql.anilist.co"
+
+# Seconds to wait for more lookups before sending a batch while another one
+# is in flight (when idle, a batch goes out on the next loop iteration - a
+# lone lookup isn't delayed, lookups queued together still share a request)
+BATCH_WINDOW = 0.05
+
+# Media selections per request (AniList rejects very complex queries)
+MAX_BATCH = 10
+
+# Start slowing down when this many requests are left in the quota window
+LOW_QUOTA = 5
+
+# AniList counts its quota per minute
+QUOTA_WINDOW = 60
+
+# Lookup kind -> (Media argument, GraphQL variable type)
+LOOKUPS = {
+    'search': ('search', 'String'),
+    'mal': ('idMal', 'Int'),
+    'id': ('id', 'Int'),
+}
+
+MEDIA_FRAGMENT = '''
+fragment media on Media {
+    id
+    idMal
+    title {
+        romaji
+        english
+        native
+    }
+    synonyms
+    episodes
+    status
+    coverImage {
+        large
+    }
+    description
+    format
+    season
+    seasonYear
+    averageScore
+    genres
+    studios {
+        nodes {
+            name
+        }
+    }
+}
+'''
+
+
+def build_query(lookups):
+    """
+    Aliased query for a list of (kind, value) lookups
+
+    Returns:
+        (query, variables) - lookup i is answered by alias q{i}
+    """
+    params = []
+    selections = []
+    variables = {}
+    for i, (kind, value) in enumerate(lookups):
+        arg, var_type = LOOKUPS[kind]
+        params.append(f"$v{i}: {var_type}")
+        selections.append(f"q{i}: Media({arg}: $v{i}, type: ANIME) {{ ...media }}")
+        variables[f"v{i}"] = value if var_type == 'String' else int(value)
+
+    query = f"query ({', '.join(params)}) {{\n    " + '\n    '.join(selections) + "\n}\n" + MEDIA_FRAGMENT
+    return query, variables
+
+
+class AniListError(Exception):
+    """Batch request failed (no data in the response)"""
+
+
+class AniListBatcher:
+    def __init__(self, url=API_URL, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.url = url
+        self.window = window
+        self.max_batch = max_batch
+
+        # (kind, value) -> futures waiting for it (duplicates share one selection)
+        self._pending = {}
+        self._timer = None
+        self._in_flight = 0
+
+        # Quota from the last response headers
+        self.limit = None
+        self.remaining = None
+
+        # Counters
+        self.lookups = 0
+        self.requests = 0
+        self.throttled = 0
+
+    async def lookup(self, kind, value):
+        """
+        Queue one lookup and wait for its batch
+
+        Args:
+            kind: 'search' (title), 'mal' (MyAnimeList id) or 'id' (AniList id)
+            value: Title or id
+
+        Returns:
+            Raw Media dict or None if AniList has no match
+
+        Raises:
+            AniListError (or the HTTP error) if the batch request failed
+        """
+        if kind not in LOOKUPS:
+            raise ValueError(f"Unknown AniList lookup: {kind}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault((kind, value), []).append(future)
+        self.lookups += 1
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            if self._in_flight:
+                self._timer = loop.call_later(self.window, self._flush)
+            else:
+                self._timer = loop.call_soon(self._flush)
+
+        return await future
+
+    async def lookup_many(self, kind, values):
+        """Look up many values at once (sent as a few batches) - returns results in order"""
+        return await asyncio.gather(*(self.lookup(kind, v) for v in values))
+
+    def _flush(self):
+        """Send everything pending as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+        asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch, retry=True):
+        lookups = list(batch)
+        query, variables = build_query(lookups)
+        results = {}
+        error = None
+        self._in_flight += 1
+        try:
+            self.requests += 1
+            response = await http_client.apost(
+                self.url,
+                json={'query': query, 'variables': variables},
+                timeout=10
+            )
+            self._track_quota(response)
+
+            if response.status_code == 429 and retry:
+                # http_client already paused the host for Retry-After - queue behind it once
+                self.throttled += 1
+                await self._send(batch, retry=False)
+                return
+
+            # Missing media come back as null aliases with a "Not Found" error (HTTP 404)
+            data = response.json() if response.content else {}
+            answers = data.get('data')
+            if not answers:
+                raise AniListError(f"HTTP {response.status_code}: {data.get('errors')}")
+            for i, lookup in enumerate(lookups):
+                results[lookup] = answers.get(f"q{i}")
+
+        except Exception as e:
+            logger.error(f"AniList batch error: {e}")
+            error = e
+
+        finally:
+            self._in_flight -= 1
+            for lookup, futures in batch.items():
+                for future in futures:
+                    if future.done():
+                        continue
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(results.get(lookup))
+
+    def _track_quota(self, response):
+        """Follow X-RateLimit-Limit / -Remaining so we slow down before hitting 429s"""
+        try:
+            limit = int(response.headers.get('X-RateLimit-Limit'))
+            remaining = int(response.headers.get('X-RateLimit-Remaining'))
+        except (TypeError, ValueError):
+            return
+        if limit <= 0:
+            return
+        self.limit = limit
+        self.remaining = remaining
+
+        # AniList lowers the limit when it is degraded (90 -> 30 req/min)
+        governor = rate_limiter.get_governor(self.url)
+        governor.set_rate(limit / QUOTA_WINDOW)
+
+        if remaining <= LOW_QUOTA:
+            # Leave time for the window to give back what we're short of
+            governor.backoff(QUOTA_WINDOW / limit * (LOW_QUOTA + 1 - remaining))
+
+    def stats(self):
+        return {
+            'lookups': self.lookups,
+            'requests': self.requests,
+            'pending': sum(len(f) for f in self._pending.values()),
+            'throttled': self.throttled,
+            'quota_limit': self.limit,
+            'quota_remaining': self.remaining,
+        }
+
+
+# Shared batcher for every AniList lookup
+batcher = AniListBatcher()
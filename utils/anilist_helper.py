@@ -4,17 +4,21 @@ Provides accurate Romaji titles for Indonesian anime sites
 FREE - No API key required!
 """
 
-import requests
+from utils import async_engine
+from utils.anilist_batch import batcher
+from utils.metadata_cache import cached
+import asyncio
 import logging
-from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Seconds AniList entries are kept in the metadata cache
+ANILIST_TTL = 7 * 24 * 60 * 60
+
 class AniListHelper:
     def __init__(self):
         self.api_url = "https://graphql.anilist.co"
     
-    @lru_cache(maxsize=200)
     def search_anime(self, title):
         """
         Search anime by title on AniList
@@ -27,69 +31,16 @@ class AniListHelper:
             'episodes': 13
         }
         """
-        query = '''
-        query ($search: String) {
-            Media(search: $search, type: ANIME) {
-                id
-                idMal
-                title {
-                    romaji
-                    english
-                    native
-                }
-                episodes
-                season
-                seasonYear
-                synonyms
-            }
-        }
-        '''
-        
-        variables = {'search': title}
-        
+        return async_engine.run(self.search_anime_async(title))
+    
+    async def search_anime_async(self, title):
+        """Async version of search_anime() - batched with other lookups"""
         try:
-            response = requests.post(
-                self.api_url,
-                json={'query': query, 'variables': variables},
-                timeout=10
-            )
-            
-            if response.status_code != 200:
-                logger.warning(f"AniList API error: {response.status_code}")
-                return None
-            
-            data = response.json()
-            
-            if 'errors' in data:
-                logger.warning(f"AniList GraphQL error: {data['errors']}")
-                return None
-            
-            media = data.get('data', {}).get('Media')
+            media = await self._lookup('search', title)
             if not media:
                 return None
             
-            titles = media.get('title', {})
-            
-            result = {
-                'id': media.get('id'),
-                'mal_id': media.get('idMal'),
-                'title_romaji': titles.get('romaji', ''),
-                'title_english': titles.get('english', ''),
-                'title_native': titles.get('native', ''),
-                'synonyms': media.get('synonyms', []),
-                'episodes': media.get('episodes'),
-                'season_year': media.get('seasonYear'),
-                # Collect all possible titles for searching
-                'all_titles': [
-                    titles.get('romaji'),
-                    titles.get('english'),
-                    titles.get('native')
-                ] + media.get('synonyms', [])
-            }
-            
-            # Remove None/empty values
-            result['all_titles'] = [t for t in result['all_titles'] if t]
-            
+            result = self._to_result(media)
             logger.info(f"AniList found: {result['title_romaji']} (ID: {result['id']})")
             
             return result
@@ -98,56 +49,71 @@ class AniListHelper:
             logger.error(f"AniList search error: {e}")
             return None
     
-    @lru_cache(maxsize=200)
     def get_by_mal_id(self, mal_id):
         """Get anime by MyAnimeList ID"""
-        query = '''
-        query ($malId: Int) {
-            Media(idMal: $malId, type: ANIME) {
-                id
-                title {
-                    romaji
-                    english
-                    native
-                }
-                synonyms
-            }
-        }
-        '''
-        
-        variables = {'malId': int(mal_id)}
-        
+        return async_engine.run(self.get_by_mal_id_async(mal_id))
+    
+    async def get_by_mal_id_async(self, mal_id):
+        """Async version of get_by_mal_id() - batched with other lookups"""
         try:
-            response = requests.post(
-                self.api_url,
-                json={'query': query, 'variables': variables},
-                timeout=10
-            )
-            
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            media = data.get('data', {}).get('Media')
-            
-            if not media:
-                return None
-            
-            titles = media.get('title', {})
-            
-            return {
-                'id': media.get('id'),
-                'title_romaji': titles.get('romaji', ''),
-                'title_english': titles.get('english', ''),
-                'title_native': titles.get('native', ''),
-                'synonyms': media.get('synonyms', []),
-                'all_titles': [
-                    titles.get('romaji'),
-                    titles.get('english'),
-                    titles.get('native')
-                ] + media.get('synonyms', [])
-            }
+            media = await self._lookup('mal', int(mal_id))
+            return self._to_result(media) if media else None
         
         except Exception as e:
             logger.error(f"AniList MAL lookup error: {e}")
             return None
+    
+    def get_by_id(self, anilist_id):
+        """Get anime by AniList ID"""
+        return async_engine.run(self.get_by_id_async(anilist_id))
+    
+    async def get_by_id_async(self, anilist_id):
+        """Async version of get_by_id() - batched with other lookups"""
+        try:
+            media = await self._lookup('id', int(anilist_id))
+            return self._to_result(media) if media else None
+        
+        except Exception as e:
+            logger.error(f"AniList ID lookup error: {e}")
+            return None
+    
+    def get_many_by_mal_id(self, mal_ids):
+        """Look up many MAL IDs in a few batched requests - returns {mal_id: result or None}"""
+        return async_engine.run(self.get_many_by_mal_id_async(mal_ids))
+    
+    async def get_many_by_mal_id_async(self, mal_ids):
+        """Async version of get_many_by_mal_id()"""
+        mal_ids = list(mal_ids)
+        results = await asyncio.gather(*(self.get_by_mal_id_async(m) for m in mal_ids))
+        return dict(zip(mal_ids, results))
+    
+    @cached('anilist.media', ANILIST_TTL)
+    async def _lookup(self, kind, value):
+        """Raw Media for a batched lookup, shared by all processes (errors raise and aren't cached)"""
+        return await batcher.lookup(kind, value)
+    
+    def _to_result(self, media):
+        titles = media.get('title') or {}
+        synonyms = media.get('synonyms') or []
+        
+        result = {
+            'id': media.get('id'),
+            'mal_id': media.get('idMal'),
+            'title_romaji': titles.get('romaji', ''),
+            'title_english': titles.get('english', ''),
+            'title_native': titles.get('native', ''),
+            'synonyms': synonyms,
+            'episodes': media.get('episodes'),
+            'season_year': media.get('seasonYear'),
+            # Collect all possible titles for searching
+            'all_titles': [
+                titles.get('romaji'),
+                titles.get('english'),
+                titles.get('native')
+            ] + synonyms
+        }
+        
+        # Remove None/empty values
+        result['all_titles'] = [t for t in result['all_titles'] if t]
+        
+        return result
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Async Engine
+One background event loop shared by every scraper, resolver and front-end
+Sync code submits coroutines with run(); async code just awaits them
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import concurrent.futures
+from collections import OrderedDict
+
+from utils import deadline
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_loop():
+    """Get the engine loop (started in a daemon thread on first use)"""
+    global _loop, _thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                _thread = threading.Thread(target=_run_loop, args=(loop,), name='async-engine', daemon=True)
+                _thread.start()
+                _loop = loop
+    return _loop
+
+
+def in_engine_thread():
+    """True if the caller is running on the engine loop itself"""
+    return _thread is not None and threading.current_thread() is _thread
+
+
+async def _in_context(context, coro):
+    # Carry the caller's context variables (e.g. request deadline) into the task
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+def submit(coro):
+    """Schedule a coroutine on the engine loop, returns a concurrent Future"""
+    context = contextvars.copy_context()
+    return asyncio.run_coroutine_threadsafe(_in_context(context, coro), get_loop())
+
+
+def run(coro, timeout=None):
+    """
+    Run a coroutine on the engine loop and wait for its result
+
+    Args:
+        coro: Coroutine to run
+        timeout: Max seconds to wait (the coroutine is cancelled after that)
+
+    Returns:
+        The coroutine result
+    """
+    if in_engine_thread():
+        coro.close()
+        raise RuntimeError("async_engine.run() called from the engine loop - await the coroutine instead")
+
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def async_lru_cache(maxsize=128):
+    """
+    lru_cache for coroutine functions running on the engine loop
+    Caches the awaited result (not the coroutine), keyed by positional args
+    """
+    def decorator(func):
+        cache = OrderedDict()
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            if args in cache:
+                cache.move_to_end(args)
+                return cache[args]
+
+            result = await func(*args)
+
+            # Work cut short by the request deadline may be incomplete
+            if deadline.expired():
+                return result
+
+            cache[args] = result
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker
+Per-host breaker for providers and embed hosts. Opens after N consecutive
+failures/timeouts so requests fail instantly instead of waiting out the
+timeout, then lets a single half-open probe through after a cooldown.
+State lives in the server_health table so the TUI, web app and addon share it.
+Checks only read the in-memory state; on the event loop the table is read and
+written in the background on the storage thread, so a locked database never
+holds up a request.
+"""
+
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+from utils import storage
+
+logger = logging.getLogger(__name__)
+
+try:
+    from utils.database import db
+except Exception as e:
+    # No writable config dir (serverless) - keep state in memory only
+    logger.warning(f"Circuit breaker state not persisted: {e}")
+    db = None
+
+# Consecutive failures before the breaker opens
+FAILURE_THRESHOLD = 5
+
+# Seconds an open breaker waits before letting a probe through
+RESET_TIMEOUT = 60
+
+# Re-read shared state from the database at most this often
+SYNC_INTERVAL = 2
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+# Background reads / writes in flight (the loop only keeps weak references to tasks)
+_sync_tasks = set()
+
+
+def _spawn(coro):
+    """Run a coroutine in the background if there is a running loop (False if not)"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        coro.close()
+        return False
+    task = loop.create_task(coro)
+    _sync_tasks.add(task)
+    task.add_done_callback(_sync_tasks.discard)
+    return True
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose breaker is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or RESET_TIMEOUT
+
+        self.failures = 0
+        self.opened_at = 0.0
+        self.is_open = False
+        self.probing = False
+        self.rejected = 0
+        self._synced_at = 0.0
+        self._version = 0
+
+    def _load(self):
+        """Pick up state written by other processes (in the background on the event loop)"""
+        now = time.monotonic()
+        if db is None or now - self._synced_at < SYNC_INTERVAL:
+            return
+        self._synced_at = now
+        if not _spawn(self._load_async(self._version)):
+            self._apply(self._read())
+
+    async def _load_async(self, version):
+        state = await storage.run(self._read)
+        # Local changes made while reading are newer than what was read
+        if version == self._version:
+            self._apply(state)
+
+    def _read(self):
+        try:
+            return db.get_breaker_state(self.name)
+        except Exception as e:
+            logger.warning(f"Circuit breaker read error: {e}")
+            return None
+
+    def _apply(self, state):
+        if state:
+            self.is_open = state['status'] == 0
+            self.failures = state['failures']
+            self.opened_at = state['opened_at']
+
+    def _save(self):
+        """Persist the state (fire-and-forget on the storage thread on the event loop)"""
+        self._synced_at = time.monotonic()
+        self._version += 1
+        if db is None:
+            return
+        args = (0 if self.is_open else 1, self.failures, self.opened_at)
+        if not _spawn(storage.run(self._write, *args)):
+            self._write(*args)
+
+    def _write(self, status, failures, opened_at):
+        try:
+            db.save_breaker_state(self.name, status, failures, opened_at)
+        except Exception as e:
+            logger.warning(f"Circuit breaker write error: {e}")
+
+    @property
+    def state(self):
+        if not self.is_open:
+            return CLOSED
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def allow(self):
+        """Check if a request may be sent (claims the probe when half-open)"""
+        self._load()
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Give back the half-open probe without a verdict (request cancelled)"""
+        self.probing = False
+
+    def record_success(self):
+        self.probing = False
+        if self.is_open or self.failures:
+            if self.is_open:
+                logger.info(f"Circuit closed: {self.name}")
+            self.is_open = False
+            self.failures = 0
+            self.opened_at = 0.0
+            self._save()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            if not self.is_open:
+                logger.warning(f"Circuit opened: {self.name} ({self.failures} failures)")
+            self.is_open = True
+            self.opened_at = time.time()
+        self.probing = False
+        self._save()
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'rejected': self.rejected,
+        }
+
+
+_breakers = {}
+
+
+def get_breaker(url_or_host):
+    """Get the breaker for a URL or host (created on first use)"""
+    host = urlparse(url_or_host).hostname if '://' in url_or_host else url_or_host
+    host = (host or '').lower()
+    if host not in _breakers:
+        _breakers[host] = CircuitBreaker(host)
+    return _breakers[host]
+
+
+def is_available(url_or_host):
+    """Check if a provider/embed host is worth trying (breaker not open)"""
+    breaker = get_breaker(url_or_host)
+    breaker._load()
+    return breaker.state != OPEN
+
+
+def stats():
+    """Breaker state for every host seen so far"""
+    return {host: breaker.stats() for host, breaker in sorted(_breakers.items())}
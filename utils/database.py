@@ -9,6 +9,10 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+# Seconds circuit breaker reads / writes wait for another process's write
+# lock - breaker sync is best effort, a busy database just skips a round
+BREAKER_TIMEOUT = 0.25
+
 class DatabaseManager:
     def __init__(self):
         # Database path: ~/.config/anime-tui/history.db
@@ -60,14 +64,26 @@ class DatabaseManager:
         ''')
         
         # Server health cache table
+        # (also circuit breaker state: failures = consecutive failures,
+        # opened_at = unix time the breaker opened)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS server_health (
                 server_url TEXT PRIMARY KEY,
                 status INTEGER DEFAULT 1,
-                last_checked DATETIME DEFAULT CURRENT_TIMESTAMP
+                last_checked DATETIME DEFAULT CURRENT_TIMESTAMP,
+                failures INTEGER DEFAULT 0,
+                opened_at REAL DEFAULT 0
             )
         ''')
         
+        # Migrate older databases
+        cursor.execute('PRAGMA table_info(server_health)')
+        columns = [r[1] for r in cursor.fetchall()]
+        if 'failures' not in columns:
+            cursor.execute('ALTER TABLE server_health ADD COLUMN failures INTEGER DEFAULT 0')
+        if 'opened_at' not in columns:
+            cursor.execute('ALTER TABLE server_health ADD COLUMN opened_at REAL DEFAULT 0')
+        
         conn.commit()
         conn.close()
     
@@ -283,6 +299,34 @@ class DatabaseManager:
         if result:
             return bool(result[0])
         return None
+    
+    def get_breaker_state(self, server_url):
+        """Get circuit breaker state (None if never recorded)"""
+        conn = sqlite3.connect(self.db_path, timeout=BREAKER_TIMEOUT)
+        try:
+            result = conn.execute('''
+                SELECT status, failures, opened_at
+                FROM server_health
+                WHERE server_url = ?
+            ''', (server_url,)).fetchone()
+        finally:
+            conn.close()
+        
+        if result:
+            return {'status': result[0], 'failures': result[1] or 0, 'opened_at': result[2] or 0}
+        return None
+    
+    def save_breaker_state(self, server_url, status, failures, opened_at):
+        """Save circuit breaker state (status 1=closed/online, 0=open/offline)"""
+        conn = sqlite3.connect(self.db_path, timeout=BREAKER_TIMEOUT)
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO server_health (server_url, status, last_checked, failures, opened_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?)
+                ''', (server_url, status, failures, opened_at))
+        finally:
+            conn.close()
 
 # Global instance
 db = DatabaseManager()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Request Deadlines
+A per-request time budget carried in a ContextVar, so every HTTP call,
+scraper and resolver below an endpoint can size its timeout from what's
+left instead of its own fixed timeout
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work is started after the request budget ran out"""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def __repr__(self):
+        return f"Deadline({self.remaining():.2f}s left of {self.seconds}s)"
+
+
+def current():
+    """Get the active deadline (None if the caller has no budget)"""
+    return _current.get()
+
+
+def remaining(default=None):
+    """Seconds left in the active deadline, or default if there is none"""
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    return deadline.remaining()
+
+
+def expired():
+    """True if there is an active deadline and it has run out"""
+    deadline = _current.get()
+    return deadline is not None and deadline.expired()
+
+
+def cap(timeout):
+    """Limit a timeout (seconds, or None for no limit) to the remaining budget"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if timeout is None:
+        return left
+    return min(timeout, left)
+
+
+def check():
+    """Raise DeadlineExceeded if the active deadline has run out"""
+    if expired():
+        raise DeadlineExceeded(f"Deadline of {current().seconds}s exceeded")
+
+
+@contextmanager
+def scope(seconds):
+    """
+    Run a block with a time budget (nested scopes never extend an outer one)
+
+    Args:
+        seconds: Budget for the block
+    """
+    deadline = Deadline(seconds)
+    outer = _current.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -4,12 +4,40 @@ Embed URL Resolvers - Extract direct video URLs from embed pages
 Complex scraping to get direct MP4 URLs for MPV playback
 """
 
-import requests
+from utils import http_client, async_engine, circuit_breaker, deadline
+from utils.url_cache import cached_resolver
 import re
 import json
+import asyncio
 from bs4 import BeautifulSoup
 import time
 
+# Redirect targets in safelink pages
+JS_REDIRECT_PATTERNS = [
+    re.compile(r'window\.location\s*=\s*["\']([^"\']+)["\']'),
+    re.compile(r'location\.href\s*=\s*["\']([^"\']+)["\']'),
+    re.compile(r'window\.location\.replace\(["\']([^"\']+)["\']\)'),
+]
+
+# Video URLs in Krakenfiles scripts
+KRAKEN_JS_PATTERNS = [
+    re.compile(r'"(https://[^"]+\.mp4[^"]*)"'),
+    re.compile(r"'(https://[^']+\.mp4[^']*)'"),
+    re.compile(r'url:\s*["\']([^"\']+)["\']'),
+    re.compile(r'file:\s*["\']([^"\']+)["\']'),
+]
+
+# Vidhide player setup
+VIDHIDE_OBJECT = re.compile(r'b\s+o\s*=\s*\{([^}]+)\}')
+VIDHIDE_PAIR = re.compile(r'"([^"]+)"\s*:\s*"([^"]+)"')
+VIDHIDE_SOURCES = re.compile(r'sources\s*:\s*\[([^\]]+)\]')
+VIDHIDE_FILE = re.compile(r'file\s*:\s*["\']([^"\']+)["\']')
+VIDHIDE_VIDEO_PATTERNS = [
+    re.compile(r'(https?://[^"\']+\.m3u8[^"\']*)'),
+    re.compile(r'(https?://[^"\']+\.mp4[^"\']*)'),
+    re.compile(r'file["\':\s]+["\']([^"\']+)["\']'),
+]
+
 def get_headers():
     return {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -20,6 +48,127 @@ def get_headers():
         "Upgrade-Insecure-Requests": "1"
     }
 
+# ==================== PARSERS ====================
+
+def parse_safelink_page(html):
+    """Find the destination URL in a safelink page (meta refresh, JS redirect or link)"""
+    soup = BeautifulSoup(html, 'lxml')
+    
+    # Look for meta refresh
+    meta_refresh = soup.find('meta', attrs={'http-equiv': 'refresh'})
+    if meta_refresh and meta_refresh.get('content'):
+        content = meta_refresh['content']
+        # Format: "0;URL=http://example.com"
+        match = re.search(r'url=([^"\']+)', content, re.I)
+        if match:
+            return match.group(1)
+    
+    # Look for JavaScript redirect
+    for script in soup.find_all('script'):
+        if script.string:
+            for pattern in JS_REDIRECT_PATTERNS:
+                match = pattern.search(script.string)
+                if match:
+                    return match.group(1)
+    
+    # Look for direct link in page (skip internal links)
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if href.startswith('http') and 'desustream' not in href:
+            return href
+    return None
+
+
+def parse_krakenfiles_page(html):
+    """Find the video URL in a Krakenfiles embed page"""
+    soup = BeautifulSoup(html, 'lxml')
+    
+    # Method 1: Look for video tag with source
+    video_tag = soup.find('video')
+    if video_tag:
+        source = video_tag.find('source')
+        if source and source.get('src'):
+            video_url = source['src']
+            if not video_url.startswith('http'):
+                video_url = 'https:' + video_url if video_url.startswith('//') else 'https://krakenfiles.com' + video_url
+            return video_url
+    
+    # Method 2: Look for download button/link
+    for link in soup.find_all('a', href=True):
+        href = link.get('href', '')
+        text = link.get_text(strip=True).lower()
+        
+        # Look for download-related links
+        if 'download' in text or 'download' in href:
+            if href.startswith('http') and ('.mp4' in href or 'krakenfiles' in href):
+                return href
+    
+    # Method 3: Look in JavaScript for file URL
+    for script in soup.find_all('script'):
+        if script.string:
+            for pattern in KRAKEN_JS_PATTERNS:
+                for match in pattern.findall(script.string):
+                    if 'kraken' in match.lower() or '.mp4' in match.lower():
+                        return match
+    return None
+
+
+def parse_vidhide_page(html):
+    """Extract the m3u8/mp4 URL from a Vidhide embed page's obfuscated JavaScript"""
+    # Method 1: Look for obfuscated object with video sources
+    # Pattern: b o={"1k":"url1","1l":"url2","1t":"url3"};
+    obj_match = VIDHIDE_OBJECT.search(html)
+    if obj_match:
+        # Extract all URLs from the object
+        url_pairs = VIDHIDE_PAIR.findall(obj_match.group(1))
+        
+        # Look for URLs (they might be obfuscated but still contain :// or start with /)
+        for key, value in url_pairs:
+            if '://' in value or value.startswith('/'):
+                # Prefer URLs with .m3u8 or .mp4 extensions (even if obfuscated like .82 or .fg)
+                if '.82' in value or '.m3u8' in value or 'm3u8' in value:
+                    return value
+                elif '.fg' in value or '.mp4' in value or 'mp4' in value:
+                    return value
+        
+        # If no specific format found, return first URL-like value
+        for key, value in url_pairs:
+            if '://' in value:
+                return value
+    
+    # Method 2: Look for sources array in jwplayer setup
+    sources_match = VIDHIDE_SOURCES.search(html)
+    if sources_match:
+        file_match = VIDHIDE_FILE.search(sources_match.group(1))
+        if file_match:
+            return file_match.group(1)
+    
+    # Method 3: Direct pattern matching for video URLs
+    for pattern in VIDHIDE_VIDEO_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_yourupload_page(html):
+    """og:video URL of a YourUpload embed page"""
+    soup = BeautifulSoup(html, 'lxml')
+    og_video = soup.find('meta', property='og:video')
+    if og_video and og_video.get('content'):
+        return og_video['content']
+    return None
+
+
+def parse_desudrive_page(html):
+    """iframe src of a DesuDrive wrapper page (usually the real host)"""
+    soup = BeautifulSoup(html, 'lxml')
+    iframe = soup.find('iframe')
+    if iframe and iframe.get('src'):
+        return iframe['src']
+    return None
+
+
 def unwrap_safelink(safelink_url):
     """
     Unwrap desustream.com/safelink URLs to get actual destination
@@ -30,11 +179,16 @@ def unwrap_safelink(safelink_url):
     Returns:
         Actual destination URL or None if failed
     """
+    return async_engine.run(unwrap_safelink_async(safelink_url))
+
+
+async def unwrap_safelink_async(safelink_url):
+    """Async version of unwrap_safelink()"""
     try:
         print(f"  [safelink] Unwrapping...")
         
         # Fetch the safelink page
-        resp = requests.get(safelink_url, headers=get_headers(), timeout=10, allow_redirects=True)
+        resp = await http_client.aget(safelink_url, headers=get_headers(), timeout=10, allow_redirects=True, hedge=True)
         
         # Method 1: Check if we were redirected
         if resp.url != safelink_url:
@@ -42,45 +196,10 @@ def unwrap_safelink(safelink_url):
             return resp.url
         
         # Method 2: Parse HTML for redirect URL
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        # Look for meta refresh
-        meta_refresh = soup.find('meta', attrs={'http-equiv': 'refresh'})
-        if meta_refresh and meta_refresh.get('content'):
-            content = meta_refresh['content']
-            # Format: "0;URL=http://example.com"
-            match = re.search(r'url=([^"\']+)', content, re.I)
-            if match:
-                url = match.group(1)
-                print(f"  [safelink] Found in meta refresh: {url[:80]}...")
-                return url
-        
-        # Look for JavaScript redirect
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string:
-                # Look for window.location patterns
-                patterns = [
-                    r'window\.location\s*=\s*["\']([^"\']+)["\']',
-                    r'location\.href\s*=\s*["\']([^"\']+)["\']',
-                    r'window\.location\.replace\(["\']([^"\']+)["\']\)',
-                ]
-                for pattern in patterns:
-                    match = re.search(pattern, script.string)
-                    if match:
-                        url = match.group(1)
-                        print(f"  [safelink] Found in JS: {url[:80]}...")
-                        return url
-        
-        # Look for direct link in page
-        links = soup.find_all('a', href=True)
-        for link in links:
-            href = link['href']
-            text = link.get_text(strip=True).lower()
-            # Skip internal links
-            if href.startswith('http') and 'desustream' not in href:
-                print(f"  [safelink] Found link: {href[:80]}...")
-                return href
+        url = parse_safelink_page(resp.text)
+        if url:
+            print(f"  [safelink] Found: {url[:80]}...")
+            return url
         
         print(f"  [safelink] ⚠️  Could not unwrap")
         return None
@@ -163,59 +282,29 @@ def resolve_mega(embed_url):
         
     return None
 
+async def resolve_mega_async(embed_url):
+    """Async version of resolve_mega() - mega.py is blocking, run it in a worker thread"""
+    return await asyncio.to_thread(resolve_mega, embed_url)
+
 def resolve_krakenfiles(embed_url):
     """
     Resolve Krakenfiles embed URL to direct stream
     Complex scraping to find the actual video file
     """
+    return async_engine.run(resolve_krakenfiles_async(embed_url))
+
+
+async def resolve_krakenfiles_async(embed_url):
+    """Async version of resolve_krakenfiles()"""
     try:
         print(f"  [krakenfiles] Fetching embed page...")
         
         # First, get the embed page
-        resp = requests.get(embed_url, headers=get_headers(), allow_redirects=True)
-        soup = BeautifulSoup(resp.text, 'html.parser')
-        
-        # Method 1: Look for video tag with source
-        video_tag = soup.find('video')
-        if video_tag:
-            source = video_tag.find('source')
-            if source and source.get('src'):
-                video_url = source['src']
-                if not video_url.startswith('http'):
-                    video_url = 'https:' + video_url if video_url.startswith('//') else 'https://krakenfiles.com' + video_url
-                print(f"  [krakenfiles] Found video source: {video_url}")
-                return video_url
-        
-        # Method 2: Look for download button/link
-        download_links = soup.find_all('a', href=True)
-        for link in download_links:
-            href = link.get('href', '')
-            text = link.get_text(strip=True).lower()
-            
-            # Look for download-related links
-            if 'download' in text or 'download' in href:
-                if href.startswith('http') and ('.mp4' in href or 'krakenfiles' in href):
-                    print(f"  [krakenfiles] Found download link: {href}")
-                    return href
-        
-        # Method 3: Look in JavaScript for file URL
-        scripts = soup.find_all('script')
-        for script in scripts:
-            if script.string:
-                # Look for video URL patterns
-                patterns = [
-                    r'"(https://[^"]+\.mp4[^"]*)"',
-                    r"'(https://[^']+\.mp4[^']*)'",
-                    r'url:\s*["\']([^"\']+)["\']',
-                    r'file:\s*["\']([^"\']+)["\']',
-                ]
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, script.string)
-                    for match in matches:
-                        if 'kraken' in match.lower() or '.mp4' in match.lower():
-                            print(f"  [krakenfiles] Found in JS: {match}")
-                            return match
+        resp = await http_client.aget(embed_url, headers=get_headers(), allow_redirects=True, hedge=True)
+        video_url = parse_krakenfiles_page(resp.text)
+        if video_url:
+            print(f"  [krakenfiles] Found video URL: {video_url}")
+            return video_url
         
         # Method 4: Try to find the actual file page
         # Krakenfiles embed might redirect to file page
@@ -268,68 +357,22 @@ def resolve_vidhide(embed_url):
     Resolve Vidhide/odvidhide embed URL to direct stream
     Extracts m3u8 or mp4 URL from obfuscated JavaScript
     """
+    return async_engine.run(resolve_vidhide_async(embed_url))
+
+
+async def resolve_vidhide_async(embed_url):
+    """Async version of resolve_vidhide()"""
     try:
         print(f"  [vidhide] Fetching embed page...")
         
         headers = get_headers()
         headers['Referer'] = 'https://v1.samehadaku.how/'
         
-        resp = requests.get(embed_url, headers=headers, timeout=10)
-        html = resp.text
-        
-        # Method 1: Look for obfuscated object with video sources
-        # Pattern: b o={"1k":"url1","1l":"url2","1t":"url3"};
-        obj_pattern = r'b\s+o\s*=\s*\{([^}]+)\}'
-        obj_match = re.search(obj_pattern, html)
-        
-        if obj_match:
-            obj_content = obj_match.group(1)
-            # Extract all URLs from the object
-            url_pairs = re.findall(r'"([^"]+)"\s*:\s*"([^"]+)"', obj_content)
-            
-            # Look for URLs (they might be obfuscated but still contain :// or start with /)
-            for key, value in url_pairs:
-                # Check if it looks like a URL
-                if '://' in value or value.startswith('/'):
-                    # Prefer URLs with .m3u8 or .mp4 extensions (even if obfuscated like .82 or .fg)
-                    if '.82' in value or '.m3u8' in value or 'm3u8' in value:
-                        print(f"  [vidhide] Found m3u8 URL (key={key}): {value[:80]}...")
-                        return value
-                    elif '.fg' in value or '.mp4' in value or 'mp4' in value:
-                        print(f"  [vidhide] Found mp4 URL (key={key}): {value[:80]}...")
-                        return value
-            
-            # If no specific format found, return first URL-like value
-            for key, value in url_pairs:
-                if '://' in value:
-                    print(f"  [vidhide] Found URL (key={key}): {value[:80]}...")
-                    return value
-        
-        # Method 2: Look for sources array in jwplayer setup
-        sources_pattern = r'sources\s*:\s*\[([^\]]+)\]'
-        sources_match = re.search(sources_pattern, html)
-        if sources_match:
-            sources_str = sources_match.group(1)
-            # Extract file URL
-            file_match = re.search(r'file\s*:\s*["\']([^"\']+)["\']', sources_str)
-            if file_match:
-                video_url = file_match.group(1)
-                print(f"  [vidhide] Found in sources: {video_url[:80]}...")
-                return video_url
-        
-        # Method 3: Direct pattern matching for video URLs
-        video_patterns = [
-            r'(https?://[^"\']+\.m3u8[^"\']*)',
-            r'(https?://[^"\']+\.mp4[^"\']*)',
-            r'file["\':\s]+["\']([^"\']+)["\']',
-        ]
-        
-        for pattern in video_patterns:
-            matches = re.findall(pattern, html)
-            if matches:
-                video_url = matches[0]
-                print(f"  [vidhide] Found with pattern: {video_url[:80]}...")
-                return video_url
+        resp = await http_client.aget(embed_url, headers=headers, timeout=10, hedge=True)
+        video_url = parse_vidhide_page(resp.text)
+        if video_url:
+            print(f"  [vidhide] Found video URL: {video_url[:80]}...")
+            return video_url
         
         print(f"  [vidhide] ⚠️  Could not find video URL")
         return None
@@ -343,19 +386,30 @@ def resolve_embed_url(url, server_name=""):
     Main resolver - detect server type and resolve to direct URL
     Returns direct MP4 URL that can be played with MPV
     """
+    return async_engine.run(resolve_embed_url_async(url, server_name))
+
+
+@cached_resolver('embed')
+async def resolve_embed_url_async(url, server_name=""):
+    """Async version of resolve_embed_url()"""
     url_lower = url.lower()
     server_lower = server_name.lower()
     
     print(f"\n🔍 Resolving: {server_name}")
     print(f"   URL: {url[:80]}...")
     
+    # Embed host known to be down - skip instead of waiting for the timeout
+    if '://' in url and not circuit_breaker.is_available(url):
+        print(f"  [breaker] Host down, skipping")
+        return None
+    
     # DesuDrive (Otakudesu wrapper) - Check FIRST because server name might be "YourUpload"
     if 'desudrive' in url_lower:
-        return resolve_desudrive(url)
+        return await resolve_desudrive_async(url)
 
     # Vidhide
     if 'vidhide' in url_lower or 'vidhide' in server_lower:
-        return resolve_vidhide(url)
+        return await resolve_vidhide_async(url)
     
     # Pixeldrain
     elif 'pixeldrain' in url_lower or 'pdrain' in server_lower:
@@ -363,11 +417,11 @@ def resolve_embed_url(url, server_name=""):
     
     # Mega
     elif 'mega.nz' in url_lower or 'mega' in server_lower:
-        return resolve_mega(url)
+        return await resolve_mega_async(url)
     
     # Krakenfiles
     elif 'krakenfiles' in url_lower or 'kraken' in server_lower:
-        return resolve_krakenfiles(url)
+        return await resolve_krakenfiles_async(url)
     
     # Streamwish
     elif 'streamwish' in url_lower or 'streamwish' in server_lower:
@@ -379,7 +433,7 @@ def resolve_embed_url(url, server_name=""):
         
     # YourUpload
     elif 'yourupload' in url_lower or 'yourupload' in server_lower:
-        return resolve_yourupload(url)
+        return await resolve_yourupload_async(url)
     
     # Dood.to (not supported by yt-dlp, return None to trigger browser)
     elif 'dood.' in url_lower or 'dood' in server_lower:
@@ -395,20 +449,34 @@ def resolve_yourupload(embed_url):
     """
     Resolve YourUpload embed URL to direct stream using yt-dlp
     """
+    return async_engine.run(resolve_yourupload_async(embed_url))
+
+
+async def resolve_yourupload_async(embed_url):
+    """Async version of resolve_yourupload()"""
     try:
         print(f"  [yourupload] Resolving with yt-dlp...")
-        import subprocess
         
         # Use yt-dlp to get direct URL
         cmd = ['yt-dlp', '-g', '-f', 'best', embed_url]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0 and result.stdout.strip():
-            direct_url = result.stdout.strip()
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            # yt-dlp has no timeout of its own - bound it by the request budget
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), deadline.cap(30))
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        stdout = stdout.decode(errors='replace')
+        
+        if proc.returncode == 0 and stdout.strip():
+            direct_url = stdout.strip()
             print(f"  [yourupload] Direct URL: {direct_url[:80]}...")
             return direct_url
         else:
-            print(f"  [yourupload] yt-dlp failed: {result.stderr}")
+            print(f"  [yourupload] yt-dlp failed: {stderr.decode(errors='replace')}")
             print(f"  [yourupload] Trying manual scraping...")
             
             # Manual scraping fallback
@@ -416,13 +484,11 @@ def resolve_yourupload(embed_url):
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
                 'Referer': 'https://www.yourupload.com/'
             }
-            resp = requests.get(embed_url, headers=headers, timeout=10)
-            soup = BeautifulSoup(resp.text, 'html.parser')
+            resp = await http_client.aget(embed_url, headers=headers, timeout=10, hedge=True)
             
             # Try og:video
-            og_video = soup.find('meta', property='og:video')
-            if og_video and og_video.get('content'):
-                direct_url = og_video['content']
+            direct_url = parse_yourupload_page(resp.text)
+            if direct_url:
                 print(f"  [yourupload] Found og:video: {direct_url[:80]}...")
                 
                 # Return dict with headers required for playback
@@ -446,23 +512,26 @@ def resolve_desudrive(embed_url):
     Resolve DesuDrive embed URL to direct stream
     Extracts iframe src which usually points to the real host (YourUpload, etc)
     """
+    return async_engine.run(resolve_desudrive_async(embed_url))
+
+
+async def resolve_desudrive_async(embed_url):
+    """Async version of resolve_desudrive()"""
     try:
         print(f"  [desudrive] Fetching embed page...")
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Referer': 'https://otakudesu.best/'
         }
-        resp = requests.get(embed_url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.text, 'html.parser')
+        resp = await http_client.aget(embed_url, headers=headers, timeout=10, hedge=True)
         
         # Look for iframe
-        iframe = soup.find('iframe')
-        if iframe and iframe.get('src'):
-            real_url = iframe['src']
+        real_url = parse_desudrive_page(resp.text)
+        if real_url:
             print(f"  [desudrive] Found iframe: {real_url}")
             
             # Recursively resolve the new URL
-            return resolve_embed_url(real_url, "Recursive")
+            return await resolve_embed_url_async(real_url, "Recursive")
             
         print(f"  [desudrive] ⚠️  Could not find iframe")
         return None
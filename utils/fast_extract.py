@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Fast-path Extractors
+Compiled regex extractors that run over the raw page for the hottest
+lookups (mirror dropdowns, AJAX action hashes, torrent rows, Blogger video
+URLs). An extractor returns None when its sanity checks fail and the
+caller's DOM parser runs instead; counters show how often each path is used.
+"""
+
+import html
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Attributes of a start tag: name="value" / name='value' / name=value
+ATTR = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+
+# Blogger video.g page: "play_url":"...videoplayback...","format_id":22
+BLOGGER_STREAM = re.compile(
+    r'"play_url"\s*:\s*"(https:[^"]+?googlevideo\.com/videoplayback[^"]+)"\s*,\s*"format_id"\s*:\s*(\d+)'
+)
+GOOGLEVIDEO_URL = re.compile(r'(https://[^"\']+googlevideo\.com/videoplayback[^"\']+)')
+
+_counters = {}
+
+
+def run(name, fast, slow, page):
+    """
+    Run a fast-path extractor, falling back to the DOM parser
+
+    Args:
+        name: Extractor name for the counters
+        fast: Regex extractor - returns None when its sanity checks fail
+        slow: DOM parser with the same result format
+        page: Raw page text
+
+    Returns:
+        Result of fast(page), or slow(page) if the fast path gave up
+    """
+    counter = _counters.setdefault(name, {'fast': 0, 'fallback': 0})
+    try:
+        result = fast(page)
+    except Exception as e:
+        logger.debug(f"Fast path {name} failed: {e}")
+        result = None
+
+    if result is not None:
+        counter['fast'] += 1
+        return result
+
+    counter['fallback'] += 1
+    return slow(page)
+
+
+def attrs(tag):
+    """Attributes of a start tag source as a dict (entities decoded)"""
+    return {
+        m.group(1).lower(): html.unescape(next(v for v in m.groups()[1:] if v is not None))
+        for m in ATTR.finditer(tag)
+    }
+
+
+def plain_text(fragment):
+    """Stripped text of a fragment, or None if it contains markup"""
+    if '<' in fragment:
+        return None
+    return html.unescape(fragment).strip()
+
+
+def unescape_js(url):
+    """Undo the \\u003d / \\u0026 escaping of URLs embedded in scripts"""
+    return url.replace('\\u003d', '=').replace('\\u0026', '&')
+
+
+def _blogger_streams(page):
+    streams = BLOGGER_STREAM.findall(page)
+    if not streams:
+        return None
+    # Highest format_id is the best quality (22 = 720p, 18 = 360p)
+    url, _ = max(streams, key=lambda s: int(s[1]))
+    url = unescape_js(url)
+    if '\\' in url or 'expire' not in url:
+        return None
+    return url
+
+
+def _blogger_any(page):
+    matches = GOOGLEVIDEO_URL.findall(page)
+    if not matches:
+        return None
+    # Get the longest URL (usually the full one)
+    return unescape_js(max(matches, key=len))
+
+
+def blogger_video_url(page):
+    """Direct googlevideo.com URL from a Blogger video.g page (None if absent)"""
+    return run('blogger.video', _blogger_streams, _blogger_any, page)
+
+
+def stats():
+    """Fast / fallback counts and fast-path hit rate per extractor"""
+    result = {}
+    for name, counter in sorted(_counters.items()):
+        total = counter['fast'] + counter['fallback']
+        result[name] = dict(counter, fast_rate=round(counter['fast'] / total, 3) if total else 0.0)
+    return result
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Hedged Requests
+Per-host latency tracking and a hedge helper: if a request hasn't answered
+within the host's observed p90 latency, fire a duplicate (or a request to an
+alternate mirror) and use whichever answers first. The wait starts once the
+rate limiter has let the request out, and no hedge is sent while requests to
+the host are queued (it would only queue behind them).
+"""
+
+import asyncio
+from collections import deque
+from urllib.parse import urlparse
+
+from utils import rate_limiter
+
+# Latency samples kept per host
+WINDOW = 100
+
+# Don't hedge until a host has this many samples (p90 is noise before that)
+MIN_SAMPLES = 20
+
+# Never hedge sooner than this, even for very fast hosts
+MIN_DELAY = 0.25
+
+# Hedges may add at most this fraction of extra requests per host
+MAX_HEDGE_RATE = 0.1
+
+
+class LatencyTracker:
+    """Recent latencies and hedge counters for one host"""
+
+    def __init__(self, host):
+        self.host = host
+        self.samples = deque(maxlen=WINDOW)
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, pct):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None if hedging isn't allowed now"""
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        if self.hedged >= self.requests * MAX_HEDGE_RATE:
+            return None
+        return max(MIN_DELAY, self.percentile(90))
+
+    def stats(self):
+        p50 = self.percentile(50)
+        p90 = self.percentile(90)
+        return {
+            'samples': len(self.samples),
+            'p50_ms': round(p50 * 1000) if p50 is not None else None,
+            'p90_ms': round(p90 * 1000) if p90 is not None else None,
+            'requests': self.requests,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'hedge_rate': round(self.hedged / self.requests, 3) if self.requests else 0.0,
+        }
+
+
+_trackers = {}
+
+
+def get_tracker(url):
+    """Get the latency tracker for a URL's host (created on first use)"""
+    host = (urlparse(url).hostname or '').lower()
+    if host not in _trackers:
+        _trackers[host] = LatencyTracker(host)
+    return _trackers[host]
+
+
+def record(url, seconds):
+    """Record a request latency for the URL's host"""
+    get_tracker(url).record(seconds)
+
+
+async def hedged(send, url, mirror=None):
+    """
+    Run send(url, started) and hedge it if it's slower than the host's p90
+
+    Args:
+        send: Coroutine function taking a URL and an asyncio.Event it sets
+              once the request is actually sent (rate limiter slot granted)
+        url: Primary URL
+        mirror: Alternate URL for the hedge (defaults to url itself)
+
+    Returns:
+        Result of whichever request finished first without error
+    """
+    tracker = get_tracker(url)
+    tracker.requests += 1
+    delay = tracker.hedge_delay()
+
+    started = asyncio.Event()
+    primary = asyncio.ensure_future(send(url, started))
+    if delay is None:
+        return await primary
+
+    # p90 is measured from the slot grant - time spent queued doesn't count
+    sent = asyncio.ensure_future(started.wait())
+    try:
+        await asyncio.wait({primary, sent}, return_when=asyncio.FIRST_COMPLETED)
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+    except asyncio.CancelledError:
+        primary.cancel()
+        raise
+    finally:
+        sent.cancel()
+    if done:
+        return primary.result()
+
+    hedge_url = mirror or url
+    if rate_limiter.get_governor(hedge_url).waiting:
+        # Host is saturated - a hedge would queue behind the backlog
+        return await primary
+
+    tracker.hedged += 1
+    hedge = asyncio.ensure_future(send(hedge_url, asyncio.Event()))
+    pending = {primary, hedge}
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        tracker.hedge_wins += 1
+                    return task.result()
+        # Both failed - report the primary's error
+        return primary.result()
+    finally:
+        for task in (primary, hedge):
+            if not task.done():
+                task.cancel()
+
+
+def stats():
+    """Latency percentiles and hedge rate for every host seen so far"""
+    return {host: tracker.stats() for host, tracker in sorted(_trackers.items())}
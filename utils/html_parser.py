@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+HTML Parsing Helpers
+lxml-based parsing for the scrapers. Each scraper compiles its XPath
+selectors once at import and exposes pure parse_* functions that return
+the same dicts as before (BeautifulSoup html.parser was the bottleneck).
+Parse functions can declare regions of interest so only those subtrees
+are built instead of the whole WordPress page.
+"""
+
+import re
+import lxml.html
+from lxml import etree
+
+_parser = lxml.html.HTMLParser(encoding='utf-8')
+
+# Text nodes below an element, like BeautifulSoup's get_text() (no script/style)
+_TEXT_NODES = etree.XPath('.//text()[not(parent::script) and not(parent::style)]')
+
+# Elements whose content is raw text (can't contain nested tags)
+RAW_TEXT_TAGS = ('script', 'style')
+
+
+class Region:
+    """
+    One region of interest: an element picked by tag + class / id / attribute
+
+    Args:
+        tag: Element name ('div', 'ul', 'script', ...)
+        cls: Required class (one of the space-separated classes)
+        id: Required id
+        attr: (name, value) attribute that must match exactly
+        contains: Keep the region only if its source contains this text
+        first: Stop after the first match (otherwise take every match)
+    """
+
+    def __init__(self, tag, cls=None, id=None, attr=None, contains=None, first=True):
+        self.tag = tag
+        self.contains = contains
+        self.first = first
+
+        condition = ''
+        if cls:
+            value = r'["\']?[^"\'>]*(?<![\w-])' + re.escape(cls) + r'(?![\w-])'
+            condition = r'(?=[^>]*\bclass\s*=\s*' + value + ')'
+        elif id:
+            condition = r'(?=[^>]*\bid\s*=\s*["\']?' + re.escape(id) + r'["\'\s>])'
+        elif attr:
+            name, value = attr
+            condition = r'(?=[^>]*\b' + re.escape(name) + r'\s*=\s*["\']?' + re.escape(value) + r'["\'\s>])'
+
+        self.start = re.compile(r'<' + tag + r'\b' + condition + r'[^>]*>', re.I)
+        self.boundary = re.compile(r'<(/?)' + tag + r'\b[^>]*>', re.I)
+        self.raw_close = re.compile(r'</' + tag + r'\s*>', re.I)
+
+    def _end(self, html, pos):
+        """End offset of the element whose start tag ends at pos"""
+        if self.tag in RAW_TEXT_TAGS:
+            match = self.raw_close.search(html, pos)
+            return match.end() if match else len(html)
+
+        # Count nested elements of the same tag until ours closes
+        depth = 1
+        for match in self.boundary.finditer(html, pos):
+            depth += -1 if match.group(1) else 1
+            if depth == 0:
+                return match.end()
+        return len(html)
+
+    def spans(self, html):
+        """(start, end) offsets of every matching element (only the first if first=True)"""
+        pos = 0
+        while True:
+            match = self.start.search(html, pos)
+            if not match:
+                return
+            end = self._end(html, match.end())
+            pos = end
+            if self.contains and html.find(self.contains, match.start(), end) == -1:
+                continue
+            yield match.start(), end
+            if self.first:
+                return
+
+
+def slice_regions(html, regions):
+    """
+    Cut the regions of interest out of a page
+
+    Returns:
+        The regions (in page order, nested duplicates dropped) joined into
+        one small document, or None if no region matched (the caller parses
+        the whole page then)
+    """
+    spans = sorted(span for region in regions for span in region.spans(html))
+    if not spans:
+        return None
+
+    pieces = []
+    covered = -1
+    for start, end in spans:
+        if start < covered:
+            continue  # Inside a region we already have
+        pieces.append(html[start:end])
+        covered = end
+    return '<html><body>' + '\n'.join(pieces) + '</body></html>'
+
+
+def parse(html, regions=None):
+    """
+    Parse an HTML page or fragment
+
+    Args:
+        html: Page as str (or utf-8 bytes)
+        regions: Regions of interest - only these subtrees are built
+                 (whole page if none of them is found)
+
+    Returns:
+        Document root element, or None for an empty/unparseable page
+    """
+    if regions and isinstance(html, str):
+        html = slice_regions(html, regions) or html
+
+    if isinstance(html, str):
+        html = html.encode('utf-8', errors='replace')
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html, parser=_parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def xpath(expr):
+    """Compile an XPath selector (call once at module level)"""
+    return etree.XPath(expr)
+
+
+def has_class(name):
+    """XPath predicate matching one class in a space-separated class list"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def first(elements):
+    """First match of a selector result, or None"""
+    return elements[0] if elements else None
+
+
+def text(element, strip=True):
+    """Element text content (strip=True joins stripped pieces like get_text(strip=True))"""
+    if element is None:
+        return ''
+    pieces = _TEXT_NODES(element)
+    if strip:
+        return ''.join(p.strip() for p in pieces)
+    return ''.join(pieces)
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP Client
+One pooled aiohttp session (on the async engine loop) for every scraper,
+resolver and metadata helper. Sync callers use get/post/head, async
+callers use aget/apost/ahead.
+"""
+
+import asyncio
+import atexit
+import functools
+import json as jsonlib
+import time
+from urllib.parse import urlencode
+import aiohttp
+from multidict import CIMultiDict
+
+from utils import async_engine, circuit_breaker, deadline, hedging, rate_limiter, storage
+from utils.page_cache import page_cache
+from utils.prewarm import resolver
+
+# Default User-Agent and headers sent with every request
+# (per-call headers are merged on top of these)
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "id,en-US;q=0.7,en;q=0.3",
+}
+
+# (connect, read) timeout in seconds - no request may hang forever
+DEFAULT_TIMEOUT = (5, 15)
+
+# Connection pool sizing
+# pool_connections: total keep-alive connections across all hosts
+# pool_maxsize: keep-alive connections per host
+POOL_CONNECTIONS = 100
+POOL_MAXSIZE = 10
+
+# Seconds an idle keep-alive connection stays open (long enough for a
+# pre-warmed connection to survive until the first search)
+KEEPALIVE_TIMEOUT = 60
+
+# Pause a host this long after a 429 without a usable Retry-After
+DEFAULT_BACKOFF = 10
+
+# Never buffer more than this much of one response body
+MAX_BYTES = 16 * 1024 * 1024
+
+# Query parameters left out of page cache keys (API keys)
+SECRET_PARAMS = {'api_key', 'apikey', 'access_token', 'token'}
+
+# Body read size for streaming reads
+CHUNK_SIZE = 16 * 1024
+
+_session = None
+
+
+class HTTPError(aiohttp.ClientError):
+    """Raised by Response.raise_for_status() for 4xx / 5xx responses"""
+
+    def __init__(self, status, url):
+        super().__init__(status, url)
+        self.status = status
+        self.url = url
+
+    def __str__(self):
+        return f"HTTP {self.status} for {self.url}"
+
+
+class Response:
+    """Fully-read HTTP response (requests-like interface)"""
+
+    def __init__(self, status_code, headers, url, content, from_cache=False, truncated=False):
+        self.status_code = status_code
+        self.headers = headers
+        self.url = url
+        self.content = content
+        self.from_cache = from_cache
+        # True if reading stopped early (stop_at found or max_bytes reached)
+        self.truncated = truncated
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def encoding(self):
+        content_type = self.headers.get('Content-Type', '')
+        for part in content_type.split(';'):
+            part = part.strip()
+            if part.lower().startswith('charset='):
+                return part[8:].strip('"\'')
+        return 'utf-8'
+
+    @property
+    def text(self):
+        try:
+            return self.content.decode(self.encoding, errors='replace')
+        except LookupError:
+            return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return jsonlib.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPError(self.status_code, self.url)
+
+
+def _client_timeout(timeout):
+    """Convert requests-style timeout (number or (connect, read)) to aiohttp, capped by the deadline"""
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    total = connect + read
+
+    # Never wait past the request deadline
+    left = deadline.remaining()
+    if left is not None:
+        total, connect, read = min(total, left), min(connect, left), min(read, left)
+
+    return aiohttp.ClientTimeout(total=total, sock_connect=connect, sock_read=read)
+
+
+async def get_session():
+    """Get the shared session (created on the engine loop on first use)"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_CONNECTIONS,
+            limit_per_host=POOL_MAXSIZE,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            resolver=resolver,        # Shared DNS cache (filled by prewarm)
+            use_dns_cache=False,
+        )
+        _session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+    return _session
+
+
+def configure(pool_connections=None, pool_maxsize=None, timeout=None, headers=None):
+    """
+    Change pool sizes, default timeout or default headers
+
+    Args:
+        pool_connections: Total keep-alive connections
+        pool_maxsize: Keep-alive connections per host
+        timeout: Default (connect, read) timeout tuple or single number
+        headers: Extra default headers
+    """
+    global POOL_CONNECTIONS, POOL_MAXSIZE, DEFAULT_TIMEOUT, _session
+
+    if pool_connections is not None:
+        POOL_CONNECTIONS = pool_connections
+    if pool_maxsize is not None:
+        POOL_MAXSIZE = pool_maxsize
+    if timeout is not None:
+        DEFAULT_TIMEOUT = timeout
+    if headers:
+        DEFAULT_HEADERS.update(headers)
+
+    # Rebuild session so new pool settings take effect
+    if _session is not None:
+        old_session, _session = _session, None
+        async_engine.submit(old_session.close())
+
+
+def close():
+    """Close the shared session (registered at exit)"""
+    global _session
+    if _session is not None and not _session.closed:
+        session, _session = _session, None
+        try:
+            async_engine.run(session.close(), timeout=2)
+        except Exception:
+            pass
+
+
+atexit.register(close)
+
+
+def _find_stop(buffer, stop_at, start):
+    """End offset of the stop marker (bytes or compiled bytes regex) in buffer, or None"""
+    if isinstance(stop_at, bytes):
+        index = buffer.find(stop_at, start)
+        return index + len(stop_at) if index != -1 else None
+    match = stop_at.search(buffer, start)
+    return match.end() if match else None
+
+
+async def _read_body(resp, max_bytes=None, stop_at=None):
+    """
+    Read a response body chunk by chunk
+
+    Args:
+        resp: aiohttp response
+        max_bytes: Stop after this many bytes (default MAX_BYTES - known large
+                   downloads pass a bigger cap explicitly)
+        stop_at: Stop once this marker has been read - bytes, or a compiled
+                 bytes regex (searched from the start of the body)
+
+    Returns:
+        (content, truncated)
+    """
+    max_bytes = max_bytes or MAX_BYTES
+    buffer = bytearray()
+
+    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+        # Literal markers may straddle chunks - rescan a little overlap
+        start = 0
+        if isinstance(stop_at, bytes):
+            start = max(0, len(buffer) - len(stop_at))
+        buffer.extend(chunk)
+
+        if stop_at is not None:
+            end = _find_stop(buffer, stop_at, start)
+            if end is not None:
+                return bytes(buffer[:end]), True
+
+        if len(buffer) >= max_bytes:
+            return bytes(buffer[:max_bytes]), True
+
+    return bytes(buffer), False
+
+
+async def _send(method, url, started=None, params=None, data=None, json=None, headers=None,
+                timeout=None, allow_redirects=True, max_bytes=None, stop_at=None):
+    """
+    Send a request through the shared session and read the body (up to max_bytes / stop_at)
+
+    started is an optional asyncio.Event set once the rate limiter grants
+    the slot (the hedge timer starts there).
+    """
+    session = await get_session()
+    governor = rate_limiter.get_governor(url)
+
+    # Fail fast while the host is down
+    breaker = circuit_breaker.get_breaker(url)
+    if not breaker.allow():
+        raise circuit_breaker.CircuitOpenError(f"Circuit open for {breaker.name}")
+
+    try:
+        # Queue behind the host's rate/concurrency limit
+        async with governor.slot():
+            if started is not None:
+                started.set()
+            start = time.monotonic()
+            async with session.request(
+                method, url,
+                params=params,
+                data=data,
+                json=json,
+                headers=headers,
+                timeout=_client_timeout(timeout),
+                allow_redirects=allow_redirects,
+            ) as resp:
+                content, truncated = await _read_body(resp, max_bytes, stop_at)
+                hedging.record(url, time.monotonic() - start)
+
+                if resp.status == 429 or (resp.status == 503 and 'Retry-After' in resp.headers):
+                    governor.backoff(_retry_after(resp.headers))
+
+                response = Response(resp.status, resp.headers, str(resp.url), content, truncated=truncated)
+    except (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError):
+        if deadline.expired():
+            # Timed out on our budget, not the host's fault
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+
+    if response.status_code >= 500:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
+
+
+def _retry_after(headers):
+    """Seconds from a Retry-After header (falls back to DEFAULT_BACKOFF)"""
+    try:
+        return min(float(headers.get('Retry-After')), 120)
+    except (TypeError, ValueError):
+        return DEFAULT_BACKOFF
+
+
+def _cache_key(url, params, max_bytes=None, stop_at=None):
+    key = url
+    # Credentials stay out of the key (it's stored on disk)
+    items = [(k, v) for k, v in (params.items() if isinstance(params, dict) else params or ()) if k not in SECRET_PARAMS]
+    if items:
+        key += ('&' if '?' in url else '?') + urlencode(items)
+
+    # Partial reads are cached separately from the full page
+    if stop_at is not None:
+        marker = stop_at if isinstance(stop_at, bytes) else stop_at.pattern
+        key += '#stop=' + marker.decode('latin-1')
+    if max_bytes:
+        key += f'#max={max_bytes}'
+    return key
+
+
+async def _dispatch(method, url, hedge=False, mirror=None, **kwargs):
+    """Send directly, or hedged against the host's p90 latency (within the deadline)"""
+    if hedge:
+        send = functools.partial(_send, method, **kwargs)
+        coro = hedging.hedged(send, url, mirror=mirror)
+    else:
+        coro = _send(method, url, **kwargs)
+
+    left = deadline.remaining()
+    if left is None:
+        return await coro
+    if left <= 0:
+        coro.close()
+        deadline.check()
+    # Covers the rate limiter queue as well as the request itself
+    return await asyncio.wait_for(coro, left)
+
+
+async def arequest(method, url, cache=None, hedge=False, mirror=None, **kwargs):
+    """
+    Send a request through the shared session
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        cache: Page cache URL class ('search', 'anime', 'episode', 'media') to serve
+               GET responses from the on-disk cache, None to bypass it
+        hedge: Send a duplicate if no answer within the host's p90 latency
+               (only for idempotent requests)
+        mirror: Alternate URL for the hedged duplicate
+        **kwargs: params, data, json, headers, timeout, allow_redirects,
+                  max_bytes (body size cap), stop_at (bytes or compiled bytes
+                  regex - stop downloading once it has been read)
+
+    Returns:
+        Response
+    """
+    if not cache or method != 'GET':
+        return await _dispatch(method, url, hedge, mirror, **kwargs)
+
+    page_url = _cache_key(url, kwargs.get('params'))
+    key = _cache_key(url, kwargs.get('params'), kwargs.get('max_bytes'), kwargs.get('stop_at'))
+    # SQLite runs on the storage thread - a locked database must not stall the loop
+    entry = await storage.run(page_cache.get, key)
+
+    if entry and entry.is_fresh():
+        return Response(entry.status, CIMultiDict(entry.headers), page_url, entry.content, from_cache=True)
+
+    if entry:
+        # Stale - revalidate with ETag / Last-Modified
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **entry.validators()}
+
+    resp = await _dispatch(method, url, hedge, mirror, **kwargs)
+
+    if resp.status_code == 304 and entry:
+        await storage.run(page_cache.touch, key)
+        return Response(entry.status, CIMultiDict(entry.headers), page_url, entry.content, from_cache=True)
+
+    if resp.status_code == 200:
+        await storage.run(page_cache.store, key, cache, resp.status_code, resp.headers, resp.content)
+
+    return resp
+
+
+async def aget(url, **kwargs):
+    return await arequest('GET', url, **kwargs)
+
+
+async def apost(url, **kwargs):
+    return await arequest('POST', url, **kwargs)
+
+
+async def ahead(url, **kwargs):
+    kwargs.setdefault('allow_redirects', False)
+    return await arequest('HEAD', url, **kwargs)
+
+
+def request(method, url, **kwargs):
+    """Sync wrapper - runs arequest() on the engine loop"""
+    return async_engine.run(arequest(method, url, **kwargs))
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def head(url, **kwargs):
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
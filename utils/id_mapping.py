@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Anime ID Mapping
+Local IMDb <-> TMDB <-> AniList <-> MAL cross-reference in a memory-mapped
+SQLite database, imported from the Fribb/anime-lists dataset and refreshed
+in the background. AniList titles learned at runtime are kept next to the
+IDs so popular shows skip the TMDB and AniList round-trips entirely.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import time
+
+from utils import http_client, storage
+
+logger = logging.getLogger(__name__)
+
+DATASET_URL = "https://raw.githubusercontent.com/Fribb/anime-lists/master/anime-list-full.json"
+
+# Download the dataset again after this many seconds (ETag revalidated)
+REFRESH_INTERVAL = 7 * 24 * 60 * 60
+
+# How often the background task checks whether a refresh is due
+CHECK_INTERVAL = 6 * 60 * 60
+
+# Bytes of the database file mapped into memory
+MMAP_SIZE = 64 * 1024 * 1024
+
+# Download cap for the dataset (well above its size - a cut-off copy is rejected)
+DATASET_MAX_BYTES = 64 * 1024 * 1024
+
+# Dataset types an IMDb series lookup may map to (movies, OVAs and specials
+# often share the show's IMDb id without a season)
+SERIES_TYPES = ('TV', 'TV_SHORT', 'ONA')
+
+
+class MappedAnime:
+    def __init__(self, anilist_id, mal_id, imdb_id, tmdb_id, season, titles):
+        self.anilist_id = anilist_id
+        self.mal_id = mal_id
+        self.imdb_id = imdb_id
+        self.tmdb_id = tmdb_id
+        self.season = season
+        # AniList titles (empty until learned from a lookup)
+        self.titles = titles
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_dataset(entries):
+    """
+    Rows from anime-list-full.json entries
+
+    Returns:
+        List of (anilist_id, mal_id, imdb_id, tmdb_id, season, type) - entries without an AniList id are skipped
+    """
+    rows = []
+    for entry in entries:
+        anilist_id = _int(entry.get('anilist_id'))
+        if anilist_id is None:
+            continue
+
+        # A few entries list several IMDb ids ("tt1,tt2") - the first is the show
+        imdb_id = (entry.get('imdb_id') or '').split(',')[0].strip() or None
+        # themoviedb_id of movies would point at the wrong /tv/ page
+        tmdb_id = _int(entry.get('themoviedb_id')) if entry.get('type') != 'MOVIE' else None
+        season = entry.get('season') or {}
+        season = _int(season.get('tvdb') or season.get('tmdb')) if isinstance(season, dict) else None
+
+        rows.append((anilist_id, _int(entry.get('mal_id')), imdb_id, tmdb_id, season, entry.get('type')))
+    return rows
+
+
+class IdMapping(storage.SQLiteCache):
+    LABEL = 'ID mapping'
+    TABLE = 'ids'
+    SCHEMA = ('''
+        CREATE TABLE IF NOT EXISTS ids (
+            anilist_id INTEGER PRIMARY KEY,
+            mal_id INTEGER,
+            imdb_id TEXT,
+            tmdb_id INTEGER,
+            season INTEGER,
+            titles TEXT,
+            type TEXT
+        )
+    ''',
+        'CREATE INDEX IF NOT EXISTS idx_ids_imdb ON ids(imdb_id)',
+        'CREATE INDEX IF NOT EXISTS idx_ids_mal ON ids(mal_id)',
+        'CREATE INDEX IF NOT EXISTS idx_ids_tmdb ON ids(tmdb_id)',
+        '''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+    PRAGMAS = (f'PRAGMA mmap_size={MMAP_SIZE}',)
+
+    def __init__(self, db_name='id_mapping.db'):
+        self.hits = {'hit': 0, 'miss': 0}
+        super().__init__(db_name)
+
+    def init_database(self):
+        super().init_database()
+        conn = self.connection()
+        with conn:
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(ids)')]
+            if 'type' not in columns:
+                # Older table - add the column and re-download so every row gets its type
+                conn.execute('ALTER TABLE ids ADD COLUMN type TEXT')
+                conn.execute("DELETE FROM meta WHERE key IN ('refreshed_at', 'etag')")
+
+    def _select(self, where, args, order=''):
+        if not self.enabled:
+            return None
+        row = self.fetchone(
+            f'SELECT anilist_id, mal_id, imdb_id, tmdb_id, season, titles FROM ids WHERE {where} {order} LIMIT 1',
+            args
+        )
+        self.hits['hit' if row else 'miss'] += 1
+        if not row:
+            return None
+        return MappedAnime(row[0], row[1], row[2], row[3], row[4], json.loads(row[5]) if row[5] else [])
+
+    def by_imdb(self, imdb_id, season=None):
+        """
+        Entry for an IMDb show (and season)
+
+        The season's own entry wins, then one without a season (learned from
+        a title search, which finds the same entry for every season). Another
+        season's entry is never returned - that is a miss, so the caller
+        looks the right one up. Only series entries (SERIES_TYPES, or learned
+        ones without a type) count, and ties go to the lowest AniList id.
+        """
+        series = f"(type IS NULL OR type IN ({', '.join('?' * len(SERIES_TYPES))}))"
+        if season is None:
+            return self._select(f'imdb_id = ? AND {series}', (imdb_id, *SERIES_TYPES),
+                                'ORDER BY season IS NOT NULL, season, anilist_id')
+        return self._select(
+            f'imdb_id = ? AND (season = ? OR season IS NULL) AND {series}', (imdb_id, season, *SERIES_TYPES),
+            'ORDER BY season IS NULL, anilist_id'
+        )
+
+    def by_mal(self, mal_id):
+        return self._select('mal_id = ?', (int(mal_id),))
+
+    def by_anilist(self, anilist_id):
+        return self._select('anilist_id = ?', (int(anilist_id),))
+
+    def learn(self, imdb_id, anime_data, season=None):
+        """
+        Remember an IMDb -> AniList match and its titles
+
+        Args:
+            imdb_id: IMDb id the lookup started from
+            anime_data: AniListHelper result (id, mal_id, all_titles)
+            season: Season the AniList entry belongs to, None if unknown
+        """
+        if not anime_data or not anime_data.get('id'):
+            return
+        self.write('''
+            INSERT INTO ids (anilist_id, mal_id, imdb_id, season, titles) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(anilist_id) DO UPDATE SET
+                mal_id = COALESCE(ids.mal_id, excluded.mal_id),
+                imdb_id = COALESCE(ids.imdb_id, excluded.imdb_id),
+                season = COALESCE(ids.season, excluded.season),
+                titles = excluded.titles
+        ''', (anime_data['id'], anime_data.get('mal_id'), imdb_id, season, json.dumps(anime_data['all_titles'])))
+
+    def import_rows(self, rows):
+        """Upsert dataset rows in one transaction (learned titles are kept) - True if committed"""
+        return self.write('''
+            INSERT INTO ids (anilist_id, mal_id, imdb_id, tmdb_id, season, type) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(anilist_id) DO UPDATE SET
+                mal_id = COALESCE(excluded.mal_id, ids.mal_id),
+                imdb_id = COALESCE(excluded.imdb_id, ids.imdb_id),
+                tmdb_id = excluded.tmdb_id,
+                season = COALESCE(excluded.season, ids.season),
+                type = excluded.type
+        ''', rows, many=True)
+
+    def _meta(self, key):
+        row = self.fetchone('SELECT value FROM meta WHERE key = ?', (key,))
+        return row[0] if row else None
+
+    def _set_meta(self, **values):
+        self.write('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', list(values.items()), many=True)
+
+    async def refresh(self, force=False):
+        """
+        Download and import the dataset if REFRESH_INTERVAL has passed
+
+        Returns:
+            Number of rows imported (0 if not due / unchanged / failed)
+        """
+        if not self.enabled:
+            return 0
+        try:
+            refreshed_at = float(await storage.run(self._meta, 'refreshed_at') or 0)
+            if not force and time.time() - refreshed_at < REFRESH_INTERVAL:
+                return 0
+
+            etag = await storage.run(self._meta, 'etag')
+            headers = {'If-None-Match': etag} if etag and not force else None
+            response = await http_client.aget(DATASET_URL, headers=headers, timeout=60,
+                                              max_bytes=DATASET_MAX_BYTES)
+
+            if response.status_code == 304:
+                await storage.run(functools.partial(self._set_meta, refreshed_at=str(time.time())))
+                return 0
+            if response.status_code != 200:
+                logger.warning(f"ID mapping download failed: {response.status_code}")
+                return 0
+            if response.truncated:
+                # Keep the current table rather than importing part of the list
+                logger.warning(f"ID mapping download cut off at {len(response.content)} bytes, not imported")
+                return 0
+
+            # Parsing + importing ~20k entries is CPU/disk work - keep it off the loop
+            # (own thread, so the storage thread isn't blocked behind the import)
+            rows = await asyncio.to_thread(lambda: parse_dataset(json.loads(response.content)))
+            if not await asyncio.to_thread(self.import_rows, rows):
+                return 0
+            await storage.run(functools.partial(
+                self._set_meta, refreshed_at=str(time.time()), etag=response.headers.get('ETag') or ''
+            ))
+            logger.info(f"ID mapping: imported {len(rows)} entries")
+            return len(rows)
+
+        except Exception as e:
+            logger.warning(f"ID mapping refresh error: {e}")
+            return 0
+
+    async def keep_fresh(self):
+        """Background task: refresh whenever the dataset is due (runs forever)"""
+        while True:
+            await self.refresh()
+            await asyncio.sleep(CHECK_INTERVAL)
+
+    def stats(self):
+        if not self.enabled:
+            return dict(self.hits, enabled=False)
+        refreshed_at = float(self._meta('refreshed_at') or 0)
+        return dict(self.hits, enabled=True, entries=self.count(), refreshed_at=refreshed_at or None)
+
+
+# Global instance
+id_mapping = IdMapping()
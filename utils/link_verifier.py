@@ -4,7 +4,9 @@ Link Verification Module
 Verifies if links are accessible and filters out dead servers
 """
 
-import requests
+import asyncio
+import aiohttp
+from utils import http_client
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Callable, Optional
@@ -118,7 +120,7 @@ def verify_link(url: str, timeout: int = 2) -> Dict:
             'Accept': '*/*',
         }
         
-        response = requests.head(
+        response = http_client.head(
             url,
             headers=headers,
             timeout=timeout,
@@ -151,15 +153,15 @@ def verify_link(url: str, timeout: int = 2) -> Dict:
                 result['status'] = 'dead'
                 result['error'] = f"HTTP {response.status_code}"
             
-    except requests.exceptions.Timeout:
+    except asyncio.TimeoutError:
         result['status'] = 'dead'
         result['error'] = 'Timeout'
-    except requests.exceptions.ConnectionError:
-        result['status'] = 'dead'
-        result['error'] = 'Connection failed'
-    except requests.exceptions.TooManyRedirects:
+    except aiohttp.TooManyRedirects:
         result['status'] = 'dead'
         result['error'] = 'Too many redirects'
+    except aiohttp.ClientConnectionError:
+        result['status'] = 'dead'
+        result['error'] = 'Connection failed'
     except Exception as e:
         result['status'] = 'dead'
         result['error'] = str(e)[:50]
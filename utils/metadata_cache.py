@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Metadata Cache
+Persistent TTL cache for TMDB / AniList lookups, shared by every process
+using the same cache directory (gunicorn workers, TUI, addon restarts).
+"Not found" answers are cached too, for a shorter time. The store is a
+pluggable backend: SQLite (WAL) by default, in-memory when the filesystem
+is read-only.
+"""
+
+import functools
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from utils import deadline, storage
+
+logger = logging.getLogger(__name__)
+
+# Seconds a "not found" answer is remembered
+NEGATIVE_TTL = 60 * 60
+
+# Entries kept before the oldest are evicted
+MAX_ENTRIES = 20000
+
+# Run eviction every this many writes
+EVICT_EVERY = 200
+
+_MISSING = object()
+
+
+class SQLiteBackend(storage.SQLiteCache):
+    """Entries in a SQLite table in the cache directory (shared across processes)"""
+    LABEL = 'Metadata cache'
+    TABLE = 'metadata'
+    SCHEMA = ('''
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            stored_at REAL,
+            expires_at REAL
+        )
+    ''', 'CREATE INDEX IF NOT EXISTS idx_metadata_stored ON metadata(stored_at)')
+    EXPIRES = 'expires_at'
+
+    def __init__(self, db_name='metadata_cache.db'):
+        super().__init__(db_name)
+
+    def get(self, key):
+        """(value JSON, expires_at) or None"""
+        return self.fetchone('SELECT value, expires_at FROM metadata WHERE key = ?', (key,))
+
+    def set(self, key, value, expires_at):
+        self.write(
+            'INSERT OR REPLACE INTO metadata (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)',
+            (key, value, time.time(), expires_at)
+        )
+
+    def evict(self, max_entries):
+        """Drop expired entries, then the oldest ones beyond max_entries"""
+        self.purge()
+        self.write('''
+            DELETE FROM metadata WHERE key IN (
+                SELECT key FROM metadata ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_entries,))
+
+
+class MemoryBackend:
+    """Entries in a dict (this process only)"""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, expires_at):
+        self.entries.pop(key, None)
+        self.entries[key] = (value, expires_at)
+
+    def evict(self, max_entries):
+        now = time.time()
+        for key in [k for k, (_, expires_at) in self.entries.items() if expires_at < now]:
+            del self.entries[key]
+        while len(self.entries) > max_entries:
+            self.entries.popitem(last=False)
+
+    def count(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class MetadataCache:
+    def __init__(self, backend=None, max_entries=MAX_ENTRIES):
+        if backend is None:
+            backend = SQLiteBackend()
+            if not backend.enabled:
+                # Read-only filesystem etc - keep entries in memory instead
+                logger.warning("Metadata cache in memory only")
+                backend = MemoryBackend()
+        self.backend = backend
+        self.max_entries = max_entries
+        self.writes = 0
+        self.hits = {'hit': 0, 'negative': 0, 'miss': 0}
+
+    def get(self, key):
+        """Cached value (None for a cached "not found"), or _MISSING"""
+        try:
+            row = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Metadata cache read error: {e}")
+            return _MISSING
+
+        if row is None or row[1] < time.time():
+            self.hits['miss'] += 1
+            return _MISSING
+
+        value = json.loads(row[0])
+        self.hits['hit' if value is not None else 'negative'] += 1
+        return value
+
+    def store(self, key, value, ttl, negative_ttl=NEGATIVE_TTL):
+        """Store a value (None = not found, kept for negative_ttl)"""
+        expires_at = time.time() + (ttl if value is not None else negative_ttl)
+        try:
+            self.backend.set(key, json.dumps(value), expires_at)
+            self.writes += 1
+            if self.writes % EVICT_EVERY == 0:
+                self.backend.evict(self.max_entries)
+        except Exception as e:
+            logger.warning(f"Metadata cache write error: {e}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        try:
+            entries = self.backend.count()
+        except Exception:
+            entries = None
+        return dict(self.hits, backend=type(self.backend).__name__, entries=entries)
+
+
+# Global instance
+metadata_cache = MetadataCache()
+
+
+def configure(backend=None, max_entries=None):
+    """Swap the storage backend (e.g. MemoryBackend()) and/or the size limit"""
+    if backend is not None:
+        metadata_cache.backend = backend
+    if max_entries is not None:
+        metadata_cache.max_entries = max_entries
+
+
+def cached(namespace, ttl, negative_ttl=NEGATIVE_TTL):
+    """
+    Persistent cache for a coroutine function, keyed by its positional args
+
+    A None result is cached as "not found" for negative_ttl. Exceptions are
+    not cached and propagate (a network error isn't "not found"). A `self`
+    argument is left out of the key so every instance shares entries.
+
+    Args:
+        namespace: Key prefix ('tmdb.metadata', 'anilist.search', ...)
+        ttl: Seconds a found value is kept
+        negative_ttl: Seconds a "not found" is kept
+    """
+    def decorator(func):
+        is_method = func.__code__.co_varnames[:1] == ('self',)
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            key = f"{namespace}:{json.dumps(args[1:] if is_method else args, default=str)}"
+            # Backend work runs on the storage thread (SQLite may wait on a lock)
+            value = await storage.run(metadata_cache.get, key)
+            if value is not _MISSING:
+                return value
+
+            value = await func(*args)
+
+            # Work cut short by the request deadline may be incomplete
+            if not deadline.expired():
+                await storage.run(metadata_cache.store, key, value, ttl, negative_ttl)
+            return value
+
+        return wrapper
+    return decorator
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+HTTP Page Cache
+Persistent cache for provider pages (search, anime detail, episode, media) with
+per-URL-class TTLs and ETag/Last-Modified revalidation
+"""
+
+import json
+import time
+
+from utils import storage, url_cache
+
+# Seconds a cached page is served without asking the server again
+URL_CLASS_TTL = {
+    'search': 30 * 60,        # Search result pages
+    'anime': 60 * 60,         # Anime detail pages (episode list changes hourly)
+    'episode': 24 * 60 * 60,  # Episode pages with embed links (mirrors rarely change)
+    # Episode pages that carry direct media URLs - never served past the
+    # shortest lifetime url_cache gives a direct URL
+    'media': min(url_cache.DEFAULT_TTL, *url_cache.HOST_TTL.values()),
+}
+DEFAULT_TTL = 10 * 60
+
+# Stale entries are kept this long for revalidation, then purged
+MAX_AGE = 7 * 24 * 60 * 60
+
+# Response headers worth keeping with the body
+KEPT_HEADERS = ['Content-Type', 'ETag', 'Last-Modified']
+
+
+class CachedPage:
+    def __init__(self, url, url_class, status, headers, content, fetched_at):
+        self.url = url
+        self.url_class = url_class
+        self.status = status
+        self.headers = headers
+        self.content = content
+        self.fetched_at = fetched_at
+
+    @property
+    def etag(self):
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self):
+        return self.headers.get('Last-Modified')
+
+    def is_fresh(self):
+        ttl = URL_CLASS_TTL.get(self.url_class, DEFAULT_TTL)
+        return time.time() - self.fetched_at < ttl
+
+    def validators(self):
+        """Conditional request headers for revalidation"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache(storage.SQLiteCache):
+    LABEL = 'Page cache'
+    TABLE = 'pages'
+    SCHEMA = ('''
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            url_class TEXT,
+            status INTEGER,
+            headers TEXT,
+            content BLOB,
+            fetched_at REAL
+        )
+    ''',)
+    # Stale pages are kept for revalidation until MAX_AGE
+    EXPIRES = f'fetched_at + {MAX_AGE}'
+
+    def __init__(self, db_name='http_cache.db'):
+        super().__init__(db_name)
+
+    def get(self, url):
+        """Get cached page (fresh or stale) or None"""
+        row = self.fetchone(
+            'SELECT url, url_class, status, headers, content, fetched_at FROM pages WHERE url = ?',
+            (url,)
+        )
+        if not row:
+            return None
+        return CachedPage(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5])
+
+    def store(self, url, url_class, status, headers, content):
+        """Store a fetched page"""
+        kept = {k: headers[k] for k in KEPT_HEADERS if headers.get(k)}
+        self.write('''
+            INSERT OR REPLACE INTO pages (url, url_class, status, headers, content, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (url, url_class, status, json.dumps(kept), content, time.time()))
+
+    def touch(self, url):
+        """Mark a cached page as fresh again (after 304 Not Modified)"""
+        self.write('UPDATE pages SET fetched_at = ? WHERE url = ?', (time.time(), url))
+
+
+# Global instance
+page_cache = PageCache()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Background Prefetch
+Low-priority lookups started after a response is served (e.g. the next
+episode's streams). A prefetch only starts while the outbound hosts are
+idle, a few run at a time, and all of them are cancelled as soon as real
+requests start queueing behind the rate limiter.
+"""
+
+import asyncio
+import logging
+
+from utils import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Prefetches running at the same time
+MAX_PREFETCHES = 2
+
+
+def under_load():
+    """True if requests are queued behind any host's rate limit"""
+    return any(host['queue_depth'] > 0 for host in rate_limiter.stats().values())
+
+
+class Prefetcher:
+    def __init__(self, max_tasks=MAX_PREFETCHES):
+        self.max_tasks = max_tasks
+        self._tasks = {}
+        self.started = 0
+        self.completed = 0
+        self.skipped = 0
+        self.cancelled = 0
+
+    def schedule(self, key, func, *args):
+        """
+        Start func(*args) in the background (call on the engine loop)
+
+        Args:
+            key: Hashable prefetch key (a key already running is not started again)
+            func: Coroutine function
+            *args: Arguments for func
+
+        Returns:
+            True if the prefetch was started
+        """
+        if key in self._tasks:
+            return False
+        if len(self._tasks) >= self.max_tasks or under_load():
+            self.skipped += 1
+            return False
+
+        task = asyncio.ensure_future(self._run(key, func, args))
+        self._tasks[key] = task
+        self.started += 1
+        return True
+
+    async def _run(self, key, func, args):
+        try:
+            await func(*args)
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        except Exception as e:
+            logger.debug(f"Prefetch {key} failed: {e}")
+        finally:
+            self._tasks.pop(key, None)
+
+    def yield_to_foreground(self):
+        """Cancel every running prefetch if real requests are queueing"""
+        if not self._tasks or not under_load():
+            return 0
+        count = len(self._tasks)
+        for task in list(self._tasks.values()):
+            task.cancel()
+        logger.info(f"Cancelled {count} prefetches (hosts busy)")
+        return count
+
+    def stats(self):
+        return {
+            'running': len(self._tasks),
+            'started': self.started,
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'cancelled': self.cancelled,
+        }
+
+
+# Shared prefetcher for all background lookups
+prefetcher = Prefetcher()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Connection Pre-warming
+DNS cache for the shared HTTP session plus a startup step that resolves
+every known host and opens warm TLS connections to the likely ones, so the
+first search / stream() doesn't pay DNS + TLS for each host in sequence
+"""
+
+import asyncio
+import logging
+import socket
+import time
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+from utils import async_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds a resolved address is reused
+DNS_TTL = 300
+
+# Every host we talk to (providers, metadata APIs, embed hosts)
+PROVIDER_HOSTS = [
+    'otakudesu.best',
+    'x3.sokuja.uk',
+    'samehadaku.how',
+    'v1.samehadaku.how',
+    'nyaa.si',
+    'feed.animetosho.org',
+]
+METADATA_HOSTS = [
+    'api.themoviedb.org',
+    'graphql.anilist.co',
+]
+EMBED_HOSTS = [
+    'desustream.info',
+    'desustream.com',
+    'www.blogger.com',
+    'pixeldrain.com',
+    'krakenfiles.com',
+    'www.yourupload.com',
+    'mega.nz',
+]
+KNOWN_HOSTS = PROVIDER_HOSTS + METADATA_HOSTS + EMBED_HOSTS
+
+# Hosts each front-end hits first (warm TLS connections are opened to these)
+TUI_HOSTS = ['samehadaku.how', 'otakudesu.best', 'x3.sokuja.uk']
+WEB_HOSTS = ['samehadaku.how', 'otakudesu.best', 'x3.sokuja.uk', 'nyaa.si']
+ADDON_HOSTS = ['api.themoviedb.org', 'graphql.anilist.co', 'x3.sokuja.uk', 'nyaa.si', 'feed.animetosho.org']
+
+
+class CachingResolver(AbstractResolver):
+    """aiohttp resolver that keeps answers for DNS_TTL seconds"""
+
+    def __init__(self, ttl=DNS_TTL):
+        self.ttl = ttl
+        self._resolver = None  # Created on the engine loop on first use
+        self._cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        key = (host, port, family)
+        entry = self._cache.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        if self._resolver is None:
+            self._resolver = DefaultResolver()
+        addresses = await self._resolver.resolve(host, port, family)
+        self._cache[key] = (time.monotonic(), addresses)
+        return addresses
+
+    async def close(self):
+        if self._resolver is not None:
+            await self._resolver.close()
+
+    def stats(self):
+        return {'hosts': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared resolver used by http_client's connector
+resolver = CachingResolver()
+
+
+async def resolve_hosts(hosts):
+    """Resolve hosts concurrently into the DNS cache (failures are ignored)"""
+    results = await asyncio.gather(
+        *(resolver.resolve(host, 443, socket.AF_UNSPEC) for host in hosts),
+        return_exceptions=True
+    )
+    return sum(1 for r in results if not isinstance(r, BaseException))
+
+
+async def warm_connections(hosts):
+    """Open a keep-alive TLS connection to each host with a cheap HEAD"""
+    from utils import http_client
+
+    async def warm(host):
+        try:
+            await http_client.ahead(f"https://{host}/", timeout=(3, 3))
+            return True
+        except Exception as e:
+            logger.debug(f"Warm-up failed for {host}: {e}")
+            return False
+
+    results = await asyncio.gather(*(warm(host) for host in hosts))
+    return sum(results)
+
+
+async def prewarm_async(warm_hosts=()):
+    """Async version of prewarm()"""
+    start = time.monotonic()
+    resolved = await resolve_hosts(KNOWN_HOSTS)
+    warmed = await warm_connections(warm_hosts)
+    logger.info(
+        f"Pre-warm: {resolved}/{len(KNOWN_HOSTS)} hosts resolved, "
+        f"{warmed}/{len(warm_hosts)} connections warm in {time.monotonic() - start:.2f}s"
+    )
+
+
+def prewarm(warm_hosts=()):
+    """
+    Resolve all known hosts and warm connections in the background
+
+    Args:
+        warm_hosts: Hosts to open TLS connections to (e.g. TUI_HOSTS)
+
+    Returns:
+        concurrent Future (doesn't block the caller)
+    """
+    return async_engine.submit(prewarm_async(list(warm_hosts)))
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Per-Host Rate Limiter
+Token bucket + concurrency semaphore for every outbound request, so bursts
+are queued instead of tripping 429s / Cloudflare challenges
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+# Limits per domain (subdomains inherit the parent domain's limit)
+# rate: requests per second, burst: bucket size, concurrency: max in-flight
+HOST_LIMITS = {
+    'otakudesu.best': {'rate': 2.0, 'burst': 4, 'concurrency': 4},
+    'sokuja.uk': {'rate': 2.0, 'burst': 4, 'concurrency': 4},
+    'samehadaku.how': {'rate': 1.0, 'burst': 2, 'concurrency': 2},
+    'nyaa.si': {'rate': 1.0, 'burst': 3, 'concurrency': 2},
+    'feed.animetosho.org': {'rate': 2.0, 'burst': 4, 'concurrency': 3},
+    'graphql.anilist.co': {'rate': 1.5, 'burst': 5, 'concurrency': 4},  # 90 req/min
+    'api.themoviedb.org': {'rate': 20.0, 'burst': 40, 'concurrency': 10},
+}
+DEFAULT_LIMIT = {'rate': 5.0, 'burst': 10, 'concurrency': 6}
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        waited = 0.0
+        # Lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    waited += pause
+                    continue
+
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+
+                delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a while (after a 429 / Retry-After)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class HostGovernor:
+    """Rate limit + concurrency limit + counters for one host"""
+
+    def __init__(self, host, rate, burst, concurrency):
+        self.host = host
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+        # Counters for tuning
+        self.waiting = 0
+        self.max_waiting = 0
+        self.in_flight = 0
+        self.total = 0
+        self.throttled = 0
+        self.backoffs = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self.semaphore.acquire()
+            try:
+                if await self.bucket.acquire() > 0:
+                    self.throttled += 1
+            except BaseException:
+                self.semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.total += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def set_rate(self, rate):
+        """Change the request rate (e.g. to a quota the host reports)"""
+        self.bucket.rate = rate
+
+    def backoff(self, seconds):
+        self.backoffs += 1
+        self.bucket.pause(seconds)
+
+    def stats(self):
+        return {
+            'queue_depth': self.waiting,
+            'max_queue_depth': self.max_waiting,
+            'in_flight': self.in_flight,
+            'concurrency': self.concurrency,
+            'rate': self.bucket.rate,
+            'total': self.total,
+            'throttled': self.throttled,
+            'backoffs': self.backoffs,
+        }
+
+
+_governors = {}
+
+
+def _limit_key(host):
+    """Find the configured domain for a host (exact match or parent domain)"""
+    parts = host.split('.')
+    for i in range(len(parts) - 1):
+        domain = '.'.join(parts[i:])
+        if domain in HOST_LIMITS:
+            return domain
+    return host
+
+
+def get_governor(url_or_host):
+    """Get the governor for a URL or host (created on first use)"""
+    host = urlparse(url_or_host).hostname if '://' in url_or_host else url_or_host
+    key = _limit_key((host or '').lower())
+
+    if key not in _governors:
+        limits = HOST_LIMITS.get(key, DEFAULT_LIMIT)
+        _governors[key] = HostGovernor(key, limits['rate'], limits['burst'], limits['concurrency'])
+    return _governors[key]
+
+
+def configure(domain, rate=None, burst=None, concurrency=None):
+    """Set limits for a domain (takes effect for new governors)"""
+    limits = dict(HOST_LIMITS.get(domain, DEFAULT_LIMIT))
+    if rate is not None:
+        limits['rate'] = rate
+    if burst is not None:
+        limits['burst'] = burst
+    if concurrency is not None:
+        limits['concurrency'] = concurrency
+    HOST_LIMITS[domain] = limits
+    _governors.pop(domain, None)
+
+
+def limit(url):
+    """Async context manager that queues a request until its host allows it"""
+    return get_governor(url).slot()
+
+
+def stats():
+    """Counters for every host seen so far"""
+    return {host: gov.stats() for host, gov in sorted(_governors.items())}
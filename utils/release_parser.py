@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Release Name Parser
+Parses fansub / scene torrent titles like
+"[SubsPlease] Frieren - 05v2 (1080p) [ABCD1234].mkv" or
+"Frieren.S01E05.1080p.WEB.H264-GROUP" in one regex pass into a compact
+record (group, episode or range, season, resolution, codec, batch flag,
+version, checksum). Results are memoized by title.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Parsed release name (None for anything the title doesn't say)
+Release = namedtuple('Release', [
+    'group', 'title', 'season', 'episode', 'episode_end',
+    'resolution', 'codec', 'batch', 'version', 'checksum',
+])
+
+# One alternative per token kind - finditer walks the title left to right once
+TOKENS = re.compile(r'''
+      ^\s*\[(?P<group>[^\]]+)\]                                          # [Group] prefix
+    | \[(?P<crc>[0-9A-F]{8})\]                                           # [ABCD1234] checksum
+    | \bS(?P<sxe_season>\d{1,2})[\s._-]?E(?P<sxe_ep>\d{1,4})
+      (?:v(?P<sxe_ver>\d))?(?:\s*[-~]\s*E?(?P<sxe_end>\d{1,4}))?\b         # S01E05, S01E01-E12
+    | \s[-–]\s+(?:(?:Episode|Ep\.?|E)\s?)?(?P<dash_ep>\d{1,4})
+      (?:v(?P<dash_ver>\d))?(?:\s*[-~]\s*(?P<dash_end>\d{1,4})(?:v\d)?)?
+      (?=[\s\[(_]|\.(?!\d)|$)                                            # " - 05v2", " - 01 ~ 12"
+    | \b(?:Episode|Ep\.?)\s?(?P<word_ep>\d{1,4})(?:v(?P<word_ver>\d))?\b   # Episode 5, Ep05
+    | \b(?P<nth_season>\d{1,2})(?:st|nd|rd|th)\s+Season\b                 # 2nd Season
+    | \b(?:Season|S)\s?(?P<season>\d{1,2})\b                              # Season 2, S2
+    | \b(?P<res>2160|1440|1080|720|576|480|360)[pi]\b                     # 1080p
+    | \b\d{3,4}x(?P<res_h>\d{3,4})\b                                     # 1920x1080
+    | \b(?P<res_tag>4K|UHD|FHD|HD)\b                                     # FHD
+    | \b(?P<codec>[xh]\.?26[45]|HEVC|AVC|AV1|VP9)\b                      # x265, HEVC
+    | \b(?P<batch>Batch|Complete(?:\s+Series)?|BD\s?Box|Season\s+Pack)\b  # Batch
+    | [(\[](?P<range_start>\d{1,4})\s*[-~]\s*(?P<range_end>\d{1,4})[)\]]   # (01-12)
+    | \bv(?P<ver>[2-9])\b                                                # v2
+    | -(?P<scene_group>[A-Za-z0-9]+)(?:\.[a-z0-9]{2,4})?\s*$              # ...H264-GROUP.mkv
+    | (?<![\w.])(?P<num>\d{1,4})(?![\w.])                                 # Bare number
+''', re.I | re.X)
+
+RES_TAGS = {'4K': '2160P', 'UHD': '2160P', 'FHD': '1080P', 'HD': '720P'}
+# Source tags that look like a scene group suffix (WEB-DL)
+NOT_GROUPS = {'DL', 'RIP', 'DLRIP'}
+
+CODECS = {'X264': 'x264', 'H264': 'x264', 'AVC': 'x264', 'X265': 'x265', 'H265': 'x265', 'HEVC': 'x265'}
+
+# Numbers that are part of the show title (Kaiju No. 8)
+NUMBERED_TITLE = re.compile(r'(?:\bNo\.?|#)\s*$', re.I)
+
+MAGNET_HASH = re.compile(r'btih:([a-fA-F0-9]{40})')
+
+# Where the show title ends: first bracket/paren after the group
+TITLE_END = re.compile(r'[\[(]')
+
+
+def _title(text, group_end, cut):
+    """Show title between the group and the first episode/metadata token"""
+    match = TITLE_END.search(text, group_end)
+    end = min(cut, match.start()) if match else cut
+    title = text[group_end:end]
+    if ' ' not in title.strip():
+        title = title.replace('.', ' ').replace('_', ' ')
+    return title.strip(' -_.|') or None
+
+
+@lru_cache(maxsize=4096)
+def parse(name):
+    """
+    Parse a release name
+
+    Args:
+        name: Torrent / file title
+
+    Returns:
+        Release record
+    """
+    fields = dict.fromkeys(Release._fields)
+    fields['batch'] = False
+    group_end = 0
+    cut = len(name)
+    numbers = []
+    season_end = None  # End of a "Season 2" marker (not SxxEyy)
+
+    def first(key, value):
+        if fields[key] is None:
+            fields[key] = value
+
+    for m in TOKENS.finditer(name):
+        kind = m.lastgroup
+        if kind == 'group':
+            fields['group'] = m.group('group').strip()
+            group_end = m.end()
+            continue
+        if kind == 'num':
+            numbers.append((m.start(), int(m.group('num'))))
+            continue
+
+        # Everything after the first non-group token is metadata, not title
+        cut = min(cut, m.start())
+
+        if kind == 'crc':
+            first('checksum', m.group('crc').upper())
+        elif m.group('sxe_ep') is not None:
+            first('season', int(m.group('sxe_season')))
+            first('episode', int(m.group('sxe_ep')))
+            if m.group('sxe_end'):
+                first('episode_end', int(m.group('sxe_end')))
+            if m.group('sxe_ver'):
+                first('version', int(m.group('sxe_ver')))
+        elif m.group('dash_ep') is not None:
+            first('episode', int(m.group('dash_ep')))
+            if m.group('dash_end'):
+                first('episode_end', int(m.group('dash_end')))
+            if m.group('dash_ver'):
+                first('version', int(m.group('dash_ver')))
+        elif m.group('word_ep') is not None:
+            first('episode', int(m.group('word_ep')))
+            if m.group('word_ver'):
+                first('version', int(m.group('word_ver')))
+        elif kind in ('nth_season', 'season'):
+            first('season', int(m.group(kind)))
+            if season_end is None:
+                season_end = m.end()
+        elif kind == 'res':
+            first('resolution', m.group('res') + 'P')
+        elif kind == 'res_h':
+            first('resolution', m.group('res_h') + 'P')
+        elif kind == 'res_tag':
+            first('resolution', RES_TAGS[m.group('res_tag').upper()])
+        elif kind == 'codec':
+            codec = m.group('codec').upper().replace('.', '')
+            first('codec', CODECS.get(codec, codec))
+        elif kind == 'batch':
+            fields['batch'] = True
+        elif m.group('range_start') is not None:
+            first('episode', int(m.group('range_start')))
+            first('episode_end', int(m.group('range_end')))
+        elif kind == 'ver':
+            first('version', int(m.group('ver')))
+        elif kind == 'scene_group':
+            if m.group('scene_group').upper() not in NOT_GROUPS:
+                first('group', m.group('scene_group'))
+
+    if fields['episode'] is None:
+        # "[Group] Show 05 [1080p]" - a bare number is the episode (skip years, "No. 8").
+        # After a season marker only numbers outside brackets count ("Show S2 05 [1080p]")
+        if season_end is None:
+            start, end = group_end, cut
+        else:
+            bracket = TITLE_END.search(name, season_end)
+            start, end = season_end, bracket.start() if bracket else len(name)
+        candidates = [
+            (pos, n) for pos, n in numbers
+            if start <= pos < end and not 1950 <= n <= 2100 and not NUMBERED_TITLE.search(name, 0, pos)
+        ]
+        if candidates:
+            pos, fields['episode'] = candidates[-1]
+            cut = min(cut, pos)
+        elif season_end is not None:
+            # "Show (Season 2) [1080p]" is a season pack
+            fields['batch'] = True
+
+    if fields['episode_end'] is not None and fields['episode_end'] > (fields['episode'] or 0):
+        fields['batch'] = True
+    else:
+        fields['episode_end'] = None
+
+    fields['title'] = _title(name, group_end, cut)
+    return Release(**fields)
+
+
+def matches_episode(release, episode):
+    """
+    Check if a release is exactly one wanted episode
+
+    Returns:
+        False for batches and other episodes, True otherwise (releases
+        without an episode number are kept - movies, specials)
+    """
+    if release.batch:
+        return False
+    return release.episode is None or release.episode == episode
+
+
+def info_hash(magnet_uri):
+    """Lowercase BitTorrent info hash of a magnet URI (None if there is none)"""
+    if not magnet_uri:
+        return None
+    match = MAGNET_HASH.search(magnet_uri)
+    return match.group(1).lower() if match else None
+
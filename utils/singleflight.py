@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Singleflight
+Coalesce identical in-flight lookups: concurrent callers with the same key
+await one shared task instead of starting duplicate scrapes
+"""
+
+import asyncio
+import functools
+
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+        # Callers currently awaiting the task
+        self.waiters = 0
+
+
+class Group:
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key, func, *args):
+        """
+        Run func(*args) once per key while it is in flight
+
+        Each caller can give up without affecting the others; when the last
+        one is cancelled the shared task is cancelled too, so abandoned
+        scrapes stop using connections and rate-limit tokens.
+
+        Args:
+            key: Hashable lookup key
+            func: Coroutine function
+            *args: Arguments for func
+
+        Returns:
+            The shared result
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func(*args)))
+            self._calls[key] = call
+            call.task.add_done_callback(functools.partial(self._forget, key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # Shield so one caller giving up doesn't cancel the others' lookup
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # Nobody is left waiting - stop the work and let new callers start afresh
+                call.task.cancel()
+                self._forget(key, call)
+                self.abandoned += 1
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _forget(self, key, call, task=None):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        return {
+            'in_flight': len(self._calls),
+            'started': self.started,
+            'coalesced': self.coalesced,
+            'abandoned': self.abandoned,
+        }
+
+
+# Shared group for all coalesced lookups
+group = Group()
+
+
+def coalesce(func):
+    """Decorator: coalesce concurrent calls of a coroutine function by its args"""
+    @functools.wraps(func)
+    async def wrapper(*args):
+        return await group.do((func.__qualname__,) + args, func, *args)
+    return wrapper
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Local Storage Helpers
+Cache directory and SQLite connections for the on-disk caches. Each thread
+keeps one connection per database; async code runs its SQLite work on a
+dedicated storage thread (run()) so a locked or slow database never stalls
+the event loop.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Cache path: ~/.cache/anime-tui (override with ANIME_TUI_CACHE_DIR,
+# e.g. /tmp/anime-tui on read-only serverless filesystems)
+CACHE_DIR = Path(os.environ.get('ANIME_TUI_CACHE_DIR', Path.home() / '.cache' / 'anime-tui'))
+
+# Seconds a statement waits for another process's write lock - the caches are
+# best effort, so a busy database is a cache miss rather than a stall
+BUSY_TIMEOUT = 0.25
+
+_local = threading.local()
+
+# One thread for all SQLite work started from the event loop
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage')
+
+
+def cache_dir():
+    """Get the cache directory (created if missing)"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return CACHE_DIR
+
+
+def connect(db_name):
+    """Open a SQLite database in the cache directory (WAL mode, shared by all processes)"""
+    conn = sqlite3.connect(cache_dir() / db_name, timeout=BUSY_TIMEOUT)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def connection(db_name, pragmas=()):
+    """
+    This thread's connection to a database (opened on first use, then kept)
+
+    Args:
+        db_name: Database file in the cache directory
+        pragmas: Extra PRAGMA statements run when the connection is opened
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_name)
+    if conn is None:
+        conn = connect(db_name)
+        for pragma in pragmas:
+            conn.execute(pragma)
+        connections[db_name] = conn
+    return conn
+
+
+async def run(func, *args):
+    """Run blocking SQLite work on the storage thread (keeps the event loop free)"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(func, *args))
+
+
+class SQLiteCache:
+    """
+    Base for the on-disk caches: one database in the cache directory, used
+    through this thread's kept connection. If the database can't be opened
+    (read-only filesystem etc) the cache is disabled: reads miss and writes
+    are dropped. Read / write errors are logged and treated the same way.
+
+    Subclasses set:
+        LABEL: Name in log messages
+        TABLE: Main table (count() / clear())
+        SCHEMA: CREATE statements run at startup
+        EXPIRES: SQL expression for a row's expiry time - expired rows are
+                 purged at startup and by purge() (None: rows never expire)
+        PRAGMAS: Extra PRAGMA statements for new connections
+    """
+    LABEL = 'Cache'
+    TABLE = None
+    SCHEMA = ()
+    EXPIRES = None
+    PRAGMAS = ()
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self.enabled = True
+        try:
+            self.init_database()
+        except Exception as e:
+            # Read-only filesystem etc - run without the cache
+            logger.warning(f"{self.LABEL} disabled: {e}")
+            self.enabled = False
+
+    def connection(self):
+        return connection(self.db_name, self.PRAGMAS)
+
+    def init_database(self):
+        """Create the tables and drop expired rows (raises if the database is unusable)"""
+        conn = self.connection()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            if self.EXPIRES:
+                conn.execute(f'DELETE FROM {self.TABLE} WHERE {self.EXPIRES} < ?', (time.time(),))
+
+    def fetchone(self, sql, args=()):
+        """First row of a query (None if there is none, or the cache is disabled / failing)"""
+        if not self.enabled:
+            return None
+        try:
+            return self.connection().execute(sql, args).fetchone()
+        except Exception as e:
+            logger.warning(f"{self.LABEL} read error: {e}")
+            return None
+
+    def write(self, sql, args=(), many=False):
+        """
+        Run a write in its own transaction (rolled back on error)
+
+        Args:
+            sql: Statement
+            args: Parameters (a list of parameter tuples if many)
+            many: executemany() instead of execute()
+
+        Returns:
+            True if it was committed
+        """
+        if not self.enabled:
+            return False
+        try:
+            conn = self.connection()
+            with conn:
+                if many:
+                    conn.executemany(sql, args)
+                else:
+                    conn.execute(sql, args)
+            return True
+        except Exception as e:
+            logger.warning(f"{self.LABEL} write error: {e}")
+            return False
+
+    def purge(self):
+        """Drop expired rows"""
+        if self.EXPIRES:
+            self.write(f'DELETE FROM {self.TABLE} WHERE {self.EXPIRES} < ?', (time.time(),))
+
+    def count(self):
+        """Rows in the main table (None if unknown)"""
+        row = self.fetchone(f'SELECT COUNT(*) FROM {self.TABLE}')
+        return row[0] if row else None
+
+    def clear(self):
+        """Remove all rows of the main table"""
+        self.write(f'DELETE FROM {self.TABLE}')
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Stream Result Cache
+Persistent stale-while-revalidate cache for final /stream responses keyed by
+"{type}/{id}". Fresh entries are served as is; stale ones are served at once
+while the caller refreshes them in the background.
+"""
+
+import json
+import time
+
+from utils import storage
+
+# Seconds a complete result is served without looking again
+FRESH_TTL = 20 * 60
+
+# Seconds after fetching that a result may still be served while it is refreshed
+STALE_TTL = 6 * 60 * 60
+
+# Empty results are only trusted briefly (and never served stale)
+RETRY_TTL = 2 * 60
+
+
+class CachedStreams:
+    def __init__(self, key, streams, fetched_at, fresh_until, stale_until):
+        self.key = key
+        self.streams = streams
+        self.fetched_at = fetched_at
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+    def is_fresh(self):
+        return time.time() < self.fresh_until
+
+    def is_usable(self):
+        """Fresh, or stale but still inside the stale window"""
+        return time.time() < self.stale_until
+
+
+class StreamCache(storage.SQLiteCache):
+    LABEL = 'Stream cache'
+    TABLE = 'streams'
+    SCHEMA = ('''
+        CREATE TABLE IF NOT EXISTS streams (
+            key TEXT PRIMARY KEY,
+            streams TEXT,
+            fetched_at REAL,
+            fresh_until REAL,
+            stale_until REAL
+        )
+    ''',)
+    EXPIRES = 'stale_until'
+
+    def __init__(self, db_name='stream_cache.db'):
+        self.hits = {'fresh': 0, 'stale': 0, 'miss': 0}
+        super().__init__(db_name)
+
+    def get(self, key):
+        """
+        Get a usable cached result
+
+        Returns:
+            CachedStreams (fresh or stale) or None if missing / past the stale window
+        """
+        entry = self._load(key)
+        if entry is None or not entry.is_usable():
+            self.hits['miss'] += 1
+            return None
+        self.hits['fresh' if entry.is_fresh() else 'stale'] += 1
+        return entry
+
+    def is_fresh(self, key):
+        """True if a fresh result is cached (not counted as a hit or miss)"""
+        entry = self._load(key)
+        return entry is not None and entry.is_fresh()
+
+    def _load(self, key):
+        row = self.fetchone(
+            'SELECT key, streams, fetched_at, fresh_until, stale_until FROM streams WHERE key = ?',
+            (key,)
+        )
+        if not row:
+            return None
+        return CachedStreams(row[0], json.loads(row[1]), row[2], row[3], row[4])
+
+    def store(self, key, streams, complete=True):
+        """
+        Store a lookup result
+
+        Args:
+            key: "{type}/{id}"
+            streams: Final stream list
+            complete: False if the lookup was cut short by the deadline - partial
+                streams are stored already stale (served, but looked up again)
+        """
+        if not complete and not streams:
+            # Nothing found before the deadline says nothing about the episode
+            return
+        now = time.time()
+        if complete:
+            fresh_ttl = FRESH_TTL if streams else RETRY_TTL
+        else:
+            fresh_ttl = 0
+        stale_ttl = STALE_TTL if streams else RETRY_TTL
+        self.write('''
+            INSERT OR REPLACE INTO streams (key, streams, fetched_at, fresh_until, stale_until)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (key, json.dumps(streams), now, now + fresh_ttl, now + stale_ttl))
+
+    def stats(self):
+        return dict(self.hits, enabled=self.enabled)
+
+
+# Global instance
+stream_cache = StreamCache()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Stream Engine
+Provider-independent search -> episodes -> links -> resolve pipeline on top
+of scrapers/registry.py, shared by the TUI, web app and Stremio addon.
+Circuit breakers, concurrency and the caches below apply to every front-end.
+"""
+
+import asyncio
+import logging
+import re
+
+from scrapers import registry
+from utils import async_engine, circuit_breaker, title_matcher
+
+logger = logging.getLogger(__name__)
+
+EPISODE_TITLE = re.compile(r'episode\s+(\d+)', re.I)
+
+
+class UnknownProvider(ValueError):
+    """Raised for a provider key that isn't in the registry"""
+
+
+def _provider(key):
+    provider = registry.get(key)
+    if provider is None:
+        raise UnknownProvider(f"Unknown provider: {key}")
+    return provider
+
+
+def search(key, query):
+    """Search one provider"""
+    return async_engine.run(search_async(key, query))
+
+
+async def search_async(key, query):
+    """Async version of search()"""
+    provider = _provider(key)
+    # Site known to be down - skip instead of waiting for the timeout
+    if not circuit_breaker.is_available(provider.base_url):
+        logger.info(f"{provider.name}: circuit open, skipped")
+        return []
+    return await provider.search(query) or []
+
+
+def search_all(query, keys=None):
+    """
+    Search several providers concurrently
+
+    Args:
+        query: Anime title
+        keys: Provider keys (default: every provider with episode pages)
+
+    Returns:
+        Results in provider order, each tagged with 'provider' and 'provider_display'
+    """
+    return async_engine.run(search_all_async(query, keys))
+
+
+async def search_all_async(query, keys=None):
+    """Async version of search_all()"""
+    keys = list(keys or registry.EPISODE_PROVIDERS)
+    answers = await asyncio.gather(*(search_async(key, query) for key in keys), return_exceptions=True)
+
+    all_results = []
+    for key, results in zip(keys, answers):
+        if isinstance(results, BaseException):
+            logger.warning(f"{key} search error: {results}")
+            continue
+        provider = registry.get(key)
+        for r in results:
+            all_results.append(dict(r, provider=key, provider_display=provider.name))
+    return all_results
+
+
+def episodes(key, anime_url):
+    """Episode list of an anime on one provider"""
+    return async_engine.run(episodes_async(key, anime_url))
+
+
+async def episodes_async(key, anime_url):
+    """Async version of episodes()"""
+    provider = _provider(key)
+    if provider.episodes is None:
+        return []
+    return await provider.episodes(anime_url) or []
+
+
+def links(key, episode_url):
+    """Video links of an episode on one provider"""
+    return async_engine.run(links_async(key, episode_url))
+
+
+async def links_async(key, episode_url):
+    """Async version of links()"""
+    provider = _provider(key)
+    if provider.links is None:
+        return []
+    return await provider.links(episode_url) or []
+
+
+def resolve(url, server_name=""):
+    """
+    Resolve a link URL to something playable
+
+    Returns:
+        Direct URL string, {'url': ..., 'headers': ...} dict, or None
+    """
+    return async_engine.run(resolve_async(url, server_name))
+
+
+async def resolve_async(url, server_name=""):
+    """Async version of resolve()"""
+    # Special provider URLs (otakudesu:..., ajax:...)
+    resolver = registry.resolver_for(url)
+    if resolver is not None:
+        return await resolver(url)
+
+    from utils import embed_resolvers
+    if 'desustream.com/safelink' in url:
+        return await embed_resolvers.unwrap_safelink_async(url)
+    return await embed_resolvers.resolve_embed_url_async(url, server_name)
+
+
+def match_season(results, season, titles=()):
+    """
+    Best search result for a season (season=None: any season)
+
+    Results are scored against all known titles by utils/title_matcher.py;
+    None if none of them is confidently the show (saves a wasted episode /
+    link chain). Without titles the best season match is returned.
+    """
+    return title_matcher.best_match(results, titles, season)
+
+
+def match_episode(episodes, episode_number):
+    """Match episode by number (episode_number field, else "Episode N" in the title)"""
+    for ep in episodes:
+        try:
+            if int(ep.get('episode_number')) == int(episode_number):
+                return ep
+        except (TypeError, ValueError):
+            match = EPISODE_TITLE.search(ep.get('title', ''))
+            if match and int(match.group(1)) == int(episode_number):
+                return ep
+    return None
+
+
+def find_episode_links(key, title, season, episode, known_titles=()):
+    """
+    Search -> pick the season -> pick the episode -> video links on one provider
+
+    Args:
+        key: Provider key
+        title: Search query
+        season: Season number (None: any)
+        episode: Episode number
+        known_titles: Other titles of the show, used to pick the search result
+    """
+    return async_engine.run(find_episode_links_async(key, title, season, episode, known_titles))
+
+
+async def find_episode_links_async(key, title, season, episode, known_titles=()):
+    """Async version of find_episode_links()"""
+    results = await search_async(key, title)
+    anime = match_season(results, season, [title, *known_titles])
+    if not anime:
+        return []
+
+    ep_data = match_episode(await episodes_async(key, anime['url']), episode)
+    if not ep_data:
+        return []
+
+    return await links_async(key, ep_data['url'])
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Title Matcher
+Scores provider search results against every known title of a show
+(AniList romaji / English / synonyms) and the wanted season. Titles are
+normalized first - romanization (ou/ō/oo -> o), punctuation, "Sub Indo"
+noise - and season / part / cour markers and years are read out so
+"Season 2", "2nd Season", "II" and "第2期" all count as season 2.
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Best candidate below this confidence is treated as "not on this site"
+MIN_CONFIDENCE = 0.5
+
+# Share of the confidence a season mismatch can take away
+SEASON_WEIGHT = 0.5
+
+# Season score for a candidate without any season marker when season > 1
+# (sequels are often named by arc: "Kimetsu no Yaiba: Yuukaku-hen")
+UNMARKED_SEQUEL = 0.45
+FINAL_SEASON = 0.7
+
+# Second cour of the right season: slightly behind the first
+LATER_PART = 0.9
+
+# Confidence multipliers: movie / OVA / recap when a series is wanted, and
+# a release year that is missing / different when the year is known
+SPIN_OFF_PENALTY = 0.75
+NO_YEAR = 0.95
+OTHER_YEAR = 0.8
+
+NOISE = re.compile(
+    r'sub(?:title)?\s*indo(?:nesia)?|\bbatch\b|\bbd\b|\bblu-?ray\b|\bend\b|\b(?:episode|eps?)\s*\d+(?:\s*-\s*\d+)?'
+    r'|\bdub(?:bed)?\b|\buncensored\b',
+    re.I
+)
+SEASON_PATTERNS = [
+    re.compile(r'\bseason\s*(\d+)\b', re.I),
+    re.compile(r'\b(\d+)(?:st|nd|rd|th)\s+season\b', re.I),
+    re.compile(r'\bs(\d+)\b', re.I),
+    re.compile(r'第\s*(\d+)\s*期'),
+]
+PART_PATTERN = re.compile(r'\b(?:part|cour)\s*(\d+)\b|\b(\d+)(?:st|nd|rd|th)\s+(?:part|cour)\b', re.I)
+FINAL_PATTERN = re.compile(r'\b(?:the\s+)?final\s+season\b', re.I)
+# Upper-case numerals anywhere ("Mushoku Tensei II: ..."), any case at the end
+ROMAN_PATTERN = re.compile(r'\b(II|III|IV|VI|VII|VIII|IX)\b')
+TRAILING_ROMAN = re.compile(r'\s(ii|iii|iv|v|vi|vii|viii|ix)\s*$', re.I)
+# "Overlord 4" but not "Kaiju No. 8"
+TRAILING_NUMBER = re.compile(r'(?<!\bno)\s([2-9])\s*$', re.I)
+YEAR_PATTERN = re.compile(r'\(?\b(19[6-9]\d|20[0-4]\d)\b\)?')
+SPIN_OFF_PATTERN = re.compile(r'\b(?:movie|film|ova|ona|oad|special|specials|recap|gekijouban)\b', re.I)
+PUNCTUATION = re.compile(r"[^\w\s]+")
+SPACES = re.compile(r'\s+')
+
+ROMAN = {'ii': 2, 'iii': 3, 'iv': 4, 'v': 5, 'vi': 6, 'vii': 7, 'viii': 8, 'ix': 9}
+
+# Long vowels are written ou / uu / oo / ō / oh - compare them as one letter
+ROMANIZATION = [
+    (re.compile(r'ou'), 'o'),
+    (re.compile(r'uu'), 'u'),
+    (re.compile(r'oo'), 'o'),
+    (re.compile(r'aa'), 'a'),
+    (re.compile(r'ii'), 'i'),
+    (re.compile(r'ee'), 'e'),
+    (re.compile(r'\bwo\b'), 'o'),
+]
+
+ParsedTitle = namedtuple('ParsedTitle', ['base', 'compact', 'tokens', 'season', 'part', 'final', 'year', 'spin_off'])
+
+Match = namedtuple('Match', ['result', 'confidence', 'title_score', 'season_score', 'season', 'matched_title'])
+
+
+def normalize(text):
+    """Lowercase ASCII form with romanization variants folded and punctuation removed"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = text.replace('&', ' and ')
+    text = PUNCTUATION.sub(' ', text)
+    for pattern, replacement in ROMANIZATION:
+        text = pattern.sub(replacement, text)
+    return SPACES.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=4096)
+def parse_title(title):
+    """
+    Split a title into a normalized base title and its markers
+
+    Returns:
+        ParsedTitle (season/part/year None when the title doesn't say)
+    """
+    text = NOISE.sub(' ', title)
+
+    year = None
+    match = YEAR_PATTERN.search(text)
+    if match:
+        year = int(match.group(1))
+        text = text[:match.start()] + ' ' + text[match.end():]
+
+    final = bool(FINAL_PATTERN.search(text))
+    text = FINAL_PATTERN.sub(' ', text)
+
+    part = None
+    match = PART_PATTERN.search(text)
+    if match:
+        part = int(match.group(1) or match.group(2))
+        text = text[:match.start()] + ' ' + text[match.end():]
+
+    season = None
+    for pattern in SEASON_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            season = int(match.group(1))
+            text = text[:match.start()] + ' ' + text[match.end():]
+            break
+
+    if season is None:
+        # "Mushoku Tensei II", "Overlord 4" (checked after punctuation is gone)
+        stripped = ' ' + SPACES.sub(' ', PUNCTUATION.sub(' ', text)).strip()
+        match = ROMAN_PATTERN.search(stripped) or TRAILING_ROMAN.search(stripped) or TRAILING_NUMBER.search(stripped)
+        if match:
+            numeral = match.group(1).lower()
+            season = ROMAN.get(numeral) or int(numeral)
+            text = stripped[:match.start()] + ' ' + stripped[match.end():]
+
+    spin_off = bool(SPIN_OFF_PATTERN.search(text))
+    base = normalize(text)
+    return ParsedTitle(base, base.replace(' ', ''), frozenset(base.split()), season, part, final, year, spin_off)
+
+
+@lru_cache(maxsize=8192)
+def title_similarity(a, b):
+    """
+    0..1 similarity of two parsed titles
+
+    Token containment when one title is the other plus a subtitle ("Maou
+    Gakuin" vs "Maou Gakuin no Futekigousha"), else character similarity
+    weighted by shared words (a shared prefix alone isn't the same show).
+    """
+    if not a.base or not b.base:
+        return 0.0
+    if a.compact == b.compact:
+        # "Dandadan" / "Dan Da Dan"
+        return 1.0
+
+    shorter, longer = (a, b) if len(a.tokens) <= len(b.tokens) else (b, a)
+    common = len(shorter.tokens & longer.tokens)
+    containment = common / len(shorter.tokens)
+    # Containment alone overrates one-word titles ("Naruto" in "Boruto: Naruto Next Generations")
+    coverage = common / len(longer.tokens)
+
+    score = containment * (0.7 + 0.3 * coverage)
+    weight = 0.5 + 0.5 * containment
+    matcher = SequenceMatcher(None, a.base, b.base, autojunk=False)
+    # Upper bounds first - the full ratio is most of the cost
+    if matcher.real_quick_ratio() * weight <= score or matcher.quick_ratio() * weight <= score:
+        return score
+    return max(score, matcher.ratio() * weight)
+
+
+def season_similarity(candidate, season, plain=False):
+    """
+    0..1 agreement of a candidate's season markers with the wanted season
+
+    plain: the candidate is exactly a known title with no subtitle, which
+    without a marker is the first season ("Tokyo Revengers" vs "Tokyo
+    Revengers: Seiya Kessen-hen")
+    """
+    if season is None:
+        return 1.0
+    if candidate.season is not None:
+        if candidate.season != season:
+            return 0.0
+        return LATER_PART if candidate.part and candidate.part > 1 else 1.0
+    if season == 1:
+        # No marker = first season (a "Part 2" or "Final Season" alone isn't)
+        return 0.3 if candidate.final or candidate.part and candidate.part > 1 else 1.0
+    if candidate.final:
+        return FINAL_SEASON
+    return 0.0 if plain else UNMARKED_SEQUEL
+
+
+def rank(results, titles=(), season=None, year=None):
+    """
+    Score every search result against all known titles in one pass
+
+    Args:
+        results: Search results with a 'title' key
+        titles: Known titles of the show (empty: rank by season only)
+        season: Wanted season number, None for any
+        year: Release year if known (a different year costs some confidence)
+
+    Returns:
+        Matches, best first (ties keep the site's order)
+    """
+    titles = [t for t in titles if t]
+    wanted = [parse_title(t) for t in titles]
+    wants_spin_off = any(w.spin_off for w in wanted)
+    # "Hunter x Hunter (2011)" - a year in a known title counts as the show's year
+    year = year or next((w.year for w in wanted if w.year), None)
+
+    matches = []
+    for result in results:
+        candidate = parse_title(result.get('title') or '')
+
+        title_score, matched = (0.0, None) if wanted else (1.0, None)
+        for w, t in zip(wanted, titles):
+            score = title_similarity(w, candidate)
+            if score > title_score:
+                title_score, matched = score, t
+                if score == 1.0:
+                    break
+
+        plain = any(w.compact == candidate.compact for w in wanted)
+        season_score = season_similarity(candidate, season, plain)
+        confidence = title_score * (1 - SEASON_WEIGHT * (1 - season_score))
+
+        if candidate.spin_off and not wants_spin_off:
+            confidence *= SPIN_OFF_PENALTY
+        if year and candidate.year != year:
+            confidence *= NO_YEAR if candidate.year is None else OTHER_YEAR
+
+        season_found = candidate.season if candidate.season is not None else (1 if not candidate.final else None)
+        matches.append(Match(result, round(confidence, 3), round(title_score, 3), season_score, season_found, matched))
+
+    matches.sort(key=lambda m: m.confidence, reverse=True)
+    return matches
+
+
+def clear_caches():
+    """Forget parsed titles and similarities (benchmarks)"""
+    parse_title.cache_clear()
+    title_similarity.cache_clear()
+
+
+def best_match(results, titles=(), season=None, year=None, min_confidence=MIN_CONFIDENCE):
+    """Best result, or None if nothing reaches min_confidence (only checked when titles are known)"""
+    matches = rank(results, titles, season, year)
+    if matches and (matches[0].confidence >= min_confidence or not any(titles)):
+        return matches[0].result
+    return None
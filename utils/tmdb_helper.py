@@ -3,19 +3,22 @@ TMDB Helper for metadata matching
 Converts IMDb/TMDB IDs to anime titles for scraper searches
 """
 
-import requests
+from utils import http_client, async_engine
+from utils.metadata_cache import cached
 import logging
-from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Seconds show metadata / IMDb mappings are kept in the metadata cache
+METADATA_TTL = 24 * 60 * 60
+MAPPING_TTL = 30 * 24 * 60 * 60
+
 class TMDBHelper:
     def __init__(self, api_key=None):
         # TMDB API key (free for non-commercial use)
         self.api_key = api_key or "3860b57595ccaead6c727d84327e5ff0"
         self.base_url = "https://api.themoviedb.org/3"
-    
-    @lru_cache(maxsize=200)
+
     def get_anime_metadata(self, id_str, season=1, episode=1):
         """
         Get anime metadata from IMDb/TMDB ID with alternative titles
@@ -26,117 +29,150 @@ class TMDBHelper:
             'alternative_titles': ['Naruto Shippuuden', ...]
         }
         """
+        return async_engine.run(self.get_anime_metadata_async(id_str, season, episode))
+
+    async def get_anime_metadata_async(self, id_str, season=1, episode=1):
+        """Async version of get_anime_metadata()"""
         try:
-            # Check if IMDb or TMDB ID
-            if id_str.startswith('tt'):
-                # IMDb ID - convert to TMDB first
-                tmdb_id = self.imdb_to_tmdb(id_str)
-                if not tmdb_id:
-                    logger.warning(f"Could not convert IMDb {id_str} to TMDB")
-                    return None
-            else:
-                tmdb_id = id_str
-            
-            # Get TV show details
-            url = f"{self.base_url}/tv/{tmdb_id}"
-            params = {'api_key': self.api_key}
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
-                logger.warning(f"TMDB API error: {response.status_code}")
-                return None
-            
-            data = response.json()
-            
-            # Extract titles
-            title = data.get('name', '')
-            original_title = data.get('original_name', '')
-            
-            # Get alternative titles (including romaji)
-            alt_titles = self.get_alternative_titles(tmdb_id)
-            
-            # Try to get episode-specific data
-            episode_title = self.get_episode_title(tmdb_id, season, episode)
-            
-            logger.info(f"TMDB metadata: title={title}, original={original_title}, alts={alt_titles}")
-            
-            return {
-                'title': title,
-                'original_title': original_title,
-                'romaji': original_title if original_title else title,  # Prefer original
-                'alternative_titles': alt_titles,
-                'episode_title': episode_title,
-                'all_titles': [title, original_title] + alt_titles  # For searching
-            }
-        
+            show = await self._fetch_show(id_str, season)
         except Exception as e:
             logger.error(f"TMDB metadata error: {e}")
             return None
-    
-    @lru_cache(maxsize=200)
+        if show is None:
+            return None
+
+        title = show['title']
+        original_title = show['original_title']
+        alt_titles = show['alternative_titles']
+        return {
+            'title': title,
+            'original_title': original_title,
+            'romaji': original_title if original_title else title,  # Prefer original
+            'alternative_titles': alt_titles,
+            'episode_title': show['episode_titles'].get(str(episode)),
+            'all_titles': [title, original_title] + alt_titles  # For searching
+        }
+
+    @cached('tmdb.show', METADATA_TTL)
+    async def _fetch_show(self, id_str, season):
+        """
+        One show + season lookup shared by all processes and every episode
+        of the season (API errors raise and aren't cached)
+
+        Returns:
+            Dict with title, original_title, alternative_titles and
+            episode_titles ({"episode number": title}), or None if unknown
+        """
+        # Check if IMDb or TMDB ID
+        if id_str.startswith('tt'):
+            # IMDb ID - convert to TMDB first
+            tmdb_id = await self._find_tmdb_id(id_str)
+            if not tmdb_id:
+                logger.warning(f"Could not convert IMDb {id_str} to TMDB")
+                return None
+        else:
+            tmdb_id = id_str
+
+        # Show details + alternative titles + the season's episodes in one request
+        data = await self.get_show_async(tmdb_id, season)
+        if data is None:
+            return None
+
+        title = data.get('name', '')
+        original_title = data.get('original_name', '')
+        alt_titles = self._alternative_titles(data)
+        season_data = data.get(f"season/{season}") or {}
+
+        logger.info(f"TMDB metadata: title={title}, original={original_title}, alts={alt_titles}")
+
+        return {
+            'title': title,
+            'original_title': original_title,
+            'alternative_titles': alt_titles,
+            # String keys - the entry round-trips through JSON
+            'episode_titles': {
+                str(ep.get('episode_number')): ep.get('name', '') for ep in season_data.get('episodes', [])
+            },
+        }
+
+    async def get_show_async(self, tmdb_id, season=None):
+        """
+        TV show details with alternative_titles (and season/N) appended
+
+        Returns:
+            Show JSON or None if TMDB doesn't know it. Other API errors raise.
+        """
+        appended = ['alternative_titles']
+        if season is not None:
+            appended.append(f"season/{season}")
+
+        params = {'api_key': self.api_key, 'append_to_response': ','.join(appended)}
+        # Show pages change rarely - keep them in the page cache (ETag revalidation)
+        response = await http_client.aget(f"{self.base_url}/tv/{tmdb_id}", params=params, timeout=10, cache='anime')
+        if response.status_code == 404:
+            logger.warning(f"TMDB show {tmdb_id} not found")
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _alternative_titles(self, data):
+        """Alternative titles from an appended alternative_titles block"""
+        titles = []
+        for result in data.get('alternative_titles', {}).get('results', []):
+            alt_title = result.get('title', '')
+            if alt_title and alt_title not in titles:
+                titles.append(alt_title)
+
+        return titles[:5]  # Limit to 5 alternatives
+
     def get_alternative_titles(self, tmdb_id):
         """Get all alternative titles including romaji"""
         try:
-            url = f"{self.base_url}/tv/{tmdb_id}/alternative_titles"
-            params = {'api_key': self.api_key}
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
-                return []
-            
-            data = response.json()
-            titles = []
-            
-            for result in data.get('results', []):
-                alt_title = result.get('title', '')
-                if alt_title and alt_title not in titles:
-                    titles.append(alt_title)
-            
-            return titles[:5]  # Limit to 5 alternatives
-        
+            data = async_engine.run(self.get_show_async(tmdb_id))
+            return self._alternative_titles(data) if data else []
         except Exception as e:
             logger.error(f"Alternative titles error: {e}")
             return []
-    
-    @lru_cache(maxsize=100)
+
     def imdb_to_tmdb(self, imdb_id):
         """Convert IMDb ID to TMDB ID"""
+        return async_engine.run(self.imdb_to_tmdb_async(imdb_id))
+
+    async def imdb_to_tmdb_async(self, imdb_id):
+        """Async version of imdb_to_tmdb()"""
         try:
-            url = f"{self.base_url}/find/{imdb_id}"
-            params = {
-                'api_key': self.api_key,
-                'external_source': 'imdb_id'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            
-            # Check TV results
-            if data.get('tv_results'):
-                return data['tv_results'][0]['id']
-            
-            return None
-        
+            return await self._find_tmdb_id(imdb_id)
         except Exception as e:
             logger.error(f"IMDb to TMDB error: {e}")
             return None
-    
+
+    @cached('tmdb.imdb', MAPPING_TTL)
+    async def _find_tmdb_id(self, imdb_id):
+        """TMDB /find lookup shared by all processes (API errors raise and aren't cached)"""
+        url = f"{self.base_url}/find/{imdb_id}"
+        params = {
+            'api_key': self.api_key,
+            'external_source': 'imdb_id'
+        }
+
+        response = await http_client.aget(url, params=params, timeout=10, cache='episode')
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        data = response.json()
+
+        # Check TV results
+        if data.get('tv_results'):
+            return data['tv_results'][0]['id']
+
+        return None
+
     def get_episode_title(self, tmdb_id, season, episode):
-        """Get specific episode title"""
+        """Get specific episode title (one cached lookup per season)"""
         try:
-            url = f"{self.base_url}/tv/{tmdb_id}/season/{season}/episode/{episode}"
-            params = {'api_key': self.api_key}
-            
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            return data.get('name', '')
-        
+            show = async_engine.run(self._fetch_show(str(tmdb_id), season))
         except Exception as e:
             logger.error(f"Episode title error: {e}")
             return None
+        return show['episode_titles'].get(str(episode)) if show else None
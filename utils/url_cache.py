@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Resolved URL Cache
+Persistent cache for resolver results (otakudesu:/ajax: special URLs and
+embed pages -> direct stream URL). Each entry lives until the direct URL
+expires - read from googlevideo's expire= parameter or a per-host default -
+and is refreshed in the background shortly before that.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import time
+from urllib.parse import urlparse, parse_qs
+
+from utils import deadline, singleflight, storage
+
+logger = logging.getLogger(__name__)
+
+# Lifetime of direct URLs per host when the URL doesn't carry its own expiry
+HOST_TTL = {
+    'googlevideo.com': 60 * 60,
+    'blogger.com': 60 * 60,
+    'krakenfiles.com': 60 * 60,
+    'pixeldrain.com': 24 * 60 * 60,      # /api/file/ID never changes
+    'storages.sokuja.id': 6 * 60 * 60,
+}
+DEFAULT_TTL = 30 * 60
+
+# Refresh in the background when less than this is left
+REFRESH_MARGIN = 5 * 60
+
+# Never hand out a URL with less than this left (the player needs time to start)
+MIN_REMAINING = 60
+
+# Degraded answers flagged by the resolver run in progress (see fallback())
+_fallbacks = contextvars.ContextVar('url_cache_fallbacks', default=None)
+
+# Background refreshes in flight (the loop only keeps weak references to tasks)
+_refresh_tasks = set()
+
+
+def url_expiry(url, now=None):
+    """
+    Unix time a direct URL stops working
+
+    Args:
+        url: Direct stream URL
+        now: Current time (default time.time())
+
+    Returns:
+        The URL's expire= parameter if it has one, else now + the host's TTL
+    """
+    now = time.time() if now is None else now
+    parsed = urlparse(url)
+
+    expire = parse_qs(parsed.query).get('expire')
+    if expire and expire[0].isdigit():
+        return float(expire[0])
+
+    host = parsed.hostname or ''
+    for domain, ttl in HOST_TTL.items():
+        if host == domain or host.endswith('.' + domain):
+            return now + ttl
+    return now + DEFAULT_TTL
+
+
+class ResolvedUrl:
+    def __init__(self, key, value, resolved_at, expires_at):
+        self.key = key
+        self.value = value
+        self.resolved_at = resolved_at
+        self.expires_at = expires_at
+
+    def is_usable(self):
+        return time.time() < self.expires_at - MIN_REMAINING
+
+    def needs_refresh(self):
+        return time.time() >= self.expires_at - REFRESH_MARGIN
+
+
+class ResolvedUrlCache(storage.SQLiteCache):
+    LABEL = 'Resolved URL cache'
+    TABLE = 'resolved_urls'
+    SCHEMA = ('''
+        CREATE TABLE IF NOT EXISTS resolved_urls (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            resolved_at REAL,
+            expires_at REAL
+        )
+    ''',)
+    EXPIRES = 'expires_at'
+
+    def __init__(self, db_name='resolved_urls.db'):
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        super().__init__(db_name)
+
+    def get(self, key):
+        """Get a still-usable resolved URL entry or None"""
+        row = self.fetchone(
+            'SELECT key, value, resolved_at, expires_at FROM resolved_urls WHERE key = ?',
+            (key,)
+        )
+        if not row:
+            return None
+        entry = ResolvedUrl(row[0], json.loads(row[1]), row[2], row[3])
+        return entry if entry.is_usable() else None
+
+    def store(self, key, value):
+        """
+        Store a resolver result (a URL string or {'url': ..., 'headers': ...})
+
+        Returns:
+            Unix time the entry expires
+        """
+        url = value.get('url', '') if isinstance(value, dict) else value
+        now = time.time()
+        expires_at = url_expiry(url, now)
+        self.write('''
+            INSERT OR REPLACE INTO resolved_urls (key, value, resolved_at, expires_at)
+            VALUES (?, ?, ?, ?)
+        ''', (key, json.dumps(value), now, expires_at))
+        return expires_at
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'refreshes': self.refreshes, 'enabled': self.enabled}
+
+
+# Global instance
+url_cache = ResolvedUrlCache()
+
+
+def fallback(value):
+    """
+    Mark a resolver result as a degraded fallback (e.g. the raw embed URL when
+    the direct one couldn't be extracted): it is returned but not cached, and
+    neither is the result of a cached resolver that hands it on
+
+    Returns:
+        value unchanged
+    """
+    flags = _fallbacks.get()
+    if flags is not None:
+        flags.append(value)
+    return value
+
+
+def cached_resolver(name, key=None):
+    """
+    Decorator: cache an async resolver's result until its URL expires
+
+    Results marked with fallback() or produced after the request deadline
+    ran out (the resolver may have given up early) are not cached.
+
+    Args:
+        name: Key prefix (resolver name)
+        key: Function mapping the resolver args to the cache key (default:
+             the first argument) - e.g. to drop a per-page nonce
+    """
+    def decorator(func):
+        async def run(*args):
+            # Runs as its own singleflight task, so the flags are this resolve's only
+            flags = []
+            _fallbacks.set(flags)
+            result = await func(*args)
+            return result, not flags and not deadline.expired()
+
+        async def resolve_and_store(cache_key, args):
+            # Concurrent misses / refreshes for one URL share one resolve
+            result, cacheable = await singleflight.group.do(('resolve', cache_key), run, *args)
+            if not cacheable:
+                fallback(result)
+            elif result and isinstance(result, (str, dict)):
+                await storage.run(url_cache.store, cache_key, result)
+            return result
+
+        async def refresh(cache_key, args):
+            try:
+                await resolve_and_store(cache_key, args)
+            except Exception as e:
+                logger.debug(f"Background refresh of {cache_key} failed: {e}")
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            cache_key = f"{name}:{key(*args) if key else args[0]}"
+            entry = await storage.run(url_cache.get, cache_key)
+            if entry is None:
+                url_cache.misses += 1
+                return await resolve_and_store(cache_key, args)
+
+            url_cache.hits += 1
+            if entry.needs_refresh():
+                url_cache.refreshes += 1
+                # Fresh context: the refresh outlives this request's deadline
+                task = contextvars.Context().run(asyncio.ensure_future, refresh(cache_key, args))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            return entry.value
+
+        return wrapper
+    return decorator
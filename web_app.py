@@ -8,36 +8,15 @@ from flask import Flask, render_template, jsonify, request, Response
 from flask_cors import CORS
 import sys
 
-# Import scrapers
-from scrapers import samehadaku_scraper, otakudesu_scraper, sokuja_scraper, nyaa_scraper
-from utils import stream_proxy
+# Providers come from the registry, lookups go through the shared stream engine
+from scrapers import registry
+from utils import stream_proxy, prewarm, stream_engine
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for API
 
-# Provider configuration
-PROVIDERS = {
-    'samehadaku': {
-        'name': 'Samehadaku',
-        'icon': '🎬',
-        'module': samehadaku_scraper
-    },
-    'otakudesu': {
-        'name': 'Otakudesu',
-        'icon': '🔵',
-        'module': otakudesu_scraper
-    },
-    'sokuja': {
-        'name': 'Sokuja',
-        'icon': '🟡',
-        'module': sokuja_scraper
-    },
-    'torrent': {
-        'name': 'Torrent (Nyaa)',
-        'icon': '🎲',
-        'module': nyaa_scraper
-    }
-}
+# Providers offered in the web UI (menu order)
+WEB_PROVIDERS = ['samehadaku', 'otakudesu', 'sokuja', 'torrent']
 
 @app.route('/')
 def index():
@@ -50,10 +29,11 @@ def get_providers():
     providers = [
         {
             'id': key,
-            'name': val['name'],
-            'icon': val['icon']
+            'name': registry.get(key).name,
+            'icon': registry.get(key).icon,
+            'capabilities': sorted(registry.get(key).capabilities)
         }
-        for key, val in PROVIDERS.items()
+        for key in WEB_PROVIDERS
     ]
     return jsonify(providers)
 
@@ -66,12 +46,11 @@ def search_anime():
     if not provider_id or not query:
         return jsonify({'error': 'Missing provider or query'}), 400
     
-    if provider_id not in PROVIDERS:
+    if provider_id not in WEB_PROVIDERS:
         return jsonify({'error': 'Invalid provider'}), 400
     
     try:
-        provider = PROVIDERS[provider_id]
-        results = provider['module'].search_anime(query)
+        results = stream_engine.search(provider_id, query)
         
         return jsonify({
             'provider': provider_id,
@@ -90,12 +69,11 @@ def get_episodes():
     if not provider_id or not url:
         return jsonify({'error': 'Missing provider or url'}), 400
     
-    if provider_id not in PROVIDERS:
+    if provider_id not in WEB_PROVIDERS:
         return jsonify({'error': 'Invalid provider'}), 400
     
     try:
-        provider = PROVIDERS[provider_id]
-        episodes = provider['module'].get_anime_episodes(url)
+        episodes = stream_engine.episodes(provider_id, url)
         
         return jsonify({
             'provider': provider_id,
@@ -113,21 +91,12 @@ def get_servers():
     if not provider_id or not url:
         return jsonify({'error': 'Missing provider or url'}), 400
     
-    if provider_id not in PROVIDERS:
+    if provider_id not in WEB_PROVIDERS:
         return jsonify({'error': 'Invalid provider'}), 400
     
     try:
-        provider = PROVIDERS[provider_id]
-        
-        # Get video links based on provider
-        if provider_id == 'samehadaku':
-            servers = samehadaku_scraper.get_all_video_links(url)
-        elif provider_id == 'otakudesu':
-            servers = otakudesu_scraper.get_video_links(url)
-        elif provider_id == 'sokuja':
-            servers = sokuja_scraper.get_video_links(url)
-        else:
-            servers = []
+        # Torrent sites have no episode pages (empty list)
+        servers = stream_engine.links(provider_id, url)
         
         # Organize servers by resolution
         organized = {}
@@ -197,36 +166,12 @@ def resolve_url():
         return jsonify({'error': 'Missing url'}), 400
     
     try:
-        from utils.embed_resolvers import resolve_embed_url
-        from scrapers import samehadaku_scraper, otakudesu_scraper
-        
-        direct_url = None
-        
-        # Handle special URLs
-        if video_url.startswith('ajax:'):
-            # Samehadaku AJAX URL
-            result = samehadaku_scraper.get_streaming_url(video_url)
-            if isinstance(result, dict):
-                direct_url = result['url']
-            else:
-                direct_url = result
-        
-        elif video_url.startswith('otakudesu:'):
-            # Otakudesu special URL
-            result = otakudesu_scraper.resolve_otakudesu_url(video_url)
-            if isinstance(result, dict):
-                direct_url = result['url']
-            else:
-                direct_url = result
-        
-        elif 'desustream.com/safelink' in video_url:
-            # Unwrap safelink
-            from utils.embed_resolvers import unwrap_safelink
-            direct_url = unwrap_safelink(video_url)
-        
+        # Special provider URLs (ajax:, otakudesu:), safelinks and embeds
+        result = stream_engine.resolve(video_url, server_name)
+        if isinstance(result, dict):
+            direct_url = result['url']
         else:
-            # Try embed resolver
-            direct_url = resolve_embed_url(video_url, server_name)
+            direct_url = result
         
         if not direct_url:
             return jsonify({'error': 'Could not resolve URL'}), 400
@@ -259,4 +204,5 @@ def resolve_url():
 if __name__ == '__main__':
     print("🌐 Starting Anime Streaming Web Server...")
     print("📺 Open http://localhost:5000 in your browser")
+    prewarm.prewarm(prewarm.WEB_HOSTS)
     app.run(host='0.0.0.0', port=5000, debug=True)